@@ -1,18 +1,29 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
 # On utilise directement l'URL préparée par le fichier config
+# Moteur synchrone : migrations (Alembic) et scripts de maintenance (backfills), hors boucle d'évènements
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Moteur asynchrone (asyncpg) : API et worker, aucune requête SQL ne bloque la boucle d'évènements
+async_engine = create_async_engine(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+# expire_on_commit=False : les objets restent lisibles après commit sans nouvelle requête
+# (un accès paresseux est impossible en asynchrone, les relations utiles sont chargées par selectinload)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 
-def get_db():
-    db = SessionLocal()
-    try:
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
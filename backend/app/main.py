@@ -1,15 +1,32 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app import models as db_models
-from app.database import engine
-from app.routers import threads, messages, models
+from app.core.config import settings
+from app.database import async_engine
+from app.routers import threads, messages, models, admin
+from app.services.agents.base import OPENROUTER_URL
+from app.services.http_client import http_clients
+
+# Le schéma est géré par les migrations (alembic upgrade head), aucun DDL au démarrage
+
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(levelname)s: %(name)s: %(message)s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ouverture du pool HTTP partagé au démarrage, fermeture propre à l'arrêt
+    await http_clients.startup([OPENROUTER_URL])
+    yield
+    await http_clients.shutdown()
+    await async_engine.dispose()
 
-# Initialisation DB
-db_models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="SuperQ Multi-Agent API")
+app = FastAPI(title="SuperQ Multi-Agent API", lifespan=lifespan)
 
 # Inclusion des routeurs
 app.include_router(threads.router)
 app.include_router(messages.router)
 app.include_router(models.router)
+app.include_router(admin.router)
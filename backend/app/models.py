@@ -1,28 +1,55 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Integer
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Integer, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from .database import Base
 
 
 class Thread(Base):
     __tablename__ = "threads"
+    __table_args__ = (
+        # Liste des threads, du plus récent au plus ancien (pagination par curseur sur (created_at, id))
+        Index("ix_threads_created_at_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     system_prompt = Column(Text, nullable=True)
     current_summary = Column(Text, nullable=True)
+    # Résumé structuré validé (chargé à la demande : inutile au chemin critique du chat)
+    summary_data = deferred(Column(JSONB(none_as_null=True), nullable=True))
+    # Bloc [MEMORY] pré-rendu pour la version courante du résumé
+    summary_memory = Column(Text, nullable=True)
+    # Version du résumé (compare-and-swap) et compteurs d'écritures / de conflits
+    summary_version = Column(Integer, nullable=False, default=0, server_default="0")
+    summary_writes = Column(Integer, nullable=False, default=0, server_default="0")
+    summary_conflicts = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relation (1, n) Thread -> Messages
     messages = relationship("Message", back_populates="thread", cascade="all, delete-orphan")
+    # Jobs de résumé en file d'attente (supprimés avec le thread)
+    summary_jobs = relationship("SummaryJob", cascade="all, delete-orphan", passive_deletes=True)
+    # Mémoire hiérarchique : segments de résumé par plage de messages, tous niveaux confondus
+    summary_segments = relationship(
+        "SummarySegment",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="(SummarySegment.level, SummarySegment.position)",
+    )
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Historique d'un thread dans l'ordre chronologique (get_messages par curseur, fenêtre de contexte)
+        Index("ix_messages_thread_id_created_at_id", "thread_id", "created_at", "id"),
+        # Réponses d'un message (suppression d'une paire question / réponse)
+        Index("ix_messages_answer_of", "answer_of"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     thread_id = Column(UUID(as_uuid=True), ForeignKey("threads.id"))
@@ -31,6 +58,8 @@ class Message(Base):
     model_name = Column(String, nullable=True)
     rating = Column(Integer, nullable=True, default=None)
     answer_of = Column(UUID(as_uuid=True), ForeignKey("messages.id"), nullable=True, default=None)
+    # Nombre de tokens du contenu, calculé une seule fois à l'insertion
+    token_count = Column(Integer, nullable=True, default=None)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     thread = relationship("Thread", back_populates="messages")
@@ -46,3 +75,48 @@ class Model(Base):
     is_free = Column(Boolean, nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SummaryJob(Base):
+    __tablename__ = "summary_jobs"
+    __table_args__ = (
+        # Déduplication : au plus un job en attente par thread (les nouveaux s'y fusionnent)
+        Index("uq_summary_jobs_pending_thread", "thread_id", unique=True, postgresql_where=text("status = 'pending'")),
+        Index("ix_summary_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    thread_id = Column(UUID(as_uuid=True), ForeignKey("threads.id", ondelete="CASCADE"), nullable=False)
+    model_name = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SummarySegment(Base):
+    __tablename__ = "summary_segments"
+    __table_args__ = (
+        UniqueConstraint("thread_id", "level", "position", name="uq_summary_segments_thread_level_position"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    thread_id = Column(UUID(as_uuid=True), ForeignKey("threads.id", ondelete="CASCADE"), nullable=False)
+    # Niveau 0 : résumé d'un lot de messages ; niveau n+1 : fusion de segments du niveau n
+    level = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)
+    # Plage couverte (created_at du premier et du dernier message) et nombre de messages
+    messages_from = Column(DateTime, nullable=False)
+    messages_until = Column(DateTime, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    content = Column(Text, nullable=True)
+    # Ligne pré-rendue du bloc [MEMORY] et son poids en tokens
+    memory_line = Column(Text, nullable=True)
+    token_count = Column(Integer, nullable=True)
+    # À recalculer au prochain rafraîchissement (segment créé ou dont le calcul a échoué)
+    dirty = Column(Boolean, nullable=False, default=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,285 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+
+from app.services.circuit_breaker import circuit_breakers
+from app.services.hedging import hedging_stats, latency_tracker
+from app.services.http_client import http_clients
+from app.services.intent_classifier import intent_stats
+from app.services.llm_cache import llm_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.plugins import agent_plugins, tool_plugins
+from app.services.rate_limiter import rate_limiters
+from app.services.singleflight import llm_flights
+from app.services.speculation import speculation_budget, speculation_stats
+from app.services.summary_jobs import summary_job_stats
+from app.services.summary_store import summary_conflict_stats
+from app.services.tools.cache import tool_caches, tool_cache_stats
+from app.services.tools.gazetteer import gazetteer
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/http-pool")
+def get_http_pool_stats():
+    """
+        Expose connection pool statistics of the shared HTTP client.
+
+        Useful to check keep-alive connection reuse under load: a `reuse_ratio`
+        close to 1.0 means almost every upstream request was served on an
+        already open connection.
+
+        Returns:
+            dict: Mapping upstream hostname -> pool counters and limits.
+    """
+    return http_clients.stats()
+
+
+@router.get("/rate-limits")
+def get_rate_limit_stats():
+    """
+        Expose the state of the per-model rate limiters.
+
+        For each model called since startup: queue depth, in-flight requests,
+        number of 429 responses received, average/maximum queue wait time and
+        the remaining pause imposed by the provider, if any.
+
+        Returns:
+            dict: Mapping model identifier -> limiter statistics.
+    """
+    return rate_limiters.stats()
+
+
+@router.get("/hedging")
+def get_hedging_stats():
+    """
+        Expose hedged request counters and the observed latency per model.
+
+        Returns:
+            dict: Global hedging counters (hedges fired, primary vs fallback wins)
+                and, per model, the number of latency samples, the median and the
+                current hedging threshold.
+    """
+    return {"stats": hedging_stats.as_dict(), "latencies": latency_tracker.stats()}
+
+
+@router.get("/intent-classifier")
+def get_intent_classifier_stats():
+    """
+        Expose the decisions of the local intent classifier.
+
+        Natural language prompts are first classified locally; only uncertain
+        ones (confidence below INTENT_CONFIDENCE_THRESHOLD) reach the LLM router.
+
+        Returns:
+            dict: Prompts routed to tools locally, prompts answered without tool
+                locally, prompts deferred to the LLM router, the threshold and
+                the share of prompts decided without a router call.
+    """
+    return intent_stats.as_dict()
+
+
+@router.get("/speculation")
+def get_speculation_stats():
+    """
+        Expose how often speculative chat generation pays off.
+
+        With SPECULATIVE_CHAT_ENABLED, the plain chat answer starts while the LLM
+        router decides: a "win" means no tool was needed and the answer already
+        in progress was used; a "loss" means it was cancelled for an enriched one.
+
+        Returns:
+            dict: Speculations started, wins, losses, skipped (budget exhausted),
+                router timeouts, win rate, seconds of router latency overlapped
+                by winning speculations, and the current budget state.
+    """
+    return {"stats": speculation_stats.as_dict(), "budget": speculation_budget.stats()}
+
+
+@router.get("/circuit-breakers")
+def get_circuit_breakers():
+    """
+        Expose the state of the per-model circuit breakers.
+
+        An "open" model is skipped immediately in favour of the fallback model
+        until its cooldown expires; "half_open" means a probe call is allowed.
+
+        Returns:
+            dict: Mapping model identifier -> state, error rate, consecutive
+                timeouts, rejected calls and time before the next probe.
+    """
+    return circuit_breakers.stats()
+
+
+@router.post("/circuit-breakers/{model:path}/reset")
+def reset_circuit_breaker(model: str):
+    """
+        Force a model's circuit breaker back to the closed state.
+
+        Args:
+            model (str): The technical model identifier (e.g. "openai/gpt-oss-120b:free").
+
+        Returns:
+            dict: The breaker statistics after the reset.
+
+        Raises:
+            HTTPException: 404 error if no breaker exists for this model.
+    """
+    if model not in circuit_breakers.stats():
+        raise HTTPException(status_code=404, detail="Disjoncteur non trouvé")
+    breaker = circuit_breakers.get(model)
+    breaker.reset()
+    return breaker.stats()
+
+
+@router.get("/llm-cache")
+def get_llm_cache_stats():
+    """
+        Expose LLM response cache counters.
+
+        Returns:
+            dict: Backend type, number of entries, global hit/miss counters and
+                hit rate, and the same counters per agent type.
+    """
+    return llm_cache.stats()
+
+
+@router.delete("/llm-cache", status_code=204)
+def clear_llm_cache():
+    """
+        Drop every cached LLM response.
+
+        Returns:
+            None: Returns a 204 No Content status code on success.
+    """
+    llm_cache.clear()
+    return None
+
+
+@router.get("/tool-cache")
+def get_tool_cache_stats():
+    """
+        Expose the tool result caches.
+
+        Returns:
+            dict: Mapping cache name (a tool, or one of its steps such as
+                "get_weather.geocoding") -> entries, policy, fresh and stale hits,
+                misses, hit rate, background refreshes and evictions.
+    """
+    return tool_cache_stats()
+
+
+@router.delete("/tool-cache", status_code=204)
+def clear_tool_cache():
+    """
+        Drop every cached tool result.
+
+        Returns:
+            None: Returns a 204 No Content status code on success.
+    """
+    for cache in tool_caches.values():
+        cache.clear()
+    return None
+
+
+@router.get("/plugins")
+def get_plugins():
+    """
+        Expose the tool and agent plugin registries.
+
+        Returns:
+            dict: Per kind, the registry version and each declared plugin with its
+                source (builtin or distribution name), whether it is loaded yet,
+                its import time and its load error if any.
+    """
+    return {"tools": tool_plugins.stats(), "agents": agent_plugins.stats()}
+
+
+@router.post("/plugins/reload")
+def reload_plugins():
+    """
+        Discover the tool and agent plugins again (newly installed packages, PLUGINS_DISABLED).
+
+        Plugins are re-imported on their next use, and the orchestrator recompiles
+        its router prompt and slash table on the next routed request.
+
+        Returns:
+            dict: The registries after discovery.
+    """
+    tool_plugins.discover()
+    agent_plugins.discover()
+    return get_plugins()
+
+
+@router.get("/gazetteer")
+def get_gazetteer_stats():
+    """
+        Expose the offline city index used by the weather tool.
+
+        Returns:
+            dict: Index file, whether it is loaded, number of names,
+                and names resolved offline (hits) vs. sent to the geocoding API (misses).
+    """
+    return gazetteer.stats()
+
+
+@router.get("/single-flight")
+def get_single_flight_stats():
+    """
+        Expose LLM call coalescing counters.
+
+        Returns:
+            dict: Calls currently in flight, upstream requests started (leaders),
+                calls that joined an in-flight request (coalesced) and upstream
+                requests cancelled because every waiter went away (abandoned).
+    """
+    return llm_flights.stats()
+
+
+@router.get("/scheduler")
+def get_scheduler_stats():
+    """
+        Expose the LLM call scheduler state per priority class.
+
+        Returns:
+            dict: Global running count and, for the interactive, router and
+                background classes: running calls, limit, queue depth, oldest
+                wait and average/maximum wait before a slot was granted.
+    """
+    return llm_scheduler.stats()
+
+
+@router.get("/summary-jobs")
+async def get_summary_job_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+        Expose the state of the durable summary job queue.
+
+        Args:
+            db (AsyncSession): Database session provided by dependency injection.
+
+        Returns:
+            dict: Number of pending, running and failed jobs, age in seconds of
+                the oldest pending job and the last permanently failed jobs
+                with their error.
+    """
+    return await summary_job_stats(db)
+
+
+@router.get("/summary-conflicts")
+async def get_summary_conflict_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+        Expose the version conflict rate of thread summary writes.
+
+        Summaries are written with a compare-and-swap on `threads.summary_version`;
+        a conflict means another writer (worker, /summary) updated the summary
+        while this one was computing, and triggered a re-merge.
+
+        Args:
+            db (AsyncSession): Database session provided by dependency injection.
+
+        Returns:
+            dict: Successful writes, conflicts, conflict rate (conflicts / attempts)
+                and the most contested threads.
+    """
+    return await summary_conflict_stats(db)
@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from fastapi import BackgroundTasks
-from app.database import SessionLocal
+import json
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app import models, schemas
 from app.core.config import settings
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_async_db
 from app.services.agents.orchestrator import OrchestratorAgent
+from app.services.circuit_breaker import circuit_breakers
+from app.services.hedging import hedged_call, timed_call
+from app.services.pagination import InvalidCursor, keyset_page, split_page
+from app.services.summary_jobs import enqueue_summary_job
+from app.services.summary_memory import thread_memory_block
+from app.services.token_manager import select_context_window
+from app.services.tokenizer import tokenizer
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/threads", tags=["Messages"])
 
@@ -15,93 +28,62 @@ router = APIRouter(prefix="/threads", tags=["Messages"])
 orchestrator = OrchestratorAgent()
 
 
-async def update_thread_summary(
+@router.get("/{thread_id}/messages", response_model=schemas.PaginatedMessages)
+async def get_messages(
         thread_id: str,
-        messages_for_summary: list,
-        model_name: str
+        db: AsyncSession = Depends(get_async_db),
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+        include_total: bool = False,
 ):
     """
-    Tâche asynchrone pour mettre à jour le résumé du thread en arrière-plan.
-    """
-    # 1. Création d'une nouvelle session dédiée à la tâche de fond
-    print("DEBUG: Lancement de la Mise à jour du résumé en arrière-plan...")
-    db = SessionLocal()
-
-    try:
-        # 2. Récupération du thread
-        thread = db.query(models.Thread).filter(models.Thread.id == thread_id).first()
-        if not thread:
-            print(f"DEBUG: Thread {thread_id} non trouvé pour le résumé.")
-            return
-
-        print(f"DEBUG: Lancement du résumé pour le thread {thread_id}...")
-
-        # 3. Appel à l'agent de résumé via l'orchestrateur
-        new_json_summary = await orchestrator.summary_agent.process(
-            messages_to_summarize=messages_for_summary,
-            current_summary_json=str(thread.current_summary) if thread.current_summary else "",
-            model_name=model_name,
-        )
-
-        # 4. Mise à jour si un résumé a été généré
-        if new_json_summary:
-            thread.current_summary = new_json_summary
-            db.add(thread)
-            db.commit()
-            print(f"DEBUG: Résumé mis à jour avec succès pour le thread {thread_id}")
-        else:
-            print(f"DEBUG: L'agent de résumé n'a pas renvoyé de contenu.")
-
-    except Exception as e:
-        print(f"ERROR: Échec lors de la mise à jour du résumé : {str(e)}")
-        db.rollback()
-
-    finally:
-        # 5. Toujours fermer la session manuellement dans une BackgroundTask
-        db.close()
-
-
-@router.get("/{thread_id}/messages", response_model=schemas.PaginatedMessages)
-def get_messages(thread_id: str, db: Session = Depends(get_db), limit: int = 20, offset: int = 0):
-    """
-        Retrieve a paginated list of messages for a specific thread.
+        Retrieve a page of messages for a specific thread, newest first.
 
-        This endpoint fetches messages associated with a given thread ID, ordered by
-        creation date in descending order (newest first). It returns both the
-        list of messages and the total count for pagination purposes.
+        Pages are keyed on (created_at, id) instead of an offset: the
+        `next_cursor` of a page is passed back as `cursor` to get the older
+        messages that follow, and each page is an index seek whatever its
+        depth. Messages sent while the user scrolls back do not shift the
+        pages. The total message count is only computed on request.
 
         Args:
             thread_id (str): The unique identifier of the thread.
-            db (Session): Database session provided by the dependency injection.
-            limit (int, optional): The maximum number of messages to return. Defaults to 20.
-            offset (int, optional): The number of messages to skip (for pagination). Defaults to 0.
+            db (AsyncSession): Database session provided by the dependency injection.
+            limit (int, optional): The maximum number of messages to return (1 to 100). Defaults to 20.
+            cursor (str, optional): The `next_cursor` of the previous page; omitted for the newest messages.
+            include_total (bool, optional): Also count the thread's messages. Defaults to False.
 
         Returns:
             dict: A dictionary containing:
                 - "messages": A list of models.Message objects.
-                - "total": The total number of messages in the thread.
+                - "next_cursor": The cursor of the next (older) page, or None on the last page.
+                - "total": The total number of messages in the thread, if requested.
 
         Raises:
-            HTTPException: 404 error if the thread does not exist.
+            HTTPException: 404 error if the thread does not exist, 400 if the cursor is invalid.
     """
-    thread = db.query(models.Thread).filter(models.Thread.id == thread_id).first()
-    if not thread:
+    thread_exists = await db.scalar(select(models.Thread.id).where(models.Thread.id == thread_id))
+    if not thread_exists:
         raise HTTPException(status_code=404, detail="Thread non trouvé")
 
-    total = db.query(func.count(models.Message.id)).filter(models.Message.thread_id == thread_id).scalar()
-    messages = (db.query(models.Message)
-                .filter(models.Message.thread_id == thread_id)
-                .order_by(models.Message.created_at.desc())
-                .offset(offset).limit(limit).all())
-    return {"messages": messages, "total": total}
+    try:
+        query = keyset_page(
+            select(models.Message).where(models.Message.thread_id == thread_id), models.Message, limit, cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    messages, next_cursor = split_page(list(await db.scalars(query)), limit)
+
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count(models.Message.id)).where(models.Message.thread_id == thread_id))
+    return {"messages": messages, "next_cursor": next_cursor, "total": total}
 
 
 @router.post("/{thread_id}/messages", response_model=schemas.MessageSchema)
 async def send_message(
         thread_id: str,
         payload: schemas.MessageCreate,
-        background_tasks: BackgroundTasks,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
         Process an incoming user message and generate an AI assistant response.
@@ -109,18 +91,20 @@ async def send_message(
         This asynchronous endpoint performs the following steps:
         1. Validates the existence of the conversation thread.
         2. Persists the user's message to the database.
-        3. Retrieves recent message history for short-term memory context.
+        3. Retrieves recent message history for short-term memory context: as many
+           messages as fit in MAX_WINDOW_SIZE minus the summary, selected in SQL.
         4. Delegates to the OrchestratorAgent, which routes the request to the
            appropriate agent (ChatAgent, SummaryAgent, etc.) based on slash commands,
-           LLM-based routing, or fallback logic.
+           LLM-based routing, or fallback logic. With HEDGING_ENABLED, the fallback
+           model is raced against a late primary model instead of waiting for it.
         5. Saves the assistant's response to the database.
-        6. Triggers a background summarization process if a specific message count threshold
-           is crossed, updating the thread's long-term memory (summary).
+        6. Queues a summary job (processed by the `app.worker` process) if a specific
+           message count threshold is crossed, updating the thread's long-term memory.
 
         Args:
             thread_id (str): The unique identifier of the thread.
             payload (schemas.MessageCreate): The user message content and preferred model.
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             models.Message: The newly created assistant message object.
@@ -132,13 +116,12 @@ async def send_message(
                 :param db:
                 :param thread_id:
                 :param payload:
-                :param background_tasks:
     """
 
     print("---- Nouveau message ----")
 
-    # 1. Récupération du thread
-    thread = db.query(models.Thread).filter(models.Thread.id == thread_id).first()
+    # 1. Récupération du thread (avec ses segments de résumé, lus par le ChatAgent)
+    thread = await _load_thread(db, thread_id)
     if not thread:
         raise HTTPException(status_code=404, detail="Thread non trouvé")
 
@@ -146,103 +129,231 @@ async def send_message(
     print(payload)
 
     # 2. Sauvegarde du message utilisateur
-    user_msg = models.Message(
-        thread_id=thread_id,
-        role="user",
-        content=payload.content
-    )
+    user_msg = await _save_user_message(db, thread_id, payload.content, payload.model_name)
 
-    db.add(user_msg)
-    db.commit()
-    db.refresh(user_msg)
-
-    # 3. Récupération des messages PRÉCÉDENTS
-    previous_messages = (
-        db.query(models.Message)
-        .filter(models.Message.thread_id == thread_id)
-        .filter(models.Message.id != user_msg.id)
-        .order_by(models.Message.created_at.desc())
-        .limit(settings.SUMMARY_INTERVAL - 1)
-        .all()
-    )[::-1]
+    # 3. Récupération des messages PRÉCÉDENTS (fenêtre bornée en tokens)
+    previous_messages = await _load_previous_messages(db, thread, user_msg, payload.model_name)
+    # Fin de la transaction de lecture : la connexion retourne au pool pendant l'appel LLM
+    await db.commit()
 
     # 4. Appel de l'orchestrateur avec logique de secours (Fallback)
-    models_to_try = [payload.model_name, settings.FALLBACK_MODEL]
+    async def answer_with(model_name: str):
+        return await orchestrator.process(
+            thread=thread,
+            context_messages=previous_messages,
+            user_prompt=payload.content,
+            model_name=model_name,
+        )
+
     ai_content = None
     final_model_used = None
 
-    for model_attempt in models_to_try:
-        try:
-            ai_content = await orchestrator.process(
-                thread=thread,
-                context_messages=previous_messages,
-                user_prompt=payload.content,
-                model_name=model_attempt,
-                db=db,
-            )
-            if ai_content and ai_content.strip():
-                final_model_used = model_attempt
-                break
-        except Exception as e:
-            print(f"WARNING: Échec avec {model_attempt}: {e}")
-            continue
+    if settings.HEDGING_ENABLED:
+        # Le fallback est lancé en parallèle si le modèle principal tarde, le premier qui répond gagne
+        ai_content, final_model_used = await hedged_call(
+            payload.model_name, settings.FALLBACK_MODEL, answer_with
+        )
+    else:
+        models_to_try = [payload.model_name, settings.FALLBACK_MODEL]
+        for model_attempt in models_to_try:
+            if not circuit_breakers.get(model_attempt).available():
+                logger.debug("Circuit ouvert pour %s, passage au modèle suivant", model_attempt)
+                continue
+            try:
+                ai_content = await timed_call(model_attempt, answer_with)
+                if ai_content and ai_content.strip():
+                    final_model_used = model_attempt
+                    break
+            except Exception as e:
+                logger.warning("Échec avec %s : %s", model_attempt, e)
+                continue
 
     if not ai_content:
         raise HTTPException(status_code=502, detail="Tous les modèles ont échoué.")
 
     # 5. Sauvegarde de la réponse
+    assistant_msg = await _save_assistant_message(db, thread_id, ai_content, final_model_used, user_msg)
+
+    # 6. Mise à jour du résumé en ARRIÈRE-PLAN
+    # On ne bloque pas la réponse utilisateur pour le résumé : le job est traité par le worker
+    await _schedule_summary(db, thread_id, final_model_used)
+
+    return assistant_msg
+
+
+@router.post("/{thread_id}/messages/stream")
+async def send_message_stream(
+        thread_id: str,
+        payload: schemas.MessageCreate,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+        Streaming variant of `send_message`, relaying tokens as they are generated.
+
+        The response is a Server-Sent Events stream (`text/event-stream`) whose
+        `data:` lines are JSON objects:
+        - `{"type": "token", "content": "..."}` for each generated fragment.
+        - `{"type": "reset", "model_name": "..."}` when the current model failed
+          mid-answer and the fallback model restarts the answer from scratch.
+        - `{"type": "done", "message": {...}}` once the assistant message has been
+          persisted (same shape as `MessageSchema`).
+        - `{"type": "error", "detail": "..."}` if every model failed.
+
+        Slash commands (agents and tools) and router-enriched prompts go through
+        the same OrchestratorAgent routing as the non-streaming endpoint.
+
+        Args:
+            thread_id (str): The unique identifier of the thread.
+            payload (schemas.MessageCreate): The user message content and preferred model.
+            db (AsyncSession): Database session provided by dependency injection.
+
+        Returns:
+            StreamingResponse: The SSE stream of the assistant answer.
+
+        Raises:
+            HTTPException: 404 error if the specified thread is not found.
+    """
+    thread_exists = await db.scalar(select(models.Thread.id).where(models.Thread.id == thread_id))
+    if not thread_exists:
+        raise HTTPException(status_code=404, detail="Thread non trouvé")
+
+    user_msg = await _save_user_message(db, thread_id, payload.content, payload.model_name)
+
+    async def event_stream():
+        # Session dédiée : le flux est consommé après la fin du handler
+        async with AsyncSessionLocal() as stream_db:
+            stream_thread = await _load_thread(stream_db, thread_id)
+            previous_messages = await _load_previous_messages(stream_db, stream_thread, user_msg, payload.model_name)
+            await stream_db.commit()
+
+            models_to_try = [payload.model_name, settings.FALLBACK_MODEL]
+            ai_content = ""
+            final_model_used = None
+
+            for model_attempt in models_to_try:
+                if not circuit_breakers.get(model_attempt).available():
+                    continue
+                fragments = []
+                try:
+                    async for token in orchestrator.stream(
+                        thread=stream_thread,
+                        context_messages=previous_messages,
+                        user_prompt=payload.content,
+                        model_name=model_attempt,
+                    ):
+                        fragments.append(token)
+                        yield _sse_event({"type": "token", "content": token})
+                except Exception as e:
+                    logger.warning("Échec du streaming avec %s : %s", model_attempt, e)
+                    if fragments:
+                        yield _sse_event({"type": "reset", "model_name": model_attempt})
+                    continue
+
+                ai_content = "".join(fragments)
+                if ai_content.strip():
+                    final_model_used = model_attempt
+                    break
+
+            if not ai_content.strip():
+                yield _sse_event({"type": "error", "detail": "Tous les modèles ont échoué."})
+                return
+
+            # Persistance une fois le flux terminé
+            assistant_msg = await _save_assistant_message(
+                stream_db, thread_id, ai_content, final_model_used, user_msg
+            )
+            await _schedule_summary(stream_db, thread_id, final_model_used)
+
+            message = schemas.MessageSchema.model_validate(assistant_msg).model_dump(mode="json")
+            yield _sse_event({"type": "done", "message": message})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse_event(data: dict) -> str:
+    """Formate un évènement Server-Sent Events."""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _save_user_message(db: AsyncSession, thread_id: str, content: str, model_name: str) -> models.Message:
+    """Persiste le message utilisateur (les longs textes sont tokenisés hors de la boucle d'évènements)."""
+    user_msg = models.Message(
+        thread_id=thread_id,
+        role="user",
+        content=content,
+        token_count=await tokenizer.acount(content, model_name)
+    )
+
+    db.add(user_msg)
+    await db.commit()
+    return user_msg
+
+
+async def _load_thread(db: AsyncSession, thread_id: str):
+    """Charge le thread et ses segments de résumé en deux requêtes (aucun chargement paresseux en asynchrone)."""
+    return await db.scalar(
+        select(models.Thread)
+        .options(selectinload(models.Thread.summary_segments))
+        .where(models.Thread.id == thread_id)
+    )
+
+
+async def _load_previous_messages(
+        db: AsyncSession, thread: models.Thread, user_msg: models.Message, model_name: str
+) -> list:
+    """
+    Récupère les messages précédant user_msg (mémoire court terme), du plus ancien au plus récent :
+    autant d'historique que MAX_WINDOW_SIZE le permet une fois la mémoire comptée. La mémoire
+    déduite est le bloc [MEMORY] que le ChatAgent injectera réellement (segments compris).
+    """
+    memory_tokens = await tokenizer.acount(thread_memory_block(thread), model_name)
+    budget = settings.MAX_WINDOW_SIZE - memory_tokens
+    return await select_context_window(db, thread.id, budget, exclude_id=user_msg.id)
+
+
+async def _save_assistant_message(
+        db: AsyncSession,
+        thread_id: str,
+        content: str,
+        model_name: str,
+        user_msg: models.Message
+) -> models.Message:
+    """Persiste la réponse de l'assistant, liée au message utilisateur."""
     assistant_msg = models.Message(
         thread_id=thread_id,
         role="assistant",
-        content=ai_content,
-        model_name=final_model_used,
-        answer_of=user_msg.id
+        content=content,
+        model_name=model_name,
+        answer_of=user_msg.id,
+        token_count=await tokenizer.acount(content, model_name)
     )
     db.add(assistant_msg)
-    db.commit()
-    db.refresh(assistant_msg)
+    await db.commit()
+    return assistant_msg
 
-    # 6. Mise à jour du résumé en ARRIÈRE-PLAN
-    # On ne bloque pas la réponse utilisateur pour le résumé
-    total_msg_count = db.query(func.count(models.Message.id)).filter(
-        models.Message.thread_id == thread_id
-    ).scalar()
+
+async def _schedule_summary(db: AsyncSession, thread_id: str, model_name: str):
+    """Met en file un job de résumé si un nouveau palier SUMMARY_INTERVAL est franchi."""
+    total_msg_count = await db.scalar(
+        select(func.count(models.Message.id)).where(models.Message.thread_id == thread_id)
+    )
 
     # Vérifie si on a franchi une nouvelle centaine/dizaine définie par l'intervalle
     if (total_msg_count // settings.SUMMARY_INTERVAL) > ((total_msg_count - 2) // settings.SUMMARY_INTERVAL):
 
-        print("DEBUG: Mise à jour du résumé en arrière-plan...")
-
-        # On délègue la tâche lourde à BackgroundTasks
-        background_tasks.add_task(
-            update_thread_summary,
-            thread_id,
-            previous_messages + [user_msg, assistant_msg],
-            final_model_used
-        )
+        logger.debug("Mise en file du résumé du thread %s", thread_id)
 
-        """
-        # On récupère les messages pour le résumé
-        messages_for_summary = previous_messages + [user_msg, assistant_msg]
-
-        new_json_summary = await orchestrator.summary_agent.process(
-            messages_to_summarize=messages_for_summary,
-            current_summary_json=str(thread.current_summary) if thread.current_summary else "",
-            model_name=payload.model_name,
-        )
-
-        if new_json_summary:
-            thread.current_summary = new_json_summary
-            db.add(thread)
-            db.commit()
-            print(f"DEBUG: Résumé mis à jour (Total messages: {total_msg_count})")
-        """
-
-    return assistant_msg
+        # Fusionné avec le job en attente du thread s'il y en a déjà un
+        await enqueue_summary_job(db, thread_id=thread_id, model_name=model_name)
+        await db.commit()
 
 
 @router.patch("/{thread_id}/messages/{message_id}/rate", response_model=schemas.MessageSchema)
-def rate_message(message_id: str, payload: schemas.MessageRate, db: Session = Depends(get_db)):
+async def rate_message(message_id: str, payload: schemas.MessageRate, db: AsyncSession = Depends(get_async_db)):
     """
         Update the rating of a specific message.
 
@@ -252,7 +363,7 @@ def rate_message(message_id: str, payload: schemas.MessageRate, db: Session = De
         Args:
             message_id (str): The unique identifier of the message to rate.
             payload (schemas.MessageRate): The rating data (e.g., an integer or boolean score).
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             models.Message: The updated message object with the new rating.
@@ -260,17 +371,16 @@ def rate_message(message_id: str, payload: schemas.MessageRate, db: Session = De
         Raises:
             HTTPException: 404 error if the message does not exist.
     """
-    message = db.query(models.Message).filter(models.Message.id == message_id).first()
+    message = await db.scalar(select(models.Message).where(models.Message.id == message_id))
     if not message:
         raise HTTPException(status_code=404, detail="Message non trouvé")
     message.rating = payload.rating
-    db.commit()
-    db.refresh(message)
+    await db.commit()
     return message
 
 
 @router.delete("/{thread_id}/messages/{message_id}", status_code=204)
-def delete_message(message_id: str, db: Session = Depends(get_db)):
+async def delete_message(message_id: str, db: AsyncSession = Depends(get_async_db)):
     """
         Delete a specific message and its associated counterpart.
 
@@ -281,7 +391,7 @@ def delete_message(message_id: str, db: Session = Depends(get_db)):
 
         Args:
             message_id (str): The unique identifier of the message to delete.
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             None: Returns a 204 No Content status code on success.
@@ -289,25 +399,25 @@ def delete_message(message_id: str, db: Session = Depends(get_db)):
         Raises:
             HTTPException: 404 error if the target message does not exist.
     """
-    message = db.query(models.Message).filter(models.Message.id == message_id).first()
+    message = await db.scalar(select(models.Message).where(models.Message.id == message_id))
     if not message:
         raise HTTPException(status_code=404, detail="Message non trouvé")
 
     # Suppression en cascade du message lié
     if message.answer_of:
         # C'est un assistant → supprimer d'abord cet assistant (qui porte la FK), puis le user
-        linked = db.query(models.Message).filter(models.Message.id == message.answer_of).first()
-        db.delete(message)
-        db.flush()
+        linked = await db.scalar(select(models.Message).where(models.Message.id == message.answer_of))
+        await db.delete(message)
+        await db.flush()
         if linked:
-            db.delete(linked)
+            await db.delete(linked)
     else:
         # C'est un user → supprimer d'abord l'assistant (qui porte la FK), puis le user
-        linked = db.query(models.Message).filter(models.Message.answer_of == message.id).first()
+        linked = await db.scalar(select(models.Message).where(models.Message.answer_of == message.id).limit(1))
         if linked:
-            db.delete(linked)
-            db.flush()
-        db.delete(message)
+            await db.delete(linked)
+            await db.flush()
+        await db.delete(message)
 
-    db.commit()
+    await db.commit()
     return None
@@ -1,16 +1,17 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
-from app.database import get_db
+from app.database import get_async_db
 
 router = APIRouter(prefix="/models", tags=["Models"])
 
 
 @router.get("/models", response_model=List[schemas.ModelSchema])
-def get_models(db: Session = Depends(get_db)):
+async def get_models(db: AsyncSession = Depends(get_async_db)):
     """
         Retrieve all available AI models from the database.
 
@@ -18,16 +19,16 @@ def get_models(db: Session = Depends(get_db)):
         ordered by their creation date in descending order to show the newest models first.
 
         Args:
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             List[models.Model]: A list of all model objects found in the database.
     """
-    return db.query(models.Model).order_by(models.Model.created_at.desc()).all()
+    return list(await db.scalars(select(models.Model).order_by(models.Model.created_at.desc())))
 
 
 @router.post("/models", response_model=schemas.ModelSchema, status_code=201)
-def create_model(payload: schemas.ModelCreate, db: Session = Depends(get_db)):
+async def create_model(payload: schemas.ModelCreate, db: AsyncSession = Depends(get_async_db)):
     """
         Register a new AI model configuration.
 
@@ -37,7 +38,7 @@ def create_model(payload: schemas.ModelCreate, db: Session = Depends(get_db)):
 
         Args:
             payload (schemas.ModelCreate): Data for the new model (label, identifier, etc.).
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             models.Model: The newly created model object.
@@ -49,13 +50,12 @@ def create_model(payload: schemas.ModelCreate, db: Session = Depends(get_db)):
         is_free=payload.is_free,
     )
     db.add(new_model)
-    db.commit()
-    db.refresh(new_model)
+    await db.commit()
     return new_model
 
 
 @router.delete("/models/{model_id}", status_code=204)
-def delete_model(model_id: str, db: Session = Depends(get_db)):
+async def delete_model(model_id: str, db: AsyncSession = Depends(get_async_db)):
     """
         Permanently delete a specific model configuration.
 
@@ -65,7 +65,7 @@ def delete_model(model_id: str, db: Session = Depends(get_db)):
 
         Args:
             model_id (str): The unique identifier of the model to delete.
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             None: Returns a 204 No Content status code on success.
@@ -73,9 +73,9 @@ def delete_model(model_id: str, db: Session = Depends(get_db)):
         Raises:
             HTTPException: 404 error if the model identifier is not found.
     """
-    model = db.query(models.Model).filter(models.Model.id == model_id).first()
+    model = await db.scalar(select(models.Model).where(models.Model.id == model_id))
     if not model:
         raise HTTPException(status_code=404, detail="Modèle non trouvé")
-    db.delete(model)
-    db.commit()
+    await db.delete(model)
+    await db.commit()
     return None
@@ -1,16 +1,19 @@
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app import models, schemas
-from app.database import get_db
+from app.database import get_async_db
+from app.services.pagination import InvalidCursor, keyset_page, split_page
 
 router = APIRouter(prefix="/threads", tags=["Threads"])
 
 
 @router.post("", response_model=schemas.ThreadSchema)
-def create_thread(thread_data: schemas.ThreadCreate, db: Session = Depends(get_db)):
+async def create_thread(thread_data: schemas.ThreadCreate, db: AsyncSession = Depends(get_async_db)):
     """
         Initialize a new conversation thread.
 
@@ -20,7 +23,7 @@ def create_thread(thread_data: schemas.ThreadCreate, db: Session = Depends(get_d
 
         Args:
             thread_data (schemas.ThreadCreate): The initial data including title and system instructions.
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             models.Thread: The newly created thread object with its generated UUID.
@@ -28,49 +31,61 @@ def create_thread(thread_data: schemas.ThreadCreate, db: Session = Depends(get_d
     new_thread = models.Thread(
         title=thread_data.title,
         system_prompt=thread_data.system_prompt,
-        current_summary=""
+        current_summary="",
+        messages=[],
     )
     db.add(new_thread)
-    db.commit()
-    db.refresh(new_thread)
+    await db.commit()
     return new_thread
 
 
-@router.get("", response_model=List[schemas.ThreadSchema])
-def get_threads(
-        db: Session = Depends(get_db),
-        limit: int = 10,
-        offset: int = 0
+@router.get("", response_model=schemas.PaginatedThreads)
+async def get_threads(
+        db: AsyncSession = Depends(get_async_db),
+        limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = None
 ):
     """
-        Retrieve a paginated list of all conversation threads.
+        Retrieve a page of conversation threads, most recent first.
 
-        Fetches available threads ordered by creation date (most recent first).
         Useful for displaying a sidebar or history list in the user interface.
+        Pages are keyed on (created_at, id): pass the `next_cursor` of a page
+        as `cursor` to get the following one.
 
         Args:
-            db (Session): Database session provided by dependency injection.
-            limit (int, optional): Maximum number of threads to return. Defaults to 10.
-            offset (int, optional): Number of threads to skip for pagination. Defaults to 0.
+            db (AsyncSession): Database session provided by dependency injection.
+            limit (int, optional): Maximum number of threads to return (1 to 100). Defaults to 10.
+            cursor (str, optional): The `next_cursor` of the previous page; omitted for the first page.
 
         Returns:
-            List[models.Thread]: A list of thread objects.
+            dict: A dictionary containing:
+                - "threads": A list of thread objects.
+                - "next_cursor": The cursor of the next page, or None on the last page.
+
+        Raises:
+            HTTPException: 400 error if the cursor is invalid.
     """
-    return (db.query(models.Thread)
-            .order_by(models.Thread.created_at.desc())  # Plus récents en premier
-            .offset(offset)
-            .limit(limit)
-            .all())
+    try:
+        query = keyset_page(
+            select(models.Thread).options(selectinload(models.Thread.messages)),  # Messages de toute la page en une requête
+            models.Thread,
+            limit,
+            cursor,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    threads, next_cursor = split_page(list(await db.scalars(query)), limit)
+    return {"threads": threads, "next_cursor": next_cursor}
 
 
 @router.get("/{thread_id}", response_model=schemas.ThreadSchema)
-def get_thread(thread_id: str, db: Session = Depends(get_db)):
+async def get_thread(thread_id: str, db: AsyncSession = Depends(get_async_db)):
     """
         Fetch the details of a specific thread by its ID.
 
         Args:
             thread_id (str): The unique identifier of the thread.
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             models.Thread: The thread object containing its configuration and current summary.
@@ -78,14 +93,11 @@ def get_thread(thread_id: str, db: Session = Depends(get_db)):
         Raises:
             HTTPException: 404 error if the thread ID does not exist.
     """
-    thread = db.query(models.Thread).filter(models.Thread.id == thread_id).first()
-    if not thread:
-        raise HTTPException(status_code=404, detail="Thread non trouvé")
-    return thread
+    return await _get_thread_or_404(db, thread_id)
 
 
 @router.patch("/{thread_id}", response_model=schemas.ThreadSchema)
-def update_thread(thread_id: str, thread_data: schemas.ThreadUpdate, db: Session = Depends(get_db)):
+async def update_thread(thread_id: str, thread_data: schemas.ThreadUpdate, db: AsyncSession = Depends(get_async_db)):
     """
         Update the metadata or system instructions of an existing thread.
 
@@ -95,7 +107,7 @@ def update_thread(thread_id: str, thread_data: schemas.ThreadUpdate, db: Session
         Args:
             thread_id (str): The unique identifier of the thread to update.
             thread_data (schemas.ThreadUpdate): The fields to be updated (title and/or system_prompt).
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             models.Thread: The updated thread object.
@@ -103,20 +115,17 @@ def update_thread(thread_id: str, thread_data: schemas.ThreadUpdate, db: Session
         Raises:
             HTTPException: 404 error if the thread ID does not exist.
     """
-    thread = db.query(models.Thread).filter(models.Thread.id == thread_id).first()
-    if not thread:
-        raise HTTPException(status_code=404, detail="Thread non trouvé")
+    thread = await _get_thread_or_404(db, thread_id)
     if thread_data.title is not None:
         thread.title = thread_data.title
     if thread_data.system_prompt is not None:
         thread.system_prompt = thread_data.system_prompt
-    db.commit()
-    db.refresh(thread)
+    await db.commit()
     return thread
 
 
 @router.delete("/{thread_id}", status_code=204)
-def delete_thread(thread_id: str, db: Session = Depends(get_db)):
+async def delete_thread(thread_id: str, db: AsyncSession = Depends(get_async_db)):
     """
         Permanently delete a thread and all its associated messages.
 
@@ -126,7 +135,7 @@ def delete_thread(thread_id: str, db: Session = Depends(get_db)):
 
         Args:
             thread_id (str): The unique identifier of the thread to delete.
-            db (Session): Database session provided by dependency injection.
+            db (AsyncSession): Database session provided by dependency injection.
 
         Returns:
             None: Returns a 204 No Content status code on success.
@@ -134,15 +143,27 @@ def delete_thread(thread_id: str, db: Session = Depends(get_db)):
         Raises:
             HTTPException: 404 error if the thread ID does not exist.
     """
-    thread = db.query(models.Thread).filter(models.Thread.id == thread_id).first()
-    if not thread:
-        raise HTTPException(status_code=404, detail="Thread non trouvé")
+    thread = await _get_thread_or_404(db, thread_id)
     # Nullifier les FK answer_of pour éviter les conflits de suppression en cascade
-    db.query(models.Message).filter(
-        models.Message.thread_id == thread_id,
-        models.Message.answer_of.isnot(None)
-    ).update({models.Message.answer_of: None})
-    db.flush()
-    db.delete(thread)
-    db.commit()
+    await db.execute(
+        update(models.Message)
+        .where(models.Message.thread_id == thread_id, models.Message.answer_of.isnot(None))
+        .values(answer_of=None)
+        .execution_options(synchronize_session="fetch")
+    )
+    await db.flush()
+    await db.delete(thread)
+    await db.commit()
     return None
+
+
+async def _get_thread_or_404(db: AsyncSession, thread_id: str) -> models.Thread:
+    """Charge un thread avec ses messages (sérialisés par ThreadSchema), ou lève une 404."""
+    thread = await db.scalar(
+        select(models.Thread)
+        .options(selectinload(models.Thread.messages))
+        .where(models.Thread.id == thread_id)
+    )
+    if not thread:
+        raise HTTPException(status_code=404, detail="Thread non trouvé")
+    return thread
@@ -16,6 +16,7 @@ class MessageSchema(BaseModel):
     model_name: Optional[str]
     rating: Optional[int] = None
     answer_of: Optional[UUID4] = None
+    token_count: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -28,7 +29,10 @@ class MessageRate(BaseModel):
 
 class PaginatedMessages(BaseModel):
     messages: List[MessageSchema]
-    total: int
+    # Curseur opaque de la page suivante (messages plus anciens), None sur la dernière page
+    next_cursor: Optional[str] = None
+    # Nombre total de messages du thread, seulement avec include_total=true
+    total: Optional[int] = None
 
 
 # --- SCHÉMAS THREADS ---
@@ -48,6 +52,7 @@ class ThreadSchema(BaseModel):
     title: str
     system_prompt: str
     current_summary: Optional[str]
+    summary_version: int = 0
     created_at: datetime
     messages: List[MessageSchema] = []
 
@@ -55,6 +60,11 @@ class ThreadSchema(BaseModel):
         from_attributes = True
 
 
+class PaginatedThreads(BaseModel):
+    threads: List[ThreadSchema]
+    next_cursor: Optional[str] = None
+
+
 # --- SCHÉMAS MODELS ---
 
 class ModelCreate(BaseModel):
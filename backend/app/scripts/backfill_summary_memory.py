@@ -0,0 +1,63 @@
+"""
+Backfill de threads.summary_data / summary_memory pour les résumés écrits avant leur introduction.
+
+Usage (depuis backend/) :
+    python -m app.scripts.backfill_summary_memory [--batch-size 200]
+"""
+import argparse
+
+from app import models
+from app.database import SessionLocal
+from app.services.summary_store import render_memory_block, structure_summary
+
+
+def backfill_summary_memory(batch_size: int = 200) -> int:
+    """
+        Store the structured summary and the rendered [MEMORY] block of every thread that has none yet.
+
+        The summary version is left untouched: the content does not change,
+        only its precomputed forms are added.
+
+        Args:
+            batch_size (int): Number of threads processed per transaction.
+
+        Returns:
+            int: The total number of threads updated.
+    """
+    db = SessionLocal()
+    updated = 0
+    try:
+        while True:
+            rows = (
+                db.query(models.Thread.id, models.Thread.current_summary)
+                .filter(models.Thread.current_summary.isnot(None), models.Thread.summary_memory.is_(None))
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            mappings = []
+            for row in rows:
+                summary_data = structure_summary(row.current_summary)
+                mappings.append({
+                    "id": row.id,
+                    "summary_data": summary_data,
+                    "summary_memory": render_memory_block(summary_data, row.current_summary),
+                })
+            db.bulk_update_mappings(models.Thread, mappings)
+            db.commit()
+            updated += len(rows)
+            print(f"DEBUG: {updated} threads mis à jour...")
+    finally:
+        db.close()
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill de threads.summary_memory")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    total = backfill_summary_memory(args.batch_size)
+    print(f"Backfill terminé : {total} threads mis à jour.")
@@ -0,0 +1,69 @@
+"""
+Backfill de messages.token_count pour les lignes créées avant l'ajout de la colonne.
+La colonne elle-même est ajoutée par les migrations (alembic upgrade head).
+
+Usage (depuis backend/) :
+    python -m app.scripts.backfill_token_counts [--batch-size 500]
+"""
+import argparse
+from collections import defaultdict
+
+from app import models
+from app.database import SessionLocal
+from app.services.tokenizer import tokenizer
+
+
+def backfill_token_counts(batch_size: int = 500) -> int:
+    """
+        Compute and store the token count of every message that has none yet.
+
+        Rows are processed in batches: each batch is read, tokenized with one
+        `count_many` call per model (assistant rows use the tokenizer of the
+        model that produced them), written with a single bulk UPDATE and
+        committed, so the job can be interrupted and resumed at any time.
+
+        Args:
+            batch_size (int): Number of messages processed per transaction.
+
+        Returns:
+            int: The total number of messages updated.
+    """
+    db = SessionLocal()
+    updated = 0
+    try:
+        while True:
+            rows = (
+                db.query(models.Message.id, models.Message.content, models.Message.model_name)
+                .filter(models.Message.token_count.is_(None))
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            # Tokenisation du lot en un appel (encode_batch) par modèle
+            by_model = defaultdict(list)
+            for row in rows:
+                by_model[row.model_name].append(row)
+
+            mappings = []
+            for model_name, model_rows in by_model.items():
+                counts = tokenizer.count_many([row.content for row in model_rows], model_name)
+                mappings.extend({"id": row.id, "token_count": count} for row, count in zip(model_rows, counts))
+
+            db.bulk_update_mappings(models.Message, mappings)
+            db.commit()
+            updated += len(rows)
+            print(f"DEBUG: {updated} messages mis à jour...")
+    finally:
+        db.close()
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill de messages.token_count")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    total = backfill_token_counts(args.batch_size)
+    print(f"Backfill terminé : {total} messages mis à jour.")
@@ -0,0 +1,73 @@
+"""
+Benchmark de get_optimized_context face à l'algorithme historique (insert(0) et parcours complet).
+
+Usage (depuis backend/) :
+    python -m app.scripts.bench_context_window [--sizes 1000,10000,50000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services.token_manager import get_optimized_context, message_token_count
+
+
+def legacy_optimized_context(thread_summary: str, messages: list):
+    """Version d'origine : insert(0) sur les deux listes et évaluation de tous les messages."""
+    current_tokens = 0
+    kept_messages = []
+    to_be_summarized = []
+    for msg in reversed(messages):
+        msg_tokens = message_token_count(msg)
+        if current_tokens + msg_tokens < settings.MAX_WINDOW_SIZE:
+            kept_messages.insert(0, msg)
+            current_tokens += msg_tokens
+        else:
+            to_be_summarized.insert(0, msg)
+    return kept_messages, to_be_summarized
+
+
+def make_thread(size: int, seed: int = 42) -> list:
+    """Thread synthétique dont les messages portent déjà leur token_count."""
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(role=rng.choice(("user", "assistant")), content="", token_count=rng.randint(5, 400))
+        for _ in range(size)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    """Meilleur temps (en ms) sur `repeat` exécutions."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de get_optimized_context")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"MAX_WINDOW_SIZE = {settings.MAX_WINDOW_SIZE}")
+    print(f"{'messages':>9} {'historique (ms)':>16} {'actuel (ms)':>12} {'gain':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        messages = make_thread(size)
+
+        kept, _ = get_optimized_context("", messages)
+        legacy_kept, _ = legacy_optimized_context("", messages)
+        # L'ancienne version pouvait conserver de petits messages plus anciens après la coupure :
+        # la fenêtre contiguë actuelle en est toujours le suffixe le plus récent
+        assert kept == legacy_kept[len(legacy_kept) - len(kept):]
+
+        legacy_ms = best_of(args.repeat, lambda: legacy_optimized_context("", messages))
+        current_ms = best_of(args.repeat, lambda: get_optimized_context("", messages))
+        print(f"{size:>9} {legacy_ms:>16.2f} {current_ms:>12.3f} {legacy_ms / current_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
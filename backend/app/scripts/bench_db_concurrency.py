@@ -0,0 +1,187 @@
+"""
+Benchmark du débit de requêtes concurrentes : moteur synchrone (psycopg2, appels bloquants
+dans un handler async, comme avant la migration) face au moteur asynchrone (asyncpg + AsyncSession).
+
+Usage (depuis backend/) :
+    python -m app.scripts.bench_db_concurrency [--requests 200] [--concurrency 1,10,50]
+                                               [--llm-ms 50] [--db-latency-ms 5]
+
+Chaque requête reproduit le parcours SQL de send_message : lecture du thread, insertion du
+message utilisateur, fenêtre de contexte, « appel LLM » (asyncio.sleep), insertion de la
+réponse et comptage des messages. --db-latency-ms ajoute un pg_sleep par requête pour simuler
+un Postgres distant ou chargé. Le retard maximal de la boucle d'évènements mesure combien de
+temps les autres requêtes en cours ont été bloquées. Les données créées sont supprimées à la fin.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.core.config import settings
+
+
+def window_query(thread_id, exclude_id, budget: int = 3000):
+    """Même requête que select_context_window (somme cumulée des tokens, du plus récent au plus ancien)."""
+    weight = func.coalesce(models.Message.token_count, func.length(models.Message.content) / 4)
+    running = func.sum(weight).over(order_by=(models.Message.created_at.desc(), models.Message.id.desc()), rows=(None, 0))
+    window = (
+        select(models.Message.id.label("id"), running.label("running_tokens"))
+        .where(models.Message.thread_id == thread_id, models.Message.id != exclude_id)
+        .subquery()
+    )
+    return (
+        select(models.Message)
+        .join(window, models.Message.id == window.c.id)
+        .where(window.c.running_tokens < budget)
+        .order_by(models.Message.created_at.asc())
+    )
+
+
+def create_thread(session_factory, history: int):
+    """Thread de test avec `history` messages, recréé pour chaque mesure (même volume pour les deux moteurs)."""
+    with session_factory() as db:
+        thread = models.Thread(title="bench_db_concurrency", system_prompt="", current_summary="")
+        db.add(thread)
+        db.flush()
+        db.add_all(
+            models.Message(thread_id=thread.id, role="user", content="historique " * 20, token_count=20)
+            for _ in range(history)
+        )
+        db.commit()
+        return thread.id
+
+
+def count_query(thread_id):
+    return select(func.count(models.Message.id)).where(models.Message.thread_id == thread_id)
+
+
+async def sync_request(session_factory, thread_id, llm_s: float, db_latency_s: float):
+    """Parcours de send_message avec une Session synchrone : chaque requête SQL bloque la boucle."""
+    db = session_factory()
+    try:
+        db.scalar(select(models.Thread).where(models.Thread.id == thread_id))
+        if db_latency_s:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": db_latency_s})
+        user_msg = models.Message(thread_id=thread_id, role="user", content="bench", token_count=1)
+        db.add(user_msg)
+        db.commit()
+        list(db.scalars(window_query(thread_id, user_msg.id)))
+        await asyncio.sleep(llm_s)
+        db.add(models.Message(thread_id=thread_id, role="assistant", content="bench", token_count=1, answer_of=user_msg.id))
+        db.commit()
+        db.scalar(count_query(thread_id))
+    finally:
+        db.close()
+
+
+async def async_request(session_factory, thread_id, llm_s: float, db_latency_s: float):
+    """Même parcours avec une AsyncSession : la boucle sert les autres requêtes pendant les attentes SQL."""
+    async with session_factory() as db:
+        await db.scalar(select(models.Thread).where(models.Thread.id == thread_id))
+        if db_latency_s:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": db_latency_s})
+        user_msg = models.Message(thread_id=thread_id, role="user", content="bench", token_count=1)
+        db.add(user_msg)
+        await db.commit()
+        list(await db.scalars(window_query(thread_id, user_msg.id)))
+        await db.commit()
+        await asyncio.sleep(llm_s)
+        db.add(models.Message(thread_id=thread_id, role="assistant", content="bench", token_count=1, answer_of=user_msg.id))
+        await db.commit()
+        await db.scalar(count_query(thread_id))
+
+
+async def run(request, requests: int, concurrency: int) -> dict:
+    """Exécute `requests` requêtes, `concurrency` à la fois, en mesurant le retard de la boucle d'évènements."""
+    latencies, lags = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def ticker():
+        # Tâche témoin : réveillée toutes les 5 ms, son retard est le temps de boucle bloquée
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - start)
+
+    watcher = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await watcher
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "max_lag": max(lags, default=0.0) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--llm-ms", type=float, default=50.0, help="durée simulée de l'appel LLM")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="pg_sleep ajouté à chaque requête")
+    parser.add_argument("--history", type=int, default=200, help="messages déjà présents dans le thread")
+    args = parser.parse_args()
+    levels = [int(value) for value in args.concurrency.split(",")]
+
+    # Pools dimensionnés pour la concurrence maximale : seul le caractère bloquant des appels diffère
+    pool_size = max(levels)
+    sync_engine = create_engine(settings.DATABASE_URL, pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_engine(
+        make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"), pool_size=pool_size, max_overflow=0
+    )
+    sync_sessions = sessionmaker(bind=sync_engine, autoflush=False)
+    async_sessions = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+    thread_ids = []
+
+    llm_s, db_latency_s = args.llm_ms / 1000, args.db_latency_ms / 1000
+    print(f"{args.requests} requêtes, LLM simulé {args.llm_ms:.0f} ms, latence SQL ajoutée {args.db_latency_ms:.0f} ms")
+    print(f"{'concurrence':>11} {'moteur':>7} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'retard boucle max (ms)':>23}")
+    try:
+        for concurrency in levels:
+            results = {}
+            for engine_name, request, sessions in (
+                    ("sync", sync_request, sync_sessions),
+                    ("async", async_request, async_sessions),
+            ):
+                thread_id = create_thread(sync_sessions, args.history)
+                thread_ids.append(thread_id)
+                results[engine_name] = await run(
+                    lambda: request(sessions, thread_id, llm_s, db_latency_s), args.requests, concurrency
+                )
+            for engine_name, result in results.items():
+                print(
+                    f"{concurrency:>11} {engine_name:>7} {result['rps']:>8.1f} {result['p50']:>9.1f}"
+                    f" {result['p95']:>9.1f} {result['max_lag']:>23.1f}"
+                )
+            print(f"{'':>11} {'gain':>7} {results['async']['rps'] / results['sync']['rps']:>7.1f}x")
+    finally:
+        with sync_sessions() as db:
+            db.execute(delete(models.Message).where(models.Message.thread_id.in_(thread_ids)))
+            db.execute(delete(models.Thread).where(models.Thread.id.in_(thread_ids)))
+            db.commit()
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark de la pagination des messages : OFFSET/LIMIT + COUNT(*) (ancien get_messages) face à la
+pagination par curseur sur (created_at, id).
+
+Usage (depuis backend/) :
+    python -m app.scripts.bench_pagination [--messages 100000] [--depths 0,1000,10000,50000,99980]
+                                           [--limit 20] [--repeat 5]
+
+Un thread de --messages messages est créé, puis la page de --limit messages commençant à chaque
+profondeur (nombre de messages plus récents déjà chargés) est lue avec les deux méthodes.
+Les données créées sont supprimées à la fin.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from app import models
+from app.database import SessionLocal
+from app.services.pagination import encode_cursor, keyset_page, split_page
+
+
+def create_thread(db, size: int) -> uuid.UUID:
+    """Thread de test de `size` messages (insertion par lots)."""
+    thread = models.Thread(title="bench_pagination", system_prompt="", current_summary="")
+    db.add(thread)
+    db.flush()
+    start = datetime.utcnow() - timedelta(seconds=size)
+    for first in range(0, size, 10000):
+        db.execute(insert(models.Message), [
+            {
+                "id": uuid.uuid4(),
+                "thread_id": thread.id,
+                "role": "user" if index % 2 == 0 else "assistant",
+                "content": f"message {index}",
+                "token_count": 3,
+                "created_at": start + timedelta(seconds=index),
+            }
+            for index in range(first, min(first + 10000, size))
+        ])
+    db.commit()
+    return thread.id
+
+
+def offset_page(db, thread_id, limit: int, offset: int):
+    """Ancienne version de get_messages : comptage complet puis OFFSET."""
+    total = db.scalar(select(func.count(models.Message.id)).where(models.Message.thread_id == thread_id))
+    messages = list(db.scalars(
+        select(models.Message)
+        .where(models.Message.thread_id == thread_id)
+        .order_by(models.Message.created_at.desc())
+        .offset(offset).limit(limit)
+    ))
+    return messages, total
+
+
+def cursor_page(db, thread_id, limit: int, cursor):
+    query = keyset_page(select(models.Message).where(models.Message.thread_id == thread_id), models.Message, limit, cursor)
+    return split_page(list(db.scalars(query)), limit)
+
+
+def cursor_at(db, thread_id, depth: int):
+    """Curseur qu'aurait renvoyé la page précédente (dernier message avant la profondeur voulue)."""
+    if depth == 0:
+        return None
+    row = db.execute(
+        select(models.Message.created_at, models.Message.id)
+        .where(models.Message.thread_id == thread_id)
+        .order_by(models.Message.created_at.desc(), models.Message.id.desc())
+        .offset(depth - 1).limit(1)
+    ).one()
+    return encode_cursor(row.created_at, row.id)
+
+
+def best_of(repeat: int, func) -> float:
+    """Meilleur temps (en ms) sur `repeat` exécutions."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--depths", default=None, help="profondeurs testées (par défaut 0, 1 %%, 10 %%, 50 %% et la fin)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if args.depths:
+        depths = [int(value) for value in args.depths.split(",")]
+    else:
+        depths = [0, args.messages // 100, args.messages // 10, args.messages // 2, args.messages - args.limit]
+
+    db = SessionLocal()
+    thread_id = create_thread(db, args.messages)
+    try:
+        print(f"{args.messages} messages, pages de {args.limit}")
+        print(f"{'profondeur':>10} {'offset + count (ms)':>20} {'curseur (ms)':>13} {'gain':>7}")
+        for depth in depths:
+            cursor = cursor_at(db, thread_id, depth)
+            # Les deux méthodes doivent renvoyer la même page
+            expected = [message.id for message in offset_page(db, thread_id, args.limit, depth)[0]]
+            assert [message.id for message in cursor_page(db, thread_id, args.limit, cursor)[0]] == expected
+            db.commit()
+
+            offset_ms = best_of(args.repeat, lambda: offset_page(db, thread_id, args.limit, depth))
+            cursor_ms = best_of(args.repeat, lambda: cursor_page(db, thread_id, args.limit, cursor))
+            print(f"{depth:>10} {offset_ms:>20.2f} {cursor_ms:>13.2f} {offset_ms / cursor_ms:>6.1f}x")
+    finally:
+        db.rollback()
+        db.execute(delete(models.Message).where(models.Message.thread_id == thread_id))
+        db.execute(delete(models.Thread).where(models.Thread.id == thread_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
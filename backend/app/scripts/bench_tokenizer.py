@@ -0,0 +1,102 @@
+"""
+Benchmark du service de tokenisation face à la boucle historique `encoding.encode` message par message.
+
+Usage (depuis backend/) :
+    python -m app.scripts.bench_tokenizer [--messages 2000] [--repeat 5] [--long-chars 400000]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.services.tokenizer import tokenizer
+
+WORDS = (
+    "le la les un une des bonjour météo Paris demain pluie soleil résumé conversation "
+    "function return async await token budget context window model answer question "
+    "😀 https://example.com 2026-02-25 42 3.14 {\"json\": true} ``` def main(): pass ```"
+).split()
+
+
+def make_messages(count: int, seed: int = 42) -> list[str]:
+    """Génère des messages synthétiques de 5 à 400 mots."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(5, 400))) for _ in range(count)]
+
+
+def best_of(repeat: int, func) -> float:
+    """Meilleur temps (en ms) sur `repeat` exécutions."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+async def max_loop_lag(coro_factory) -> float:
+    """Retard maximal (en ms) d'un ticker 1 ms pendant l'exécution de la coroutine."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start) * 1000 - 1)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await coro_factory()
+    done.set()
+    await task
+    return max(lags, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du service de tokenisation")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--long-chars", type=int, default=400_000)
+    parser.add_argument("--model", default="openai/gpt-4o-mini")
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    encoding = tokenizer.encoding_for(args.model)
+    encoding.encode("warm-up")
+
+    exact = [len(encoding.encode(text)) for text in messages]
+    approx = tokenizer.count_many(messages, args.model, approximate=True)
+    error = statistics.mean(abs(a - e) / e for a, e in zip(approx, exact) if e)
+
+    nature = "exact" if tokenizer.is_exact(args.model) else "estimation o200k_base"
+    print(f"{args.messages} messages, {sum(exact)} tokens (modèle {args.model}, compte {nature})")
+    results = {
+        "boucle encode() (référence)": best_of(args.repeat, lambda: [len(encoding.encode(t)) for t in messages]),
+        "count_many (lot)": best_of(args.repeat, lambda: tokenizer.count_many(messages, args.model)),
+        "count_many approximatif": best_of(
+            args.repeat, lambda: tokenizer.count_many(messages, args.model, approximate=True)
+        ),
+    }
+    baseline = results["boucle encode() (référence)"]
+    for name, ms in results.items():
+        print(f"  {name:<32} {ms:9.2f} ms   x{baseline / ms:6.1f}")
+    print(f"  erreur moyenne du mode approximatif : {error:.1%}")
+
+    long_text = " ".join(make_messages(1, seed=7)) * (args.long_chars // 1000 + 1)
+    long_text = long_text[:args.long_chars]
+
+    async def inline():
+        tokenizer.count(long_text, args.model)
+
+    async def offloaded():
+        await tokenizer.acount(long_text, args.model)
+
+    print(f"Message de {len(long_text)} caractères, retard max de la boucle d'évènements :")
+    print(f"  count() sur la boucle              {asyncio.run(max_loop_lag(inline)):9.2f} ms")
+    print(f"  acount() (pool de threads)         {asyncio.run(max_loop_lag(offloaded)):9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Construit l'index géographique hors ligne de WeatherTool à partir d'un export GeoNames.
+
+Usage (depuis backend/) :
+    curl -O https://download.geonames.org/export/dump/cities15000.zip && unzip cities15000.zip
+    python -m app.scripts.build_gazetteer --input cities15000.txt [--output chemin.tsv] [--min-population 15000]
+
+Le fichier livré (app/services/tools/data/cities.tsv) ne couvre que les
+grandes villes ; un export complet résout hors ligne bien plus de noms
+(GAZETTEER_PATH pour l'utiliser sans remplacer le fichier livré).
+"""
+import argparse
+from pathlib import Path
+
+from app.services.tools.gazetteer import DEFAULT_GAZETTEER_PATH, normalize_name
+
+HEADER = "# key\tname\tcountry\tlatitude\tlongitude\tpopulation\n"
+
+
+def write_gazetteer(rows, path: Path) -> int:
+    """
+        Write gazetteer rows in the sorted format expected by Gazetteer.
+
+        Args:
+            rows: Iterable of (names, name, country, latitude, longitude, population),
+                where `names` are every spelling that should resolve to the city.
+            path (Path): Output file.
+
+        Returns:
+            int: Number of lines written (one per distinct normalized spelling).
+    """
+    lines = {}
+    for names, name, country, latitude, longitude, population in rows:
+        for spelling in {name, *names}:
+            key = normalize_name(spelling)
+            if key and "\t" not in key:
+                lines[(key, name, country, latitude, longitude)] = (key, name, country, latitude, longitude, population)
+
+    # Tri par clé (octets UTF-8, comme la recherche dichotomique), puis population décroissante
+    ordered = sorted(lines.values(), key=lambda line: (line[0].encode("utf-8"), -line[5]))
+    with open(path, "w", encoding="utf-8", newline="\n") as output:
+        output.write(HEADER)
+        for key, name, country, latitude, longitude, population in ordered:
+            output.write(f"{key}\t{name}\t{country}\t{latitude:.4f}\t{longitude:.4f}\t{population}\n")
+    return len(ordered)
+
+
+def read_geonames(path: Path, min_population: int):
+    """Lit un export GeoNames (cities*.txt) : nom, nom ASCII et noms alternatifs en alphabet latin."""
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            fields = line.rstrip("\n").split("\t")
+            population = int(fields[14] or 0)
+            if population < min_population:
+                continue
+            # Noms alternatifs en alphabet latin, hors codes (ex: "PAR", "NYC")
+            alternates = [
+                alt for alt in fields[3].split(",")
+                if alt and not alt.isupper() and normalize_name(alt).isascii()
+            ]
+            yield (
+                [fields[2], *alternates],
+                fields[1],
+                fields[8],
+                float(fields[4]),
+                float(fields[5]),
+                population,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, required=True, help="export GeoNames (ex: cities15000.txt)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_GAZETTEER_PATH)
+    parser.add_argument("--min-population", type=int, default=15000)
+    args = parser.parse_args()
+
+    count = write_gazetteer(read_geonames(args.input, args.min_population), args.output)
+    print(f"{count} noms écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
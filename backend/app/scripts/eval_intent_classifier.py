@@ -0,0 +1,86 @@
+"""
+Évaluation hors ligne du classifieur d'intention local sur des prompts étiquetés.
+
+Chaque ligne du fichier JSONL contient un "prompt" et son étiquette, la liste
+des [tool, argument] attendus : champ "expected", ou "router" pour les lignes
+du journal INTENT_LOG_PATH où le routeur LLM a été appelé (les décisions
+locales, sans étiquette, sont ignorées). Pour étiqueter tout le trafic,
+journaliser un moment avec INTENT_CLASSIFIER_ENABLED=false.
+
+Deux échantillons sont fournis : intent_prompts.jsonl, les prompts qui ont
+servi à écrire les règles des tools, et intent_prompts_holdout.jsonl (par
+défaut), écrit sans regarder les règles. Seul le second mesure la précision
+sur des formulations imprévues ; ne pas ajuster les règles sur ses erreurs.
+
+Usage (depuis backend/) :
+    python -m app.scripts.eval_intent_classifier [--input app/scripts/data/intent_prompts_holdout.jsonl] [--errors]
+
+Pour chaque seuil : part des prompts décidés localement (appels au routeur
+évités) et précision de ces décisions (mêmes tools, mêmes arguments).
+"""
+import argparse
+import json
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.agents.orchestrator import OrchestratorAgent
+
+DEFAULT_INPUT = Path(__file__).parent / "data" / "intent_prompts_holdout.jsonl"
+THRESHOLDS = (0.3, 0.5, 0.7, 0.8, 0.9, 0.95)
+
+
+def load_samples(path: Path) -> list[tuple[str, list[tuple[str, str]]]]:
+    """Charge les couples (prompt, étiquette) ; ignore les lignes sans étiquette."""
+    samples = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        label = record.get("expected", record.get("router"))
+        if label is not None:
+            samples.append((record["prompt"], [tuple(selection) for selection in label]))
+    return samples
+
+
+def same_selections(predicted: list[tuple[str, str]], expected: list[tuple[str, str]]) -> bool:
+    """Mêmes tools et mêmes arguments, sans tenir compte de l'ordre ni de la casse."""
+    def canonical(selections):
+        return sorted((name, argument.strip().lower()) for name, argument in selections)
+    return canonical(predicted) == canonical(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT)
+    parser.add_argument("--errors", action="store_true", help="affiche les décisions locales erronées au seuil configuré")
+    args = parser.parse_args()
+
+    samples = load_samples(args.input)
+    if not samples:
+        print(f"Aucun prompt étiqueté dans {args.input}")
+        return
+
+    # Mêmes règles qu'en production : celles des tools enregistrés par l'orchestrateur
+    classifier = OrchestratorAgent().intent_classifier
+    decisions = [(prompt, expected, classifier.classify(prompt)) for prompt, expected in samples]
+
+    print(f"{len(samples)} prompts étiquetés ({args.input})\n")
+    print(f"{'seuil':>6} {'décidés localement':>20} {'précision locale':>18} {'erreurs':>8}")
+    for threshold in sorted({*THRESHOLDS, settings.INTENT_CONFIDENCE_THRESHOLD}):
+        local = [(d, expected) for _, expected, d in decisions if d.confidence >= threshold]
+        correct = sum(same_selections(d.selections, expected) for d, expected in local)
+        marker = "  <- configuré" if threshold == settings.INTENT_CONFIDENCE_THRESHOLD else ""
+        print(
+            f"{threshold:>6.2f} {len(local):>9} ({len(local) / len(samples):>6.1%})"
+            f" {(correct / len(local) if local else 0.0):>17.1%} {len(local) - correct:>8}{marker}"
+        )
+
+    if args.errors:
+        print(f"\nErreurs au seuil {settings.INTENT_CONFIDENCE_THRESHOLD} :")
+        for prompt, expected, d in decisions:
+            if d.confidence >= settings.INTENT_CONFIDENCE_THRESHOLD and not same_selections(d.selections, expected):
+                print(f"- {prompt!r}\n    attendu {expected}, obtenu {d.selections} ({'; '.join(d.reasons) or 'aucun indice'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Serveur local imitant les API Open-Meteo (géocodage + prévisions), pour tester WeatherTool sans réseau.
+
+Usage (depuis backend/) :
+    python -m app.scripts.open_meteo_stub [--port 8090] [--latency-ms 0]
+
+Puis lancer l'API (ou le worker) avec :
+    OPEN_METEO_GEOCODING_URL=http://127.0.0.1:8090/v1/search
+    OPEN_METEO_FORECAST_URL=http://127.0.0.1:8090/v1/forecast
+
+Les réponses sont déterministes : coordonnées issues de l'index géographique
+livré, météo calculée à partir des coordonnées. GET /stats compte les
+requêtes reçues (utile pour vérifier le cache et le regroupement des villes).
+L'application est aussi utilisable sans serveur, via
+httpx.ASGITransport(app=create_app()).
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query
+
+from app.services.tools.gazetteer import DEFAULT_GAZETTEER_PATH, Gazetteer
+
+
+def fake_weather(latitude: float, longitude: float) -> dict:
+    """Météo factice mais stable pour des coordonnées données."""
+    seed = abs(int(latitude * 1000) * 31 + int(longitude * 1000))
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current_weather": {
+            "temperature": round(30 - abs(latitude) / 3 + seed % 7, 1),
+            "windspeed": float(seed % 40),
+            "weathercode": seed % 4,
+        },
+    }
+
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    stub = FastAPI(title="Open-Meteo stub")
+    places = Gazetteer(DEFAULT_GAZETTEER_PATH)
+    counters = {"search": 0, "forecast": 0, "forecast_locations": 0}
+
+    async def simulate_latency():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @stub.get("/v1/search")
+    async def search(name: str, count: int = 10, language: Optional[str] = None, format: Optional[str] = None):
+        counters["search"] += 1
+        await simulate_latency()
+        city = places.lookup(name)
+        if city is None:
+            return {"generationtime_ms": 0.1}
+        return {"results": [{
+            "name": city.name,
+            "latitude": city.latitude,
+            "longitude": city.longitude,
+            "country_code": city.country,
+            "population": city.population,
+        }][:count]}
+
+    @stub.get("/v1/forecast")
+    async def forecast(latitude: str = Query(...), longitude: str = Query(...), current_weather: bool = False):
+        try:
+            coordinates = list(zip(
+                (float(value) for value in latitude.split(",")),
+                (float(value) for value in longitude.split(",")),
+            ))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Coordonnées invalides")
+        if len(latitude.split(",")) != len(longitude.split(",")):
+            raise HTTPException(status_code=400, detail="Autant de latitudes que de longitudes attendues")
+
+        counters["forecast"] += 1
+        counters["forecast_locations"] += len(coordinates)
+        await simulate_latency()
+        forecasts = [fake_weather(lat, lon) for lat, lon in coordinates]
+        # Comme Open-Meteo : un objet pour une coordonnée, une liste pour plusieurs
+        return forecasts[0] if len(forecasts) == 1 else forecasts
+
+    @stub.get("/stats")
+    async def stats():
+        return counters
+
+    return stub
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="délai simulé par requête")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
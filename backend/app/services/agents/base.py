@@ -1,8 +1,17 @@
-import asyncio
+import json
+from typing import AsyncIterator, Optional
 
 import httpx
 
 from app.core.config import settings
+from app.services.circuit_breaker import HALF_OPEN, CircuitBreaker, CircuitOpenError, circuit_breakers
+from app.services.http_client import http_clients
+from app.services.llm_cache import llm_cache, make_cache_key
+from app.services.llm_scheduler import INTERACTIVE, llm_scheduler
+from app.services.rate_limiter import rate_limiters
+from app.services.singleflight import llm_flights
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 
 class BaseAgent:
@@ -12,59 +21,269 @@ class BaseAgent:
         This class handles the core logic for LLM interactions, including HTTP
         request construction, authentication, and a robust retry mechanism with
         progressive timeouts to handle network instability or rate limiting (429).
+        All agents share the process-wide pooled HTTP client, so keep-alive
+        connections to OpenRouter are reused across calls.
 
         Attributes:
             api_key (str): The API key used for OpenRouter authentication.
             url (str): The technical endpoint for OpenRouter chat completions.
+            cache_ttl (Optional[float]): Class-level opt-in to the LLM response
+                cache; responses are kept for this many seconds. None disables it.
+            priority (int): Default scheduler class of the agent's calls.
     """
 
+    # Les agents aux appels déterministes activent le cache en surchargeant cet attribut
+    cache_ttl: Optional[float] = None
+
+    # Classe de priorité par défaut auprès de l'ordonnanceur des appels LLM
+    priority: int = INTERACTIVE
+
     def __init__(self):
         # Utilisation de la clé API centralisée
         self.api_key = settings.OPENROUTER_API_KEY
-        self.url = "https://openrouter.ai/api/v1/chat/completions"
+        self.url = OPENROUTER_URL
 
-    async def _call_llm(self, messages: list, model: str):
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Client HTTP mutualisé pour l'hôte OpenRouter."""
+        return http_clients.get(self.url)
+
+    async def _call_llm(self, messages: list, model: str, priority: Optional[int] = None):
         """
             Execute a request to the LLM provider with error handling and retries.
 
-            This method iterates through a predefined list of timeouts. If a rate
-            limit (HTTP 429) is encountered, it applies an incremental backoff
-            before retrying.
+            This method iterates through a predefined list of timeouts. Every
+            attempt goes through the shared per-model rate limiter: callers are
+            queued instead of colliding, and a rate limit (HTTP 429) pauses the
+            model's bucket for the delay announced by the provider
+            (`Retry-After` / `X-RateLimit-Reset`) without consuming a timeout slot.
+
+            Agents that opt in through `cache_ttl` are first served from the LLM
+            response cache, keyed by a hash of the model and the messages.
+            Concurrent identical calls (same key) are coalesced into a single
+            upstream request whose result is shared by every caller.
 
             Args:
                 messages (list): A list of message dictionaries (role and content)
                     forming the conversation history.
                 model (str): The technical identifier of the model to be called.
+                priority (Optional[int]): Scheduler class of this call (INTERACTIVE,
+                    ROUTER or BACKGROUND). Defaults to the agent's `priority`.
 
             Returns:
                 Optional[str]: The text response from the AI if successful,
                     an error message string if all attempts fail, or None if
                     no response is received.
 
+            Raises:
+                CircuitOpenError: If the model's circuit breaker is open, either
+                    before the first attempt or after a failure opened it.
+
             Note:
                 The retry logic uses the timeouts specified in settings.TIMEOUTS
                 to progressively allow for longer generation times.
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        key = make_cache_key(model, messages)
+
+        # Réponse déjà connue pour ce modèle et ce payload : pas d'aller-retour réseau
+        if self.cache_ttl:
+            cached = await llm_cache.get(key, namespace=type(self).__name__)
+            if cached is not None:
+                return cached
+
+        # Appels identiques simultanés : une seule requête amont, résultat partagé
+        priority = self.priority if priority is None else priority
+        return await llm_flights.do(key, lambda: self._fetch_and_store(key, messages, model, priority))
+
+    async def _fetch_and_store(self, key: str, messages: list, model: str, priority: int):
+        content = await self._request_llm(messages, model, priority)
+        if self.cache_ttl and self._is_cacheable(content):
+            await llm_cache.set(key, content, ttl=self.cache_ttl)
+        return content
+
+    async def _request_llm(self, messages: list, model: str, priority: int):
+        """Appel réseau effectif vers OpenRouter (disjoncteur, limiteur et retries)."""
+        headers = self._headers()
         payload = {
             "model": model,
             "messages": messages
         }
 
+        # Modèle déclaré en panne par un autre appel : inutile de gravir l'échelle des timeouts
+        breaker = circuit_breakers.get(model)
+        if not breaker.allow():
+            raise CircuitOpenError(model)
+        probe = breaker.state == HALF_OPEN
+
         # Utilisation des timeouts définis dans Settings
-        async with httpx.AsyncClient() as client:
-            for attempt, timeout in enumerate(settings.TIMEOUTS):
+        client = self.client
+        limiter = rate_limiters.get(model)
+        attempt, throttled = 0, 0
+        try:
+            while attempt < len(settings.TIMEOUTS):
+                timeout = settings.TIMEOUTS[attempt]
                 try:
-                    resp = await client.post(self.url, headers=headers, json=payload, timeout=timeout)
+                    # File du modèle (débit, par priorité) puis créneau de l'ordonnanceur : un appel
+                    # retenu par le seau ou une pause 429 n'occupe aucun créneau partagé
+                    async with limiter.acquire(priority), llm_scheduler.slot(priority):
+                        resp = await client.post(self.url, headers=headers, json=payload, timeout=timeout)
+                    limiter.update_from_response(resp.status_code, resp.headers)
                     if resp.status_code == 429:
-                        await asyncio.sleep((attempt + 1) * 2)
+                        # Le limiteur a déjà mis le modèle en pause : on se remet dans la file
+                        throttled += 1
+                        if throttled > settings.RATE_LIMIT_MAX_RETRIES:
+                            return None
                         continue
                     resp.raise_for_status()
-                    return resp.json()["choices"][0]["message"]["content"]
+                    content = resp.json()["choices"][0]["message"]["content"]
+                    breaker.record_success()
+                    return content
                 except Exception as e:
+                    self._record_failure(breaker, e)
                     if attempt == len(settings.TIMEOUTS) - 1:
                         return f"Erreur : {str(e)}"
-        return None
+                    if not breaker.allow(owns_probe=probe):
+                        raise CircuitOpenError(model) from e
+                    probe = breaker.state == HALF_OPEN
+                    attempt += 1
+            return None
+        finally:
+            # Sonde sans verdict (429 répétés, 4xx non comptés, annulation) : on la rend
+            if probe:
+                breaker.release_probe()
+
+    async def _stream_llm(self, messages: list, model: str, priority: Optional[int] = None) -> AsyncIterator[str]:
+        """
+            Stream a completion from the LLM provider, token by token.
+
+            Consumes the OpenRouter Server-Sent Events stream (`stream: true`)
+            and yields each content delta as soon as it arrives. Retries follow
+            the same timeout ladder as `_call_llm`, but only while nothing has
+            been yielded yet: once tokens went out, a failure is raised to the
+            caller instead of silently restarting the answer.
+
+            Args:
+                messages (list): A list of message dictionaries (role and content).
+                model (str): The technical identifier of the model to be called.
+                priority (Optional[int]): Scheduler class, defaults to the agent's `priority`.
+
+            Yields:
+                str: The successive content fragments of the assistant answer.
+
+            Raises:
+                Exception: If every attempt fails, or if the stream breaks after
+                    the first token was emitted.
+        """
+        priority = self.priority if priority is None else priority
+        if self.cache_ttl:
+            key = make_cache_key(model, messages)
+            cached = await llm_cache.get(key, namespace=type(self).__name__)
+            if cached is not None:
+                yield cached
+                return
+
+            fragments = []
+            async for delta in self._request_stream(messages, model, priority):
+                fragments.append(delta)
+                yield delta
+            content = "".join(fragments)
+            if self._is_cacheable(content):
+                await llm_cache.set(key, content, ttl=self.cache_ttl)
+            return
+
+        async for delta in self._request_stream(messages, model, priority):
+            yield delta
+
+    async def _request_stream(self, messages: list, model: str, priority: int) -> AsyncIterator[str]:
+        """Flux SSE effectif vers OpenRouter (disjoncteur, limiteur et retries)."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+        }
+
+        breaker = circuit_breakers.get(model)
+        if not breaker.allow():
+            raise CircuitOpenError(model)
+        probe = breaker.state == HALF_OPEN
+
+        limiter = rate_limiters.get(model)
+        attempt, throttled = 0, 0
+        try:
+            while attempt < len(settings.TIMEOUTS):
+                timeout = settings.TIMEOUTS[attempt]
+                emitted = False
+                try:
+                    # Le créneau du limiteur est conservé pendant toute la durée du flux
+                    async with limiter.acquire(priority), llm_scheduler.slot(priority), self.client.stream(
+                        "POST", self.url, headers=self._headers(), json=payload, timeout=timeout
+                    ) as resp:
+                        limiter.update_from_response(resp.status_code, resp.headers)
+                        if resp.status_code == 429:
+                            throttled += 1
+                            if throttled > settings.RATE_LIMIT_MAX_RETRIES:
+                                break
+                            continue
+                        resp.raise_for_status()
+                        async for line in resp.aiter_lines():
+                            delta = self._parse_sse_line(line)
+                            if delta is None:
+                                continue
+                            if delta is StopAsyncIteration:
+                                # [DONE] : fin normale du flux, le succès est enregistré ci-dessous
+                                break
+                            emitted = True
+                            yield delta
+                    breaker.record_success()
+                    return
+                except Exception as e:
+                    self._record_failure(breaker, e)
+                    if emitted or attempt == len(settings.TIMEOUTS) - 1:
+                        raise
+                    if not breaker.allow(owns_probe=probe):
+                        raise CircuitOpenError(model) from e
+                    probe = breaker.state == HALF_OPEN
+                    attempt += 1
+            raise RuntimeError(f"Limite de requêtes atteinte pour {model}")
+        finally:
+            # Sonde sans verdict (429 répétés, 4xx non comptés, annulation) : on la rend
+            if probe:
+                breaker.release_probe()
+
+    @staticmethod
+    def _parse_sse_line(line: str):
+        """
+        Décode une ligne SSE OpenRouter.
+        Retourne le fragment de texte, None si la ligne ne porte pas de contenu
+        (commentaire keep-alive, delta vide), ou StopAsyncIteration sur [DONE].
+        """
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return StopAsyncIteration
+        chunk = json.loads(data)
+        if "error" in chunk:
+            raise RuntimeError(chunk["error"].get("message", "Erreur de streaming"))
+        choices = chunk.get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content") or None
+
+    @staticmethod
+    def _is_cacheable(content: Optional[str]) -> bool:
+        """On ne met jamais en cache une réponse vide ou un message d'erreur."""
+        return bool(content and content.strip()) and not content.startswith("Erreur :")
+
+    @staticmethod
+    def _record_failure(breaker: CircuitBreaker, error: Exception):
+        """Ne compte que les pannes du modèle (timeouts, réseau, 5xx, modèle introuvable)."""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status < 500 and status not in (404, 408):
+                return
+        breaker.record_failure(error, timeout=isinstance(error, httpx.TimeoutException))
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
@@ -1,6 +1,6 @@
-from typing import List
+from typing import AsyncIterator, List
 
-from app.services.token_manager import parse_summary_json
+from app.services.summary_memory import thread_memory_block
 from .base import BaseAgent
 
 
@@ -11,7 +11,10 @@ class ChatAgent(BaseAgent):
         This agent orchestrates the interaction between the core system instructions,
         long-term memory (structured JSON summaries), and short-term memory (recent
         message window). It ensures the LLM receives a coherent payload where the
-        user's current prompt is prioritized.
+        user's current prompt is prioritized. Long-term memory is taken from the
+        thread's hierarchical summary at the most detailed level that fits in
+        SUMMARY_MEMORY_BUDGET tokens, using [MEMORY] text pre-rendered when the
+        summary was written: no JSON is parsed on the per-message path.
     """
 
     async def process(self, thread, context_messages: List, user_prompt: str, model_name: str):
@@ -35,9 +38,9 @@ class ChatAgent(BaseAgent):
         # 1. On construit la base du contexte (System prompt + Résumé + Messages récents)
         messages_payload = self._build_payload(
             system_prompt=thread.system_prompt,
-            summary_json=thread.current_summary,
+            memory_block=self._memory_block(thread),
             recent_messages=context_messages,
-            user_prompt=user_prompt
+            user_prompt=user_prompt,
         )
 
         print("---- Payload ----")
@@ -46,10 +49,39 @@ class ChatAgent(BaseAgent):
         # 2. Appel à la classe mère BaseAgent pour la gestion de l'API et des retries
         return await self._call_llm(messages_payload, model_name)
 
-    def _build_payload(self, system_prompt: str, summary_json: str, recent_messages: List, user_prompt: str) -> List[dict]:
+    async def stream(self, thread, context_messages: List, user_prompt: str, model_name: str) -> AsyncIterator[str]:
+        """
+            Streaming variant of `process`: same payload, tokens yielded as they arrive.
+
+            Args:
+                thread (models.Thread): The thread object containing system prompts
+                    and the current summary.
+                context_messages (List[models.Message]): Recent messages for context.
+                user_prompt (str): The new raw (or enriched) user input.
+                model_name (str): The technical identifier of the model to use.
+
+            Yields:
+                str: The successive fragments of the AI-generated response.
+        """
+        messages_payload = self._build_payload(
+            system_prompt=thread.system_prompt,
+            memory_block=self._memory_block(thread),
+            recent_messages=context_messages,
+            user_prompt=user_prompt,
+        )
+
+        async for token in self._stream_llm(messages_payload, model_name):
+            yield token
+
+    @staticmethod
+    def _memory_block(thread) -> str:
+        """Bloc [MEMORY] du niveau de détail qui tient dans SUMMARY_MEMORY_BUDGET (voir thread_memory_block)."""
+        return thread_memory_block(thread)
+
+    def _build_payload(self, system_prompt: str, memory_block: str, recent_messages: List, user_prompt: str) -> List[dict]:
         """
         Construit le payload final pour OpenRouter en respectant l'alternance des rôles
-        et en intégrant la mémoire long terme (résumé) et court terme (historique).
+        et en intégrant la mémoire long terme (bloc [MEMORY] pré-rendu) et court terme (historique).
         """
         payload = []
 
@@ -59,19 +91,7 @@ class ChatAgent(BaseAgent):
         full_system_content += system_prompt if system_prompt else "Tu es un assistant utile."
         full_system_content += "[/SYSTEM PROMPT]\n\n"
 
-        if summary_json:
-            parsed = parse_summary_json(summary_json)
-            if parsed:
-                summary_display = (
-                    f"[MEMORY]\n"
-                    f"CONTEXTE : {parsed.get('context', 'N/A')}\n"
-                    f"KEYPOINTS : {', '.join(parsed.get('keywords', [])) if parsed.get('keywords') else 'N/A'}\n"
-                    f"TONE : {parsed.get('tone', 'neutre')}"
-                    f"[/MEMORY]"
-                )
-                full_system_content += summary_display
-            else:
-                full_system_content += f"[MEMORY]\n{summary_json}\n[/MEMORY]"
+        full_system_content += memory_block
 
         # Ajout du bloc SYSTEM unique
         payload.append({"role": "system", "content": full_system_content})
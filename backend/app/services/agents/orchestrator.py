@@ -1,15 +1,44 @@
+import asyncio
+import logging
 import re
-from typing import Optional
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
+from app import models
 from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.intent_classifier import IntentClassifier, IntentDecision, log_intent
+from app.services.llm_scheduler import INTERACTIVE, ROUTER
+from app.services.plugins import agent_plugins, tool_plugins
+from app.services.speculation import speculation_budget, speculation_stats
+from app.services.summary_store import save_summary
 from app.services.tools.base import BaseTool, ToolResult
-from app.services.tools.datetime_tool import DateTimeTool
-from app.services.tools.weather_tool import WeatherTool
 from .base import BaseAgent
-from .chat import ChatAgent
-from .summary import SummaryAgent
+
+if TYPE_CHECKING:
+    # Annotations uniquement : les agents sont résolus par agent_plugins, importés au premier usage
+    from .chat import ChatAgent
+    from .summary import SummaryAgent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolCatalog:
+    """
+    Vue compilée des tools pour une version du registre de plugins : tools par nom,
+    table des commandes slash, prompt système du routeur LLM et classifieur local.
+    Recalculée uniquement quand le registre change, jamais par requête.
+    """
+    version: int
+    tools: dict[str, BaseTool]
+    slash_commands: dict[str, BaseTool]
+    router_prompt: str
+    intent_classifier: IntentClassifier
 
 
 class OrchestratorAgent(BaseAgent):
@@ -19,30 +48,77 @@ class OrchestratorAgent(BaseAgent):
     ou le fallback vers ChatAgent.
     """
 
+    # Appels propres à l'orchestrateur (routeur, explication /summary) : déterministes, donc mis en cache
+    cache_ttl = settings.LLM_CACHE_ORCHESTRATOR_TTL
+
     def __init__(self):
         super().__init__()
-        self.chat_agent = ChatAgent()
-        self.summary_agent = SummaryAgent()
-
-        # Registre : clé slash -> (agent, description)
-        self.agent_registry: dict[str, tuple[BaseAgent, str]] = {
-            "chat": (self.chat_agent, "Conversation générale"),
-            "summary": (self.summary_agent, "Résumé de la conversation"),
-        }
-
-        # Registre des tools utilitaires (par name, ex: "get_weather")
-        self.tool_registry: dict[str, BaseTool] = {}
+        # Agents (clé slash -> agent, ex: "summary") et tools sont des plugins chargés au premier usage
+        # (voir app/services/plugins.py) ; les tools sont compilés en un ToolCatalog par version du registre
+        self._catalog: Optional[ToolCatalog] = None
+
+    @property
+    def chat_agent(self) -> "ChatAgent":
+        return agent_plugins.get("chat")
+
+    @property
+    def summary_agent(self) -> Optional["SummaryAgent"]:
+        return agent_plugins.get("summary")
+
+    @property
+    def tool_registry(self) -> dict[str, BaseTool]:
+        """Tools par name (ex: "get_weather")."""
+        return self._tool_catalog().tools
+
+    @property
+    def tool_slash_registry(self) -> dict[str, BaseTool]:
+        """Tools par slash_command (ex: "meteo" -> WeatherTool)."""
+        return self._tool_catalog().slash_commands
+
+    @property
+    def intent_classifier(self) -> IntentClassifier:
+        """Classifieur local consulté avant le routeur LLM (règles issues des métadonnées des tools)."""
+        return self._tool_catalog().intent_classifier
+
+    def _tool_catalog(self) -> ToolCatalog:
+        """Catalogue des tools, recompilé seulement si le registre de plugins a changé de version."""
+        catalog = self._catalog
+        if catalog is None or catalog.version != tool_plugins.version:
+            catalog = self._catalog = self._compile_tool_catalog()
+        return catalog
 
-        # Registre /[tool] (par slash_command, ex: "meteo" -> WeatherTool)
-        self.tool_slash_registry: dict[str, BaseTool] = {}
-        self._register_tool(DateTimeTool())
-        self._register_tool(WeatherTool())
-
-    def _register_tool(self, tool: BaseTool):
-        """Enregistre un tool dans les deux registres."""
-        self.tool_registry[tool.name] = tool
-        if tool.slash_command:
-            self.tool_slash_registry[tool.slash_command] = tool
+    @staticmethod
+    def _compile_tool_catalog() -> ToolCatalog:
+        """
+        Charge les tools déclarés et précalcule tout ce que le routage en dérive :
+        registres par nom et par commande slash, règles du classifieur local et
+        prompt système du routeur LLM.
+        """
+        tools: dict[str, BaseTool] = {}
+        slash_commands: dict[str, BaseTool] = {}
+        intent_classifier = IntentClassifier()
+        for plugin_name, tool in tool_plugins.load_all().items():
+            if tool.name != plugin_name:
+                logger.warning("Tool '%s' déclaré sous le nom de plugin '%s'", tool.name, plugin_name)
+            tools[tool.name] = tool
+            if tool.slash_command:
+                slash_commands[tool.slash_command] = tool
+            intent_classifier.register(tool)
+
+        tools_list = "\n".join(f"- {name}: {tool.description}" for name, tool in tools.items())
+        router_prompt = (
+            "Tu es un sélecteur d'outils. Selon la requête utilisateur, détermine quels outils appeler.\n"
+            f"Outils disponibles :\n{tools_list}\n\n"
+            "Réponds UNIQUEMENT avec le format : outil(argument), séparés par des virgules.\n"
+            "Si un outil n'a pas besoin d'argument, écris : outil()\n"
+            "Si aucun outil n'est nécessaire, réponds : none\n\n"
+            "Exemples :\n"
+            "- 'Quelle heure est-il ?' -> datetime()\n"
+            "- 'Météo à Paris ?' -> get_weather(Paris)\n"
+            "- 'Quelle heure et météo à Lyon ?' -> datetime(), get_weather(Lyon)"
+        )
+        logger.debug("Catalogue des tools compilé (version %s) : %s", tool_plugins.version, ", ".join(tools) or "aucun")
+        return ToolCatalog(tool_plugins.version, tools, slash_commands, router_prompt, intent_classifier)
 
     async def process(
         self,
@@ -50,7 +126,6 @@ class OrchestratorAgent(BaseAgent):
         context_messages: list,
         user_prompt: str,
         model_name: str,
-        db: Session,
     ) -> str:
         """
         Point d'entrée principal. Parse la commande slash, route via LLM
@@ -63,45 +138,90 @@ class OrchestratorAgent(BaseAgent):
 
         print("---- 1. Slash agent ----")
         # 1. Slash -> agent (ex: /summary, /chat)
-        if key and key in self.agent_registry:
+        if key and key in agent_plugins:
             return await self._dispatch(
-                key, thread, context_messages, remaining_prompt, model_name, db
+                key, thread, context_messages, remaining_prompt, model_name
             )
 
+        # Mode spéculatif : réponse ChatAgent et routeur LLM en parallèle
+        if key is None and settings.AGENT_ROUTER_ENABLED and settings.SPECULATIVE_CHAT_ENABLED:
+            return await self._process_speculative(thread, context_messages, user_prompt, model_name)
+
+        # 2 à 4. Tools (slash ou routage LLM) puis ChatAgent
+        chat_prompt = await self._prepare_chat_prompt(key, user_prompt, remaining_prompt)
+        return await self.chat_agent.process(
+            thread=thread,
+            context_messages=context_messages,
+            user_prompt=chat_prompt,
+            model_name=model_name,
+        )
+
+    async def stream(
+        self,
+        thread,
+        context_messages: list,
+        user_prompt: str,
+        model_name: str,
+    ) -> AsyncIterator[str]:
+        """
+        Variante streaming de process() : même routage (slash agents, slash tools,
+        routage LLM, fallback), mais la réponse finale est relayée token par token.
+        """
+        key, remaining_prompt = self._parse_slash_command(user_prompt)
+
+        # Plugin "summary" désactivé (PLUGINS_DISABLED) ou non chargeable : /summary suit le chemin du chat
+        if key == "summary" and self.summary_agent is not None:
+            async for token in self._stream_summary(
+                thread, context_messages, remaining_prompt, model_name
+            ):
+                yield token
+            return
+
+        agent = self.chat_agent
+        if key and key in agent_plugins:
+            agent = agent_plugins.get(key) or agent
+            chat_prompt = remaining_prompt
+        else:
+            chat_prompt = await self._prepare_chat_prompt(key, user_prompt, remaining_prompt)
+
+        if not hasattr(agent, "stream"):
+            # Agent sans streaming : sa réponse complète est relayée d'un bloc
+            yield await agent.process(
+                thread=thread, context_messages=context_messages, user_prompt=chat_prompt, model_name=model_name,
+            )
+            return
+
+        async for token in agent.stream(
+            thread=thread,
+            context_messages=context_messages,
+            user_prompt=chat_prompt,
+            model_name=model_name,
+        ):
+            yield token
+
+    async def _prepare_chat_prompt(self, key: Optional[str], user_prompt: str, remaining_prompt: str) -> str:
+        """
+        Construit le prompt final envoyé au ChatAgent : exécute le tool slash
+        ou les tools choisis par le classifieur local / le routeur LLM et
+        enrichit le prompt avec leurs résultats.
+        """
         print("---- 2. Slash tools ----")
         # 2. Slash -> tool (ex: /meteo Agadir, /heure)
         if key and key in self.tool_slash_registry:
             tool = self.tool_slash_registry[key]
-            result = await tool.execute(remaining_prompt)
-            enriched_prompt = self._enrich_prompt(user_prompt, [result])
-            return await self.chat_agent.process(
-                thread=thread,
-                context_messages=context_messages,
-                user_prompt=enriched_prompt,
-                model_name=model_name,
-            )
+            result = await tool.run(remaining_prompt)
+            return self._enrich_prompt(user_prompt, [result])
 
-        # 3. Langage naturel -> sélection de tools via LLM (si activé)
+        # 3. Langage naturel -> sélection de tools (classifieur local, sinon LLM) si activé
         print("---- 3. Natural Language ----")
         if key is None and settings.AGENT_ROUTER_ENABLED:
-            tool_selections = await self._select_tools(user_prompt)
+            tool_selections = await self._route_tools(user_prompt)
             tool_results = await self._execute_tools(tool_selections)
-            enriched_prompt = self._enrich_prompt(user_prompt, tool_results)
-            return await self.chat_agent.process(
-                thread=thread,
-                context_messages=context_messages,
-                user_prompt=enriched_prompt,
-                model_name=model_name,
-            )
+            return self._enrich_prompt(user_prompt, tool_results)
 
         # 4. Fallback -> ChatAgent direct (slash inconnue ou routage désactivé)
         print("---- 4. (Fallback) Appel Chat ----")
-        return await self.chat_agent.process(
-            thread=thread,
-            context_messages=context_messages,
-            user_prompt=remaining_prompt if key else user_prompt,
-            model_name=model_name,
-        )
+        return remaining_prompt if key else user_prompt
 
     async def _dispatch(
         self,
@@ -110,16 +230,16 @@ class OrchestratorAgent(BaseAgent):
         context_messages: list,
         prompt: str,
         model_name: str,
-        db: Session,
     ) -> str:
         """Dispatch vers l'agent correspondant à la clé."""
-        if key == "summary":
+        if key == "summary" and self.summary_agent is not None:
             return await self._handle_summary(
-                thread, context_messages, prompt, model_name, db
+                thread, context_messages, prompt, model_name
             )
 
-        # Pour tout autre agent (chat, futurs agents...)
-        return await self.chat_agent.process(
+        # Pour tout autre agent (chat, agents plugins...) ; plugin non chargeable -> ChatAgent
+        agent = agent_plugins.get(key) or self.chat_agent
+        return await agent.process(
             thread=thread,
             context_messages=context_messages,
             user_prompt=prompt,
@@ -132,7 +252,6 @@ class OrchestratorAgent(BaseAgent):
         context_messages: list,
         user_instruction: str,
         model_name: str,
-        db: Session,
     ) -> str:
         """
         Gère la commande /summary :
@@ -142,28 +261,82 @@ class OrchestratorAgent(BaseAgent):
            une explication en langage naturel
         4. Retourne la réponse du LLM
         """
+        new_json_summary = await self._update_summary(
+            thread, context_messages, user_instruction, model_name
+        )
+        if not new_json_summary:
+            return "Aucun résumé disponible pour cette conversation."
+
+        # 2. Appel LLM pour transformer le JSON en réponse naturelle
+        messages = self._summary_explanation_messages(new_json_summary, user_instruction)
+        response = await self._call_llm(messages, model=model_name)
+        return response or "Impossible de générer le résumé."
+
+    async def _stream_summary(
+        self,
+        thread,
+        context_messages: list,
+        user_instruction: str,
+        model_name: str,
+    ) -> AsyncIterator[str]:
+        """Variante streaming de _handle_summary : l'explication est relayée token par token."""
+        new_json_summary = await self._update_summary(
+            thread, context_messages, user_instruction, model_name
+        )
+        if not new_json_summary:
+            yield "Aucun résumé disponible pour cette conversation."
+            return
+
+        messages = self._summary_explanation_messages(new_json_summary, user_instruction)
+        async for token in self._stream_llm(messages, model=model_name):
+            yield token
+
+    async def _update_summary(
+        self,
+        thread,
+        context_messages: list,
+        user_instruction: str,
+        model_name: str,
+    ) -> Optional[str]:
+        """
+        Met à jour le résumé JSON via SummaryAgent et le sauvegarde en DB par compare-and-swap :
+        si le worker a écrit le résumé pendant l'appel, le résultat est re-fusionné avec le sien.
+        """
         current_summary = str(thread.current_summary) if thread.current_summary else ""
+        expected_version = thread.summary_version
 
-        # 1. Mise à jour du résumé JSON
         new_json_summary = await self.summary_agent.process(
             messages_to_summarize=context_messages,
             current_summary_json=current_summary,
             model_name=model_name,
             extra_instruction=user_instruction.strip(),
+            # L'utilisateur attend la réponse : priorité interactive
+            priority=INTERACTIVE,
         )
 
-        if new_json_summary:
-            thread.current_summary = new_json_summary
-            db.add(thread)
-            db.commit()
-
-        if not new_json_summary:
-            return "Aucun résumé disponible pour cette conversation."
+        if new_json_summary and new_json_summary != current_summary:
+            # Session dédiée et courte : avec le hedging, deux réponses /summary peuvent
+            # s'exécuter en parallèle, or une AsyncSession n'accepte pas d'opérations concurrentes
+            async with AsyncSessionLocal() as db:
+                saved = await save_summary(
+                    db, thread.id, expected_version, new_json_summary,
+                    remerge=lambda latest: self.summary_agent.merge_summaries(
+                        [latest, new_json_summary], model_name, priority=INTERACTIVE
+                    ),
+                )
+                # Conflits non résolus : on présente le résumé le plus récent en base
+                return saved or await db.scalar(
+                    select(models.Thread.current_summary).where(models.Thread.id == thread.id)
+                )
+
+        return new_json_summary
 
-        # 2. Appel LLM pour transformer le JSON en réponse naturelle
+    @staticmethod
+    def _summary_explanation_messages(new_json_summary: str, user_instruction: str) -> list[dict]:
+        """Prompt demandant au LLM de transformer le résumé JSON en réponse naturelle."""
         instruction = user_instruction.strip() if user_instruction.strip() else "Fais un résumé clair de notre conversation."
 
-        messages = [
+        return [
             {
                 "role": "system",
                 "content": (
@@ -181,40 +354,134 @@ class OrchestratorAgent(BaseAgent):
             },
         ]
 
-        response = await self._call_llm(messages, model=model_name)
-        return response or "Impossible de générer le résumé."
+    async def _process_speculative(self, thread, context_messages: list, user_prompt: str, model_name: str) -> str:
+        """
+        Variante de process() pour un prompt en langage naturel quand le mode spéculatif est activé.
+
+        Si le classifieur local tranche, aucun routeur n'est appelé et il n'y a rien à
+        anticiper. Sinon, dans la limite du budget de spéculation, la réponse ChatAgent
+        sur le prompt brut démarre en même temps que le routeur LLM (voir _speculate).
+        """
+        selections, decision = self._local_intent(user_prompt)
+        if selections is None:
+            if speculation_budget.try_acquire():
+                return await self._speculate(thread, context_messages, user_prompt, model_name, decision)
+            selections = await self._llm_route(user_prompt, decision)
+
+        tool_results = await self._execute_tools(selections)
+        return await self.chat_agent.process(
+            thread=thread,
+            context_messages=context_messages,
+            user_prompt=self._enrich_prompt(user_prompt, tool_results),
+            model_name=model_name,
+        )
+
+    async def _speculate(
+        self,
+        thread,
+        context_messages: list,
+        user_prompt: str,
+        model_name: str,
+        decision: IntentDecision,
+    ) -> str:
+        """
+        Lance la réponse ChatAgent sur le prompt brut pendant que le routeur LLM décide.
+        Aucun tool nécessaire (ou routeur au-delà de SPECULATIVE_ROUTER_BUDGET) : la réponse
+        déjà en cours est gardée. Sinon elle est annulée et le ChatAgent repart du prompt enrichi.
+        """
+        chat_task = asyncio.create_task(self.chat_agent.process(
+            thread=thread,
+            context_messages=context_messages,
+            user_prompt=user_prompt,
+            model_name=model_name,
+        ))
+        # Une réponse annulée après avoir échoué ne doit pas laisser d'exception non récupérée
+        chat_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        start = time.monotonic()
+        try:
+            try:
+                selections = await asyncio.wait_for(
+                    self._llm_route(user_prompt, decision), timeout=settings.SPECULATIVE_ROUTER_BUDGET
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Routeur au-delà de %ss, réponse spéculative conservée", settings.SPECULATIVE_ROUTER_BUDGET)
+                speculation_stats.router_timeouts += 1
+                selections = []
+
+            if not selections:
+                speculation_stats.wins += 1
+                speculation_stats.overlapped_seconds += time.monotonic() - start
+                logger.debug("Spéculation gagnante : aucun tool, réponse déjà en cours utilisée")
+                return await chat_task
+
+            speculation_stats.losses += 1
+            logger.debug("Spéculation perdue : tools nécessaires %s, réponse annulée", selections)
+        finally:
+            speculation_budget.release()
+            # Spéculation perdue ou requête elle-même annulée : on libère l'appel amont
+            chat_task.cancel()
+
+        tool_results = await self._execute_tools(selections)
+        return await self.chat_agent.process(
+            thread=thread,
+            context_messages=context_messages,
+            user_prompt=self._enrich_prompt(user_prompt, tool_results),
+            model_name=model_name,
+        )
+
+    async def _route_tools(self, user_prompt: str) -> list[tuple[str, str]]:
+        """
+        Choisit les tools d'un prompt en langage naturel : le classifieur local décide
+        seul s'il est assez confiant (aucun appel au routeur), sinon le routeur LLM tranche.
+        """
+        selections, decision = self._local_intent(user_prompt)
+        if selections is None:
+            selections = await self._llm_route(user_prompt, decision)
+        return selections
+
+    def _local_intent(self, user_prompt: str) -> tuple[Optional[list[tuple[str, str]]], IntentDecision]:
+        """
+        Décision du classifieur local : la liste des tools (éventuellement vide) s'il est
+        assez confiant, None s'il faut appeler le routeur LLM.
+        """
+        if not settings.INTENT_CLASSIFIER_ENABLED:
+            # Classifieur désactivé : sa décision n'est calculée que pour le journal d'évaluation
+            return None, self.intent_classifier.classify(user_prompt)
+
+        selections, decision = self.intent_classifier.decide(user_prompt)
+        if selections is not None:
+            logger.debug("Intention décidée localement (%.2f) : %s", decision.confidence, selections or "aucun tool")
+            log_intent(user_prompt, decision, None)
+        else:
+            logger.debug("Intention incertaine (%.2f, %s), routeur LLM", decision.confidence, "; ".join(decision.reasons))
+        return selections, decision
+
+    async def _llm_route(self, user_prompt: str, decision: IntentDecision) -> list[tuple[str, str]]:
+        """Appelle le routeur LLM, journalise sa décision et l'enregistre pour le budget de spéculation."""
+        selections = await self._select_tools(user_prompt)
+        log_intent(user_prompt, decision, selections)
+        speculation_budget.record_route(bool(selections))
+        return selections
 
     async def _select_tools(self, user_prompt: str) -> list[tuple[str, str]]:
         """
         Demande au LLM quels tools sont pertinents pour ce prompt.
         Retourne une liste de tuples (tool_name, argument).
         """
-        if not self.tool_registry:
+        catalog = self._tool_catalog()
+        if not catalog.tools:
             return []
 
-        tools_list = "\n".join(
-            f"- {name}: {tool.description}"
-            for name, tool in self.tool_registry.items()
-        )
-
-        system_prompt = (
-            "Tu es un sélecteur d'outils. Selon la requête utilisateur, détermine quels outils appeler.\n"
-            f"Outils disponibles :\n{tools_list}\n\n"
-            "Réponds UNIQUEMENT avec le format : outil(argument), séparés par des virgules.\n"
-            "Si un outil n'a pas besoin d'argument, écris : outil()\n"
-            "Si aucun outil n'est nécessaire, réponds : none\n\n"
-            "Exemples :\n"
-            "- 'Quelle heure est-il ?' -> datetime()\n"
-            "- 'Météo à Paris ?' -> get_weather(Paris)\n"
-            "- 'Quelle heure et météo à Lyon ?' -> datetime(), get_weather(Lyon)"
-        )
-
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": catalog.router_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        response = await self._call_llm(messages, model=settings.DEFAULT_ROUTER_MODEL)
+        try:
+            response = await self._call_llm(messages, model=settings.DEFAULT_ROUTER_MODEL, priority=ROUTER)
+        except CircuitOpenError:
+            # Routeur indisponible : on répond sans tools plutôt que d'échouer
+            return []
         if not response or response.strip().lower() == "none":
             return []
 
@@ -242,12 +509,26 @@ class OrchestratorAgent(BaseAgent):
         return selections
 
     async def _execute_tools(self, tool_selections: list[tuple[str, str]]) -> list[ToolResult]:
-        """Exécute les tools sélectionnés avec leurs arguments."""
-        results = []
+        """
+        Exécute les tools sélectionnés en parallèle, chacun borné par son timeout
+        (les arguments d'un même tool passent ensemble par run_many).
+        Un tool en échec n'empêche pas les autres : son résultat (ok=False) est conservé
+        pour que le ChatAgent sache que la donnée est indisponible.
+        """
+        # Arguments regroupés par tool : un tool batched (ex: météo de plusieurs villes) fait un seul appel
+        arguments_by_tool: dict[str, list[str]] = {}
         for name, argument in tool_selections:
-            tool = self.tool_registry[name]
-            result = await tool.execute(argument)
-            results.append(result)
+            arguments_by_tool.setdefault(name, []).append(argument)
+        grouped = await asyncio.gather(*(
+            self.tool_registry[name].run_many(arguments) for name, arguments in arguments_by_tool.items()
+        ))
+
+        # Résultats remis dans l'ordre de la sélection
+        pending = {name: iter(group) for name, group in zip(arguments_by_tool, grouped)}
+        results = [next(pending[name]) for name, _ in tool_selections]
+        failed = [r.tool_name for r in results if not r.ok]
+        if failed:
+            logger.warning("%s/%s tool(s) en échec : %s", len(failed), len(results), ", ".join(failed))
         return results
 
     @staticmethod
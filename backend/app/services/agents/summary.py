@@ -2,6 +2,7 @@ import json
 import re
 from typing import List, Optional
 
+from app.services.llm_scheduler import BACKGROUND
 from .base import BaseAgent
 
 
@@ -15,7 +16,10 @@ class SummaryAgent(BaseAgent):
         continuity without exceeding LLM token limits.
     """
 
-    async def process(self, messages_to_summarize: List, current_summary_json: str = "", model_name: str = "google/gemini-2.0-flash-001", extra_instruction: str = "") -> Optional[str]:
+    # Résumés de fond : ils consomment la capacité restante sans ralentir les chats en cours
+    priority = BACKGROUND
+
+    async def process(self, messages_to_summarize: List, current_summary_json: str = "", model_name: str = "google/gemini-2.0-flash-001", extra_instruction: str = "", priority: Optional[int] = None, fallback: bool = True) -> Optional[str]:
         """
             Summarize a list of messages and merge them into the existing thread summary.
 
@@ -29,6 +33,10 @@ class SummaryAgent(BaseAgent):
                 messages_to_summarize (List): The new message objects to be added to the memory.
                 current_summary_json (str, optional): The existing JSON summary string. Defaults to "".
                 model_name (str, optional): The model used for synthesis. Defaults to "google/gemini-2.0-flash-001".
+                priority (Optional[int]): Scheduler class; background by default, interactive
+                    when a user is waiting for the result (/summary).
+                fallback (bool): When False, a failed call or an unparsable answer returns
+                    None instead of the previous summary, so that the caller can retry.
 
             Returns:
                 Optional[str]: A valid JSON string containing keys: context, keywords, tone, and direction.
@@ -40,12 +48,69 @@ class SummaryAgent(BaseAgent):
         api_messages = self._build_summary_prompt(messages_to_summarize, current_summary_json, extra_instruction)
 
         # 2. Appel au LLM
-        raw_response = await self._call_llm(api_messages, model=model_name)
+        raw_response = await self._call_llm(api_messages, model=model_name, priority=priority)
 
         if not raw_response:
-            return current_summary_json
+            return current_summary_json if fallback else None
+
+        # 3. Nettoyage et validation de la réponse
+        validated_summary = self._parse_summary(raw_response)
+        if validated_summary is not None:
+            return validated_summary
 
-        # 3. Nettoyage de la réponse (Suppression des balises Markdown ```json)
+        if not fallback:
+            return None
+        # En cas d'échec, on essaie de garder l'ancien résumé ou on renvoie tel quel
+        return current_summary_json if current_summary_json else raw_response
+
+    async def merge_summaries(self, summaries: List[str], model_name: str, priority: Optional[int] = None) -> Optional[str]:
+        """
+            Merge consecutive JSON summaries into a single, higher-level summary (reduce step).
+
+            Args:
+                summaries (List[str]): JSON summaries of consecutive parts of the
+                    conversation, from the oldest to the newest.
+                model_name (str): The model used for synthesis.
+                priority (Optional[int]): Scheduler class (background by default).
+
+            Returns:
+                Optional[str]: The merged JSON summary, or None if the call failed or
+                    the answer could not be parsed.
+        """
+        if not summaries:
+            return None
+        if len(summaries) == 1:
+            return summaries[0]
+
+        parts = "\n".join(f"PARTIE {index} : {summary}" for index, summary in enumerate(summaries, start=1))
+        api_messages = [
+            {
+                "role": "system",
+                "content": (
+                    "Tu es un processeur de données. Ta tâche est de fusionner plusieurs résumés JSON de parties "
+                    "successives d'une même conversation en un seul résumé JSON. "
+                    "Réponds EXCLUSIVEMENT avec un objet JSON valide, sans balises Markdown, sans texte avant ou après."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"RÉSUMÉS (du plus ancien au plus récent) :\n{parts}\n\n"
+                    "Produis un JSON avec ces clés : context, keywords, tone, direction. "
+                    "Le ton et la direction reflètent la partie la plus récente."
+                ),
+            },
+        ]
+
+        raw_response = await self._call_llm(api_messages, model=model_name, priority=priority)
+        if not raw_response:
+            return None
+        return self._parse_summary(raw_response)
+
+    @staticmethod
+    def _parse_summary(raw_response: str) -> Optional[str]:
+        """Nettoie la réponse du LLM et renvoie le résumé JSON validé, ou None s'il est illisible."""
+        # Suppression des balises Markdown ```json
         clean_json = re.sub(r"```json\s?|\s?```", "", raw_response).strip()
 
         try:
@@ -60,10 +125,9 @@ class SummaryAgent(BaseAgent):
             }
             return json.dumps(validated_summary, ensure_ascii=False)
 
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, AttributeError):
             print(f"Échec parsing JSON. Réponse brute : {raw_response[:100]}...")
-            # En cas d'échec, on essaie de garder l'ancien résumé ou on renvoie tel quel
-            return current_summary_json if current_summary_json else raw_response
+            return None
 
     def _build_summary_prompt(self, messages: List, old_summary: str, extra_instruction: str = "") -> List[dict]:
         """
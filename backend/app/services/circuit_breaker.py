@@ -0,0 +1,178 @@
+import time
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Levée quand un modèle est court-circuité : l'appel n'est même pas tenté."""
+
+    def __init__(self, model: str):
+        super().__init__(f"Circuit ouvert pour le modèle {model}")
+        self.model = model
+
+
+class CircuitBreaker:
+    """
+        Per-model circuit breaker shared by every request of the process.
+
+        - closed: calls go through; outcomes are recorded over a sliding time
+          window (settings.CIRCUIT_WINDOW). The circuit opens when the error rate
+          exceeds settings.CIRCUIT_ERROR_RATE (once settings.CIRCUIT_MIN_CALLS
+          outcomes exist) or after settings.CIRCUIT_TIMEOUT_THRESHOLD
+          consecutive timeouts.
+        - open: calls are rejected immediately with CircuitOpenError so that
+          the fallback model is used right away, for settings.CIRCUIT_COOLDOWN seconds.
+        - half_open: a single probe call is let through; its success closes
+          the circuit, its failure opens it again. A probe that ends without
+          a verdict (rate limited, rejected request, cancelled) is released
+          so that the next call can probe instead of waiting for it to expire.
+
+        Attributes:
+            model (str): The model identifier this breaker protects.
+            state (str): One of "closed", "open", "half_open".
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.state = CLOSED
+        self._outcomes: deque = deque()
+        self._consecutive_timeouts = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+        # Statistiques
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def available(self) -> bool:
+        """Indique, sans réserver de sonde, si un appel aurait une chance de passer."""
+        if self.state == OPEN:
+            return time.monotonic() - self._opened_at >= settings.CIRCUIT_COOLDOWN
+        return True
+
+    def allow(self, owns_probe: bool = False) -> bool:
+        """
+        Autorise (ou non) un appel ; en half-open, réserve l'unique sonde.
+        Le détenteur de la sonde (owns_probe) conserve son droit tant qu'aucun verdict n'est rendu.
+        """
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= settings.CIRCUIT_COOLDOWN:
+            self.state = HALF_OPEN
+            self._probe_started_at = None
+
+        if self.state == CLOSED:
+            return True
+
+        if self.state == HALF_OPEN:
+            if owns_probe and self._probe_started_at is not None:
+                return True
+            # Une sonde à la fois ; une sonde bloquée au-delà du plus long timeout est considérée perdue
+            probe_expired = (
+                self._probe_started_at is not None
+                and now - self._probe_started_at > max(settings.TIMEOUTS)
+            )
+            if self._probe_started_at is None or probe_expired:
+                self._probe_started_at = now
+                return True
+
+        self.rejected += 1
+        return False
+
+    def release_probe(self):
+        """Rend la sonde half-open sans verdict : le prochain appel pourra sonder à son tour."""
+        if self.state == HALF_OPEN:
+            self._probe_started_at = None
+
+    def record_success(self):
+        if self.state == HALF_OPEN:
+            print(f"DEBUG: Circuit refermé pour {self.model}")
+            self.state = CLOSED
+            self._outcomes.clear()
+        self._consecutive_timeouts = 0
+        self._push(True)
+
+    def record_failure(self, error: Exception, timeout: bool = False):
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+
+        self._consecutive_timeouts = self._consecutive_timeouts + 1 if timeout else 0
+        self._push(False)
+
+        if self._consecutive_timeouts >= settings.CIRCUIT_TIMEOUT_THRESHOLD:
+            self._open()
+        elif len(self._outcomes) >= settings.CIRCUIT_MIN_CALLS and self.error_rate() >= settings.CIRCUIT_ERROR_RATE:
+            self._open()
+
+    def error_rate(self) -> float:
+        self._prune()
+        if not self._outcomes:
+            return 0.0
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return failures / len(self._outcomes)
+
+    def reset(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._consecutive_timeouts = 0
+        self._probe_started_at = None
+
+    def stats(self) -> dict:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, settings.CIRCUIT_COOLDOWN - (time.monotonic() - self._opened_at)), 1)
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls_in_window": len(self._outcomes),
+            "consecutive_timeouts": self._consecutive_timeouts,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in": retry_in,
+            "last_error": self.last_error,
+        }
+
+    def _open(self):
+        if self.state != OPEN:
+            print(f"WARNING: Circuit ouvert pour {self.model} ({self.last_error})")
+            self.times_opened += 1
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started_at = None
+
+    def _push(self, ok: bool):
+        self._outcomes.append((time.monotonic(), ok))
+        self._prune()
+
+    def _prune(self):
+        horizon = time.monotonic() - settings.CIRCUIT_WINDOW
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+
+class CircuitBreakerRegistry:
+    """Registre des disjoncteurs, un par modèle."""
+
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(model)
+            self._breakers[model] = breaker
+        return breaker
+
+    def stats(self) -> dict:
+        return {model: breaker.stats() for model, breaker in self._breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,153 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+
+class LatencyTracker:
+    """
+        Rolling window of successful response latencies, per model.
+
+        Used to decide when a primary request is "late" compared to its usual
+        behaviour (e.g. slower than its own p90) and deserves a hedged request.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+
+    def record(self, model: str, seconds: float):
+        self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, percentile: float) -> Optional[float]:
+        """Retourne le percentile demandé (0-1), ou None tant que l'historique est trop court."""
+        samples = self._samples.get(model)
+        if not samples or len(samples) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(percentile * len(ordered)) - 1)
+        return ordered[max(0, index)]
+
+    def stats(self) -> dict:
+        return {
+            model: {
+                "samples": len(samples),
+                "p50": self.percentile(model, 0.5),
+                "hedge_threshold": self.percentile(model, settings.HEDGE_PERCENTILE),
+            }
+            for model, samples in self._samples.items()
+        }
+
+
+class HedgingStats:
+    """Compteurs du mode hedging."""
+
+    def __init__(self):
+        self.requests = 0
+        self.hedges_fired = 0
+        self.primary_wins = 0
+        self.fallback_wins = 0
+        self.failures = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+latency_tracker = LatencyTracker(window=settings.HEDGE_WINDOW)
+hedging_stats = HedgingStats()
+
+
+async def timed_call(model: str, call: Callable[[str], Awaitable[Optional[str]]]) -> Optional[str]:
+    """Exécute call(model) et enregistre sa latence si une réponse est obtenue."""
+    start = time.monotonic()
+    result = await call(model)
+    if is_valid_answer(result):
+        latency_tracker.record(model, time.monotonic() - start)
+    return result
+
+
+def is_valid_answer(content: Optional[str]) -> bool:
+    """Une réponse non vide qui n'est pas un message d'erreur de BaseAgent._call_llm."""
+    return bool(content and content.strip()) and not content.startswith("Erreur :")
+
+
+async def hedged_call(
+        primary_model: str,
+        fallback_model: str,
+        call: Callable[[str], Awaitable[Optional[str]]],
+) -> tuple[Optional[str], Optional[str]]:
+    """
+        Run `call(primary_model)` and hedge it with `call(fallback_model)` if it is late.
+
+        The fallback request is fired when the primary has not answered within
+        its latency percentile (settings.HEDGE_PERCENTILE, or
+        settings.HEDGE_DEFAULT_DELAY until enough samples exist), or right away
+        if the primary fails before that. The first valid answer wins and the
+        other request is cancelled.
+
+        Args:
+            primary_model (str): The model requested by the user.
+            fallback_model (str): The model raced against it when the primary is late.
+            call (Callable[[str], Awaitable[Optional[str]]]): Produces the answer for a model.
+
+        Returns:
+            tuple (Optional[str], Optional[str]): The answer and the model that
+                actually produced it, or the last non-empty (error) answer and its
+                model, or (None, None) if nothing came back.
+    """
+    hedging_stats.requests += 1
+    delay = latency_tracker.percentile(primary_model, settings.HEDGE_PERCENTILE)
+    delay = max(delay if delay is not None else settings.HEDGE_DEFAULT_DELAY, settings.HEDGE_MIN_DELAY)
+
+    pending: dict[asyncio.Task, str] = {}
+
+    def start(model: str):
+        pending[asyncio.create_task(timed_call(model, call))] = model
+
+    start(primary_model)
+    hedge_started = not fallback_model or fallback_model == primary_model
+    deadline = time.monotonic() + delay
+    last_answer, last_model = None, None
+
+    try:
+        while pending or not hedge_started:
+            if not pending:
+                # Le primaire a échoué avant le délai : on bascule immédiatement
+                start(fallback_model)
+                hedge_started = True
+                continue
+
+            timeout = None if hedge_started else max(0.0, deadline - time.monotonic())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                print(f"DEBUG: {primary_model} en retard (> {delay:.1f}s), requête de couverture vers {fallback_model}")
+                hedging_stats.hedges_fired += 1
+                start(fallback_model)
+                hedge_started = True
+                continue
+
+            for task in done:
+                model = pending.pop(task)
+                if task.exception() is not None:
+                    print(f"WARNING: Échec avec {model}: {task.exception()}")
+                    continue
+                result = task.result()
+                if is_valid_answer(result):
+                    if model == primary_model:
+                        hedging_stats.primary_wins += 1
+                    else:
+                        hedging_stats.fallback_wins += 1
+                    return result, model
+                if result and result.strip():
+                    last_answer, last_model = result, model
+    finally:
+        # Annulation du perdant (ou de tout ce qui reste si nous sommes annulés)
+        for task in pending:
+            task.cancel()
+
+    hedging_stats.failures += 1
+    return last_answer, last_model
@@ -0,0 +1,129 @@
+from dataclasses import dataclass, asdict
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+
+@dataclass
+class HostStats:
+    """Compteurs d'utilisation du pool pour un hôte amont."""
+    requests: int = 0
+    new_connections: int = 0
+    http2_requests: int = 0
+    errors: int = 0
+
+
+class HttpClientPool:
+    """
+        Process-wide registry of pooled `httpx.AsyncClient` instances.
+
+        One client is kept per upstream host so that each host gets its own
+        connection pool limits (see settings.HTTP_HOST_LIMITS). Connections are
+        kept alive between calls and HTTP/2 is negotiated when available, so
+        agents and tools stop paying a TCP + TLS handshake on every request.
+
+        Clients are created lazily on first use and closed by `shutdown()`,
+        which is wired to the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, HostStats] = {}
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+            Return the shared client for the host targeted by `url`.
+
+            Args:
+                url (str): Any absolute URL (or a bare hostname) on the upstream host.
+
+            Returns:
+                httpx.AsyncClient: The pooled client dedicated to that host.
+        """
+        host = self._host_of(url)
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = self._build_client(host)
+            self._clients[host] = client
+        return client
+
+    async def startup(self, urls: Optional[list] = None):
+        """Pré-crée les clients des hôtes connus pour éviter le coût au premier appel."""
+        for url in urls or []:
+            self.get(url)
+
+    async def shutdown(self):
+        """Ferme proprement toutes les connexions ouvertes."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> dict:
+        """
+            Snapshot of pool usage per upstream host.
+
+            `reuse_ratio` is the share of requests served on an already open
+            connection (1.0 means every request reused a keep-alive connection).
+
+            Returns:
+                dict: Mapping hostname -> counters, limits and reuse ratio.
+        """
+        snapshot = {}
+        for host, stats in self._stats.items():
+            max_connections, max_keepalive = self._limits_for(host)
+            data = asdict(stats)
+            data["reuse_ratio"] = (
+                round(1 - stats.new_connections / stats.requests, 3) if stats.requests else None
+            )
+            data["max_connections"] = max_connections
+            data["max_keepalive_connections"] = max_keepalive
+            data["open"] = host in self._clients and not self._clients[host].is_closed
+            snapshot[host] = data
+        return snapshot
+
+    def _build_client(self, host: str) -> httpx.AsyncClient:
+        max_connections, max_keepalive = self._limits_for(host)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        stats = self._stats.setdefault(host, HostStats())
+
+        async def trace(event_name: str, info: dict):
+            # httpcore émet cet évènement uniquement quand une nouvelle connexion TCP est ouverte
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+            elif event_name.startswith("http2.send_request_headers.started"):
+                stats.http2_requests += 1
+
+        async def on_request(request: httpx.Request):
+            stats.requests += 1
+            request.extensions["trace"] = trace
+
+        async def on_response(response: httpx.Response):
+            if response.status_code >= 500:
+                stats.errors += 1
+
+        return httpx.AsyncClient(
+            http2=settings.HTTP2_ENABLED,
+            limits=limits,
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    @staticmethod
+    def _limits_for(host: str) -> tuple[int, int]:
+        return settings.HTTP_HOST_LIMITS.get(
+            host, (settings.HTTP_MAX_CONNECTIONS, settings.HTTP_MAX_KEEPALIVE_CONNECTIONS)
+        )
+
+    @staticmethod
+    def _host_of(url: str) -> str:
+        return urlsplit(url).hostname or url
+
+
+# Instance unique partagée par tous les agents et tous les tools
+http_clients = HttpClientPool()
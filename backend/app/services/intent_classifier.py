@@ -0,0 +1,213 @@
+import json
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+
+# Confiance attribuée à chaque type de décision locale
+CONFIDENCE_TOOL_WITH_ARGUMENT = 0.95    # mot-clé fort + argument extrait
+CONFIDENCE_TOOL = 0.9                   # mot-clé fort, tool sans argument
+CONFIDENCE_NO_TOOL = 0.6                # aucun indice : une formulation non prévue peut demander un tool
+CONFIDENCE_MISSING_ARGUMENT = 0.5       # mot-clé fort mais argument introuvable
+CONFIDENCE_HINT_ONLY = 0.4              # seulement des indices faibles
+
+# Écritures du journal d'intention hors de la boucle d'évènements ; un seul thread garde l'ordre des lignes
+_log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-log")
+
+
+@dataclass
+class IntentDecision:
+    """Décision du classifieur : tools à appeler (vide = aucun) et confiance globale."""
+    selections: list[tuple[str, str]] = field(default_factory=list)
+    confidence: float = CONFIDENCE_NO_TOOL
+    reasons: list[str] = field(default_factory=list)
+
+
+class IntentStats:
+    """Compteurs du classifieur d'intention local."""
+
+    def __init__(self):
+        self.local_tool = 0
+        self.local_none = 0
+        self.deferred = 0
+
+    def as_dict(self) -> dict:
+        total = self.local_tool + self.local_none + self.deferred
+        return {
+            **vars(self),
+            "threshold": settings.INTENT_CONFIDENCE_THRESHOLD,
+            "local_rate": round((self.local_tool + self.local_none) / total, 4) if total else 0.0,
+        }
+
+
+intent_stats = IntentStats()
+
+
+def normalize(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation : "Quelle HEURE est-il ?" -> "quelle heure est il"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"\W+", " ", text).split())
+
+
+def _phrases_regex(phrases) -> Optional[re.Pattern]:
+    """Regex qui reconnaît l'une des expressions (normalisées) en mots entiers."""
+    phrases = sorted({normalize(p) for p in phrases if normalize(p)}, key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(p) for p in phrases) + r")\b")
+
+
+@dataclass
+class _ToolRules:
+    """Règles compilées d'un tool."""
+    name: str
+    keywords: Optional[re.Pattern]
+    hints: Optional[re.Pattern]
+    argument_patterns: list[re.Pattern]
+    argument_separator: Optional[re.Pattern]
+    requires_argument: bool
+
+
+class IntentClassifier:
+    """
+    Classifieur d'intention local, consulté avant le routeur LLM.
+
+    Les règles sont générées à partir des métadonnées de chaque BaseTool
+    (name, keywords, hints, argument_patterns, requires_argument) : ajouter un
+    tool suffit à l'enseigner au classifieur. Il ne remplace pas le routeur :
+    il ne décide seul que lorsque sa confiance atteint le seuil, et laisse
+    sinon le routeur LLM trancher.
+    """
+
+    def __init__(self):
+        self.rules: dict[str, _ToolRules] = {}
+
+    def register(self, tool):
+        """Compile les règles d'un tool (appelé à la compilation du catalogue des tools de l'orchestrateur)."""
+        keywords = (tool.name.replace("_", " "), *tool.keywords)
+        self.rules[tool.name] = _ToolRules(
+            name=tool.name,
+            keywords=_phrases_regex(k for k in keywords if k),
+            hints=_phrases_regex(tool.hints),
+            argument_patterns=[re.compile(p) for p in tool.argument_patterns],
+            argument_separator=re.compile(tool.argument_separator) if tool.argument_separator else None,
+            requires_argument=tool.requires_argument,
+        )
+
+    def classify(self, prompt: str) -> IntentDecision:
+        """
+        Estimate which tools a prompt needs, with a confidence score.
+
+        A tool whose keywords appear is selected; if it needs an argument,
+        its argument patterns are matched on the raw prompt (one selection
+        per distinct argument found, lists such as "Paris et Lyon" being
+        split by the tool's `argument_separator`). A tool only suggested by
+        weak hints, or whose argument cannot be extracted, lowers the
+        confidence so that the LLM router takes over. A prompt matching no
+        rule at all gets CONFIDENCE_NO_TOOL, below the default threshold:
+        the rules only cover the phrasings they were written for, so the
+        absence of a cue does not prove that no tool is needed.
+
+        Args:
+            prompt (str): The user's natural language message.
+
+        Returns:
+            IntentDecision: The selected (tool_name, argument) pairs, the overall
+                confidence (the lowest of the individual decisions) and the
+                reasons, for logging and evaluation.
+        """
+        text = normalize(prompt)
+        decision = IntentDecision()
+        confidences = []
+
+        for rules in self.rules.values():
+            if rules.keywords and rules.keywords.search(text):
+                if not rules.requires_argument:
+                    decision.selections.append((rules.name, ""))
+                    decision.reasons.append(f"{rules.name}: mot-clé")
+                    confidences.append(CONFIDENCE_TOOL)
+                    continue
+
+                arguments = self._extract_arguments(rules, prompt)
+                if arguments:
+                    decision.selections.extend((rules.name, argument) for argument in arguments)
+                    decision.reasons.append(f"{rules.name}: mot-clé + argument")
+                    confidences.append(CONFIDENCE_TOOL_WITH_ARGUMENT)
+                else:
+                    decision.reasons.append(f"{rules.name}: argument introuvable")
+                    confidences.append(CONFIDENCE_MISSING_ARGUMENT)
+
+            elif rules.hints and rules.hints.search(text):
+                decision.reasons.append(f"{rules.name}: indice faible")
+                confidences.append(CONFIDENCE_HINT_ONLY)
+
+        decision.confidence = min(confidences) if confidences else CONFIDENCE_NO_TOOL
+        return decision
+
+    def decide(self, prompt: str, threshold: Optional[float] = None) -> tuple[Optional[list[tuple[str, str]]], IntentDecision]:
+        """
+        Classify a prompt and keep the decision only if it is confident enough.
+
+        Args:
+            prompt (str): The user's natural language message.
+            threshold (Optional[float]): Minimum confidence (INTENT_CONFIDENCE_THRESHOLD by default).
+
+        Returns:
+            tuple: (selections, decision). `selections` is the list of tools to
+                call (possibly empty for a confident "no tool"), or None when
+                the LLM router must decide.
+        """
+        threshold = settings.INTENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+        decision = self.classify(prompt)
+        if decision.confidence < threshold:
+            intent_stats.deferred += 1
+            return None, decision
+        if decision.selections:
+            intent_stats.local_tool += 1
+        else:
+            intent_stats.local_none += 1
+        return decision.selections, decision
+
+    @staticmethod
+    def _extract_arguments(rules: _ToolRules, prompt: str) -> list[str]:
+        """Arguments distincts trouvés par les patterns du tool, dans l'ordre d'apparition."""
+        found = []
+        for pattern in rules.argument_patterns:
+            for match in pattern.finditer(prompt):
+                captured = match.group("arg")
+                parts = rules.argument_separator.split(captured) if rules.argument_separator else [captured]
+                for part in parts:
+                    argument = part.strip(" '’-")
+                    if argument and argument.lower() not in (a.lower() for a in found):
+                        found.append(argument)
+        return found
+
+
+def log_intent(prompt: str, decision: IntentDecision, router_selections: Optional[list[tuple[str, str]]]):
+    """
+    Journalise un prompt routé dans INTENT_LOG_PATH (JSONL), pour l'évaluation hors ligne.
+    `router` contient la décision du routeur LLM quand il a été appelé (sert d'étiquette).
+    L'écriture est confiée au thread du journal : le routage n'attend jamais le disque.
+    """
+    if not settings.INTENT_LOG_PATH:
+        return
+    record = {
+        "at": datetime.utcnow().isoformat(),
+        "prompt": prompt,
+        "local": {"selections": decision.selections, "confidence": decision.confidence, "reasons": decision.reasons},
+        "router": router_selections,
+    }
+    _log_executor.submit(_append_record, settings.INTENT_LOG_PATH, record)
+
+
+def _append_record(path: str, record: dict):
+    try:
+        with open(path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except (OSError, TypeError, ValueError) as e:
+        print(f"WARNING: Journal d'intention non écrit ({path}) : {e}")
@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+
+def make_cache_key(model: str, messages: list) -> str:
+    """Empreinte stable (SHA-256) du modèle et du payload de messages."""
+    raw = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Cache LRU en mémoire avec expiration (TTL) par entrée."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+        On-disk cache backend (SQLite), shared by the workers of one host.
+
+        Same LRU + TTL semantics as MemoryCacheBackend: `last_access` is bumped
+        on every hit and the least recently used rows are evicted beyond
+        `max_entries`. Calls are blocking and are run in a thread by LLMCache.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMCache:
+    """
+        Response cache for deterministic LLM calls, keyed by model + messages.
+
+        Agents opt in through their `cache_ttl` class attribute (see BaseAgent);
+        hit/miss counters are kept per agent type.
+
+        Attributes:
+            backend: The storage backend (MemoryCacheBackend or SQLiteCacheBackend).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._counters: dict[str, dict[str, int]] = {}
+
+    async def get(self, key: str, namespace: str) -> Optional[str]:
+        value = await self._run(self.backend.get, key)
+        counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._run(self.backend.set, key, value, ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        hits = sum(c["hits"] for c in self._counters.values())
+        misses = sum(c["misses"] for c in self._counters.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "by_agent": self._counters,
+        }
+
+    async def _run(self, func, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+
+def _build_backend():
+    if settings.LLM_CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(settings.LLM_CACHE_PATH, settings.LLM_CACHE_MAX_ENTRIES)
+    return MemoryCacheBackend(settings.LLM_CACHE_MAX_ENTRIES)
+
+
+llm_cache = LLMCache(_build_backend())
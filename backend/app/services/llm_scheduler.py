@@ -0,0 +1,138 @@
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+from app.core.config import settings
+
+# Classes de priorité (plus petit = plus prioritaire)
+INTERACTIVE = 0
+ROUTER = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", ROUTER: "router", BACKGROUND: "background"}
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued_at", "seq", "future")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class LLMScheduler:
+    """
+        Central priority scheduler for every upstream LLM call.
+
+        A call first gets its turn from the per-model rate limiter (served in
+        the same priority order), then a slot from the scheduler, so a call
+        held back by one model's bucket or 429 pause never sits on a slot
+        needed by the other models. Slots are bounded globally
+        (settings.LLM_MAX_CONCURRENCY) and per priority class, and are handed
+        out to the waiting call with the best *effective* priority: its class
+        minus one level per settings.LLM_SCHEDULER_AGING seconds spent waiting.
+        Live chats therefore go first, router calls second, and background
+        summaries soak up spare capacity without ever starving.
+
+        Attributes:
+            max_concurrency (int): Global number of concurrent upstream calls.
+            class_limits (dict[int, int]): Maximum concurrent calls per class.
+            aging_seconds (float): Waiting time that earns one priority level.
+    """
+
+    def __init__(self, max_concurrency: int, class_limits: dict[int, int], aging_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.class_limits = class_limits
+        self.aging_seconds = aging_seconds
+
+        self._running = 0
+        self._running_by_class = {priority: 0 for priority in class_limits}
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+        # Statistiques par classe
+        self._granted = {priority: 0 for priority in class_limits}
+        self._total_wait = {priority: 0.0 for priority in class_limits}
+        self._max_wait = {priority: 0.0 for priority in class_limits}
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        """Attend un créneau pour la classe donnée et le libère en sortie du bloc."""
+        waiter = _Waiter(priority, next(self._seq))
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Créneau accordé juste avant l'annulation : on le rend
+                self._release(priority)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        snapshot = {}
+        for priority, name in PRIORITY_NAMES.items():
+            waiting = [w for w in self._waiters if w.priority == priority]
+            granted = self._granted[priority]
+            snapshot[name] = {
+                "running": self._running_by_class[priority],
+                "limit": self.class_limits[priority],
+                "queue_depth": len(waiting),
+                "oldest_wait": round(max((now - w.enqueued_at for w in waiting), default=0.0), 3),
+                "granted": granted,
+                "avg_wait": round(self._total_wait[priority] / granted, 3) if granted else 0.0,
+                "max_wait": round(self._max_wait[priority], 3),
+            }
+        return {"running": self._running, "max_concurrency": self.max_concurrency, "classes": snapshot}
+
+    def _dispatch(self):
+        now = time.monotonic()
+        # Les attentes annulées pas encore nettoyées par leur tâche sont ignorées
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        while self._running < self.max_concurrency and self._waiters:
+            eligible = [
+                w for w in self._waiters
+                if self._running_by_class[w.priority] < self.class_limits[w.priority]
+            ]
+            if not eligible:
+                return
+
+            # Vieillissement : chaque aging_seconds d'attente fait gagner un niveau de priorité
+            best = min(eligible, key=lambda w: (w.priority - (now - w.enqueued_at) / self.aging_seconds, w.seq))
+            self._waiters.remove(best)
+
+            waited = now - best.enqueued_at
+            self._running += 1
+            self._running_by_class[best.priority] += 1
+            self._granted[best.priority] += 1
+            self._total_wait[best.priority] += waited
+            self._max_wait[best.priority] = max(self._max_wait[best.priority], waited)
+            best.future.set_result(None)
+
+    def _release(self, priority: int):
+        self._running -= 1
+        self._running_by_class[priority] -= 1
+        self._dispatch()
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    class_limits={
+        INTERACTIVE: settings.LLM_CONCURRENCY_INTERACTIVE,
+        ROUTER: settings.LLM_CONCURRENCY_ROUTER,
+        BACKGROUND: settings.LLM_CONCURRENCY_BACKGROUND,
+    },
+    aging_seconds=settings.LLM_SCHEDULER_AGING,
+)
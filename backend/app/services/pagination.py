@@ -0,0 +1,65 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, tuple_
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou altéré par le client."""
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Curseur opaque désignant une ligne par sa clé de tri (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, _, row_id = raw.partition("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except ValueError as e:
+        # binascii.Error et UnicodeDecodeError héritent de ValueError
+        raise InvalidCursor(f"Curseur invalide : {cursor!r}") from e
+
+
+def keyset_page(query: Select, model, limit: int, cursor: Optional[str] = None) -> Select:
+    """
+        Restrict a query to one page, newest first, using keyset pagination.
+
+        Rows are ordered by (created_at, id) descending; the cursor is the
+        key of the last row of the previous page, and the page starts right
+        after it. Unlike OFFSET, the database seeks directly to that key
+        through the (…, created_at, id) index, so a deep page costs the same
+        as the first one, and rows inserted meanwhile do not shift the pages.
+
+        One extra row is selected: use `split_page` to tell whether another
+        page follows.
+
+        Args:
+            query (Select): The base query (filters only, no ordering or limit).
+            model: ORM class with `created_at` and `id` columns.
+            limit (int): Page size.
+            cursor (Optional[str]): `next_cursor` of the previous page, None for the first page.
+
+        Returns:
+            Select: The ordered and limited query.
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """Sépare la ligne en trop de keyset_page : (lignes de la page, curseur de la suivante ou None)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,177 @@
+import importlib
+import logging
+import time
+from importlib.metadata import EntryPoint, entry_points
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Groupes d'entry points lus dans les paquets installés, ex. dans le pyproject.toml d'un plugin :
+#   [project.entry-points."superq.tools"]
+#   stock_price = "superq_finance.tools:StockPriceTool"
+TOOL_ENTRY_POINT_GROUP = "superq.tools"
+AGENT_ENTRY_POINT_GROUP = "superq.agents"
+
+# Plugins livrés avec l'application ("module:attribut", importés seulement au premier usage)
+BUILTIN_TOOLS = {
+    "datetime": "app.services.tools.datetime_tool:DateTimeTool",
+    "get_weather": "app.services.tools.weather_tool:WeatherTool",
+}
+BUILTIN_AGENTS = {
+    "chat": "app.services.agents.chat:ChatAgent",
+    "summary": "app.services.agents.summary:SummaryAgent",
+}
+
+
+class PluginRegistry:
+    """
+        Lazily loaded registry of named plugins (tools or agents).
+
+        Plugins are declared by name only: the builtins above, the entry
+        points of `group` found in the installed packages, or `register()`
+        calls. Nothing is imported at declaration; a plugin's module is
+        imported and its class instantiated on its first `get()`. A plugin
+        that fails to load is logged and skipped until it is declared again.
+
+        `version` changes whenever the set of declared plugins changes, so
+        consumers can cache anything derived from them (router prompt, slash
+        table...) and rebuild it only when the version moves.
+
+        Attributes:
+            kind (str): "tool" or "agent", for the logs.
+            group (str): Entry point group to discover.
+            version (int): Incremented on every declaration change.
+    """
+
+    def __init__(self, kind: str, group: str, builtins: dict[str, str]):
+        self.kind = kind
+        self.group = group
+        self.builtins = builtins
+        self.version = 0
+        self._targets: dict[str, Any] = {}
+        self._sources: dict[str, str] = {}
+        self._instances: dict[str, Any] = {}
+        self._errors: dict[str, str] = {}
+        self._load_times: dict[str, float] = {}
+        self._discovered = False
+
+    def discover(self):
+        """
+            (Re)declare the builtin plugins and those exposed by installed packages.
+
+            Entry points are only listed, not loaded. A plugin named in
+            PLUGINS_DISABLED is ignored; an entry point with the name of a
+            builtin replaces it.
+        """
+        disabled = {name.strip() for name in settings.PLUGINS_DISABLED.split(",") if name.strip()}
+        targets: dict[str, Any] = {}
+        sources: dict[str, str] = {}
+        for name, target in self.builtins.items():
+            targets[name], sources[name] = target, "builtin"
+        if settings.PLUGIN_ENTRY_POINTS_ENABLED:
+            for entry_point in entry_points(group=self.group):
+                if entry_point.name in targets:
+                    logger.debug("Plugin %s '%s' remplacé par %s", self.kind, entry_point.name, entry_point.value)
+                targets[entry_point.name] = entry_point
+                sources[entry_point.name] = entry_point.dist.name if entry_point.dist else "entry point"
+
+        self._targets = {name: target for name, target in targets.items() if name not in disabled}
+        self._sources = {name: sources[name] for name in self._targets}
+        self._instances.clear()
+        self._errors.clear()
+        self._discovered = True
+        self.version += 1
+
+    def register(self, name: str, target: Any, source: str = "register"):
+        """Déclare (ou remplace) un plugin : "module:attribut", classe ou instance."""
+        self._ensure_discovered()
+        self._targets[name] = target
+        self._sources[name] = source
+        self._instances.pop(name, None)
+        self._errors.pop(name, None)
+        self.version += 1
+
+    def unregister(self, name: str):
+        self._ensure_discovered()
+        if self._targets.pop(name, None) is not None:
+            self._sources.pop(name, None)
+            self._instances.pop(name, None)
+            self._errors.pop(name, None)
+            self.version += 1
+
+    def names(self) -> list[str]:
+        """Noms des plugins déclarés (sans rien importer)."""
+        self._ensure_discovered()
+        return list(self._targets)
+
+    def __contains__(self, name: str) -> bool:
+        self._ensure_discovered()
+        return name in self._targets
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+            Return the plugin instance, importing and instantiating it on first use.
+
+            Args:
+                name (str): Declared plugin name.
+
+            Returns:
+                Optional[Any]: The instance, or None if the plugin is unknown or failed to load.
+        """
+        self._ensure_discovered()
+        instance = self._instances.get(name)
+        if instance is not None or name not in self._targets or name in self._errors:
+            return instance
+
+        started = time.perf_counter()
+        try:
+            instance = self._instantiate(self._targets[name])
+        except Exception as e:
+            # Dépendance optionnelle absente, plugin cassé... : l'application continue sans lui
+            self._errors[name] = f"{type(e).__name__}: {e}"
+            logger.warning("Plugin %s '%s' non chargé (%s) : %s", self.kind, name, self._sources[name], e)
+            return None
+        self._load_times[name] = round((time.perf_counter() - started) * 1000, 1)
+        self._instances[name] = instance
+        logger.debug("Plugin %s '%s' chargé en %s ms (%s)", self.kind, name, self._load_times[name], self._sources[name])
+        return instance
+
+    def load_all(self) -> dict[str, Any]:
+        """Charge tous les plugins déclarés ; ceux en échec sont omis."""
+        loaded = {name: self.get(name) for name in self.names()}
+        return {name: instance for name, instance in loaded.items() if instance is not None}
+
+    def stats(self) -> dict:
+        self._ensure_discovered()
+        return {
+            "version": self.version,
+            "plugins": {
+                name: {
+                    "source": self._sources[name],
+                    "loaded": name in self._instances,
+                    "load_ms": self._load_times.get(name),
+                    "error": self._errors.get(name),
+                }
+                for name in self._targets
+            },
+        }
+
+    def _ensure_discovered(self):
+        if not self._discovered:
+            self.discover()
+
+    @staticmethod
+    def _instantiate(target: Any) -> Any:
+        """Importe la cible ("module:attribut" ou entry point) ; une classe est instanciée sans argument."""
+        if isinstance(target, EntryPoint):
+            target = target.load()
+        elif isinstance(target, str):
+            module_name, _, attribute = target.partition(":")
+            target = getattr(importlib.import_module(module_name), attribute)
+        return target() if isinstance(target, type) else target
+
+
+tool_plugins = PluginRegistry("tool", TOOL_ENTRY_POINT_GROUP, BUILTIN_TOOLS)
+agent_plugins = PluginRegistry("agent", AGENT_ENTRY_POINT_GROUP, BUILTIN_AGENTS)
@@ -0,0 +1,216 @@
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.services.llm_scheduler import INTERACTIVE
+
+
+class _Waiter:
+    __slots__ = ("order", "wakeup")
+
+    def __init__(self, order: tuple[float, int]):
+        self.order = order
+        self.wakeup = asyncio.Event()
+
+
+class ModelRateLimiter:
+    """
+        Token bucket + concurrency limiter for a single upstream model.
+
+        Callers are queued instead of firing concurrently at the provider, and
+        served in priority order (INTERACTIVE before ROUTER before BACKGROUND),
+        with the same aging as the LLM scheduler: one priority level per
+        settings.LLM_SCHEDULER_AGING seconds spent waiting. Only the caller at
+        the head of the queue waits for a concurrency slot and a token in the
+        bucket. When the provider signals a limit (`Retry-After` or
+        `X-RateLimit-*` headers), the whole bucket is paused until the announced
+        reset, so queued callers wait once instead of each collecting a 429.
+
+        Attributes:
+            model (str): The model identifier this limiter protects.
+            rate (float): Bucket refill rate, in requests per second.
+            burst (int): Bucket capacity (maximum number of back-to-back requests).
+            max_concurrency (int): Maximum number of in-flight requests.
+            aging_seconds (float): Waiting time that earns one priority level.
+    """
+
+    def __init__(self, model: str, rate: float, burst: int, max_concurrency: int, aging_seconds: Optional[float] = None):
+        self.model = model
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds or settings.LLM_SCHEDULER_AGING
+
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+        # Statistiques
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def acquire(self, priority: int = INTERACTIVE):
+        """Attend son tour (priorité, concurrence + jeton) puis libère le créneau en sortie du bloc."""
+        self.queue_depth += 1
+        start = time.monotonic()
+        try:
+            await self._wait_turn(priority)
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._wake_next()
+
+    def update_from_response(self, status_code: int, headers) -> Optional[float]:
+        """
+            Adjust the limiter from the provider's rate limit signals.
+
+            Honours `Retry-After` (seconds or HTTP date) and the OpenRouter
+            `X-RateLimit-Remaining` / `X-RateLimit-Reset` pair (reset given as a
+            Unix timestamp in milliseconds).
+
+            Args:
+                status_code (int): HTTP status of the upstream response.
+                headers (Mapping): Response headers.
+
+            Returns:
+                Optional[float]: The pause applied (in seconds), if any.
+        """
+        delay = self._retry_after(headers.get("retry-after"))
+
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if delay is None and remaining is not None and reset is not None:
+            try:
+                if int(float(remaining)) <= 0:
+                    delay = max(0.0, float(reset) / 1000 - time.time())
+                else:
+                    # Ne jamais autoriser plus de requêtes que ce que le fournisseur annonce
+                    self._tokens = min(self._tokens, float(remaining))
+            except ValueError:
+                pass
+
+        if status_code == 429:
+            self.throttled += 1
+            if delay is None:
+                delay = settings.RATE_LIMIT_DEFAULT_BACKOFF
+
+        if delay:
+            delay = min(delay, settings.RATE_LIMIT_MAX_BACKOFF)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        return delay
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "avg_wait": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait": round(self.max_wait, 3),
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+        }
+
+    async def _wait_turn(self, priority: int):
+        # Le vieillissement fait gagner un niveau à la même vitesse à toutes les attentes :
+        # leur ordre relatif ne change pas, la clé de service est calculée une fois pour toutes
+        waiter = _Waiter((priority + time.monotonic() / self.aging_seconds, next(self._seq)))
+        self._waiters.append(waiter)
+        try:
+            while True:
+                if self._next_waiter() is not waiter or self.in_flight >= self.max_concurrency:
+                    waiter.wakeup.clear()
+                    await waiter.wakeup.wait()
+                    continue
+                delay = self._take_token()
+                if delay is None:
+                    self.in_flight += 1
+                    return
+                # Un appel plus prioritaire arrivé entre-temps passera devant au réveil
+                await asyncio.sleep(delay)
+        finally:
+            self._waiters.remove(waiter)
+            self._wake_next()
+
+    def _take_token(self) -> Optional[float]:
+        """Consomme un jeton ; sinon renvoie le délai avant le prochain (pause 429 comprise)."""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return None
+        return (1 - self._tokens) / self.rate
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        return min(self._waiters, key=lambda w: w.order, default=None)
+
+    def _wake_next(self):
+        waiter = self._next_waiter()
+        if waiter is not None:
+            waiter.wakeup.set()
+
+    @staticmethod
+    def _retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class RateLimiterRegistry:
+    """Registre des limiteurs, un par modèle, partagé par toutes les requêtes du processus."""
+
+    def __init__(self):
+        self._limiters: dict[str, ModelRateLimiter] = {}
+
+    def get(self, model: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            # Les modèles ":free" d'OpenRouter ont un quota par minute bien plus bas
+            rpm = settings.RATE_LIMIT_FREE_RPM if model.endswith(":free") else settings.RATE_LIMIT_PAID_RPM
+            limiter = ModelRateLimiter(
+                model=model,
+                rate=rpm / 60,
+                burst=settings.RATE_LIMIT_BURST,
+                max_concurrency=settings.RATE_LIMIT_MAX_CONCURRENCY,
+            )
+            self._limiters[model] = limiter
+        return limiter
+
+    def stats(self) -> dict:
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
+
+
+rate_limiters = RateLimiterRegistry()
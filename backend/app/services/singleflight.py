@@ -0,0 +1,78 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """Un appel amont en cours et le nombre d'appelants qui l'attendent."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+        Coalesce concurrent identical calls into a single upstream request.
+
+        The first caller for a key (the leader) starts the work in its own task;
+        callers arriving while it is in flight await the same task and share its
+        result or exception. Each waiter awaits through `asyncio.shield`, so one
+        caller going away (client disconnect, hedging loser...) does not cancel
+        the request for the others. The upstream task is only cancelled once its
+        last waiter has gone away.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+            Run `factory()` once for all concurrent callers sharing `key`.
+
+            Args:
+                key (str): Identity of the call (e.g. a hash of model + messages).
+                factory (Callable[[], Awaitable[T]]): Starts the upstream call.
+
+            Returns:
+                T: The result of the (possibly shared) upstream call.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Plus personne n'attend ce résultat : on libère la requête amont
+                self.abandoned += 1
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
+
+    def _forget(self, key: str, flight: _Flight):
+        # Un nouvel appel a pu démarrer sous la même clé : on ne retire que le nôtre
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+llm_flights = SingleFlight()
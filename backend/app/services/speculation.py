@@ -0,0 +1,79 @@
+from collections import deque
+
+from app.core.config import settings
+
+
+class SpeculationStats:
+    """Compteurs du mode spéculatif (réponse ChatAgent lancée en parallèle du routeur)."""
+
+    def __init__(self):
+        self.started = 0
+        self.wins = 0
+        self.losses = 0
+        self.skipped = 0
+        self.router_timeouts = 0
+        self.overlapped_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        decided = self.wins + self.losses
+        return {
+            **vars(self),
+            "overlapped_seconds": round(self.overlapped_seconds, 2),
+            "win_rate": round(self.wins / decided, 4) if decided else 0.0,
+        }
+
+
+class SpeculationBudget:
+    """
+        Decides whether a routed prompt may start its chat completion speculatively.
+
+        Two budgets bound the upstream calls wasted by cancelled speculations:
+        at most `max_in_flight` speculative calls at a time, and no speculation
+        while the share of recently routed prompts that needed tools (i.e.
+        speculations that would be cancelled) exceeds `max_waste_rate`. Every
+        router decision feeds that window, speculative or not, so speculation
+        resumes on its own once traffic needs fewer tools.
+    """
+
+    def __init__(self, max_in_flight: int, max_waste_rate: float, window: int):
+        self.max_in_flight = max_in_flight
+        self.max_waste_rate = max_waste_rate
+        self.in_flight = 0
+        self._needed_tools: deque = deque(maxlen=window)
+
+    def waste_rate(self) -> float:
+        """Part des derniers prompts routés qui ont eu besoin de tools."""
+        return sum(self._needed_tools) / len(self._needed_tools) if self._needed_tools else 0.0
+
+    def try_acquire(self) -> bool:
+        """Réserve une place pour une réponse spéculative, ou refuse si un budget est épuisé."""
+        if self.in_flight >= self.max_in_flight or self.waste_rate() > self.max_waste_rate:
+            speculation_stats.skipped += 1
+            return False
+        self.in_flight += 1
+        speculation_stats.started += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def record_route(self, needed_tools: bool):
+        """Enregistre la décision du routeur (spéculation gagnante ou non)."""
+        self._needed_tools.append(needed_tools)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waste_rate": round(self.waste_rate(), 4),
+            "max_waste_rate": self.max_waste_rate,
+            "window": len(self._needed_tools),
+        }
+
+
+speculation_stats = SpeculationStats()
+speculation_budget = SpeculationBudget(
+    max_in_flight=settings.SPECULATIVE_MAX_IN_FLIGHT,
+    max_waste_rate=settings.SPECULATIVE_MAX_WASTE_RATE,
+    window=settings.SPECULATIVE_WINDOW,
+)
@@ -0,0 +1,283 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, case, exists, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app import models
+from app.core.config import settings
+from app.services.summary_memory import refresh_summary_segments
+from app.services.summary_store import save_summary
+
+# Statuts d'un job (un job terminé avec succès est supprimé)
+PENDING = "pending"
+RUNNING = "running"
+FAILED = "failed"
+
+
+async def enqueue_summary_job(
+        db: AsyncSession,
+        thread_id,
+        model_name: str,
+        run_after: Optional[datetime] = None,
+        attempts: int = 0,
+        last_error: Optional[str] = None,
+):
+    """
+        Queue a summary refresh for a thread, merging it into the pending job if there is one.
+
+        A partial unique index guarantees at most one pending job per thread.
+        The insert is an upsert on that index: when a job is already waiting,
+        it simply takes the model of the newest request, so a single refresh
+        covers every message added in the meantime (the refresh itself finds
+        out which summary segments changed). A failed job re-queued into a
+        waiting job keeps its attempt count and backoff: the merged job takes
+        the highest `attempts` and, for a retry, the later `run_after`. The
+        caller commits.
+
+        Args:
+            db (AsyncSession): Database session.
+            thread_id: The thread whose summary must be updated.
+            model_name (str): Model used for the summary.
+            run_after (Optional[datetime]): Earliest execution time (now by default).
+            attempts (int): Attempts already made (used when a failed job is re-queued).
+            last_error (Optional[str]): Error of the previous attempt, if any.
+    """
+    now = datetime.utcnow()
+    stmt = insert(models.SummaryJob).values(
+        thread_id=thread_id,
+        model_name=model_name,
+        status=PENDING,
+        attempts=attempts,
+        last_error=last_error,
+        run_after=run_after or now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.SummaryJob.thread_id],
+        index_where=models.SummaryJob.status == PENDING,
+        set_={
+            # Une nouvelle demande impose son modèle, un job replanifié après échec garde celui en place
+            "model_name": case(
+                (stmt.excluded.attempts == 0, stmt.excluded.model_name),
+                else_=models.SummaryJob.model_name,
+            ),
+            # Les tentatives et le délai d'attente d'un job replanifié survivent à la fusion
+            "attempts": func.greatest(models.SummaryJob.attempts, stmt.excluded.attempts),
+            "run_after": case(
+                (stmt.excluded.attempts > 0, func.greatest(models.SummaryJob.run_after, stmt.excluded.run_after)),
+                else_=models.SummaryJob.run_after,
+            ),
+            "last_error": func.coalesce(stmt.excluded.last_error, models.SummaryJob.last_error),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def claim_summary_job(db: AsyncSession) -> Optional[models.SummaryJob]:
+    """
+        Atomically take the next runnable job, or None if the queue is empty.
+
+        Runnable jobs are pending jobs whose `run_after` has passed and whose
+        thread has no job running, plus running jobs whose lease expired (their
+        worker died). While a job runs, its worker renews the lease every
+        SUMMARY_JOB_HEARTBEAT seconds (see `lease_heartbeat`), so a long
+        refresh is never claimed a second time. The row is selected with `FOR UPDATE SKIP LOCKED`, so
+        concurrent workers never claim the same job nor wait on each other.
+
+        Args:
+            db (AsyncSession): Database session (the claim is committed immediately).
+
+        Returns:
+            Optional[models.SummaryJob]: The claimed job, now in the running state.
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=settings.SUMMARY_JOB_LEASE)
+    job_model = models.SummaryJob
+    running = aliased(models.SummaryJob)
+
+    # Un seul résumé à la fois par thread
+    thread_busy = exists().where(
+        running.thread_id == job_model.thread_id,
+        running.status == RUNNING,
+        running.locked_at >= lease_expired,
+    )
+
+    job = await db.scalar(
+        select(job_model)
+        .where(or_(
+            and_(job_model.status == PENDING, job_model.run_after <= now, ~thread_busy),
+            and_(job_model.status == RUNNING, job_model.locked_at < lease_expired),
+        ))
+        .order_by(job_model.run_after.asc())
+        .with_for_update(skip_locked=True)
+        .limit(1)
+    )
+    if job is None:
+        await db.rollback()
+        return None
+
+    job.status = RUNNING
+    job.locked_at = now
+    job.attempts += 1
+    await db.commit()
+    return job
+
+
+@asynccontextmanager
+async def lease_heartbeat(db: AsyncSession, job_id):
+    """
+        Renew the lease of a running job (`locked_at`) until the block exits.
+
+        A hierarchical refresh chains several LLM calls and can last longer
+        than SUMMARY_JOB_LEASE; without renewal, another worker would claim
+        the job while it is still running. Renewals use their own short
+        session on the same engine, since the job's session is busy with the
+        refresh. A job that is no longer running (thread deleted) stops the
+        heartbeat.
+
+        Args:
+            db (AsyncSession): Session of the job (only its engine is used).
+            job_id: The running job.
+    """
+    async def beat():
+        while True:
+            await asyncio.sleep(settings.SUMMARY_JOB_HEARTBEAT)
+            try:
+                async with AsyncSession(db.bind) as session:
+                    result = await session.execute(
+                        update(models.SummaryJob)
+                        .where(models.SummaryJob.id == job_id, models.SummaryJob.status == RUNNING)
+                        .values(locked_at=datetime.utcnow())
+                    )
+                    await session.commit()
+            except Exception as e:
+                # Échec ponctuel (connexion...) : nouvel essai au prochain battement
+                print(f"WARNING: Prolongation du bail du job {job_id} impossible : {e}")
+                continue
+            if result.rowcount == 0:
+                print(f"WARNING: Job de résumé {job_id} plus en cours, bail non prolongé")
+                return
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+async def complete_summary_job(db: AsyncSession, job: models.SummaryJob):
+    """Supprime un job terminé avec succès."""
+    await db.delete(job)
+    await db.commit()
+
+
+async def fail_summary_job(db: AsyncSession, job: models.SummaryJob, error: str):
+    """
+        Record a failed attempt: re-queue the job with exponential backoff, or mark it failed.
+
+        A re-queued job goes through `enqueue_summary_job`, so it merges into a
+        pending job created for the same thread in the meantime instead of
+        violating the one-pending-job-per-thread constraint.
+
+        Args:
+            db (AsyncSession): Database session.
+            job (models.SummaryJob): The job whose attempt failed.
+            error (str): Description of the failure, kept in `last_error`.
+    """
+    if job.attempts >= settings.SUMMARY_JOB_MAX_ATTEMPTS:
+        job.status = FAILED
+        job.last_error = error
+        job.locked_at = None
+        await db.commit()
+        print(f"WARNING: Job de résumé {job.id} abandonné après {job.attempts} tentatives : {error}")
+        return
+
+    delay = min(settings.SUMMARY_JOB_BACKOFF * 2 ** (job.attempts - 1), settings.SUMMARY_JOB_MAX_BACKOFF)
+    retry = {
+        "thread_id": job.thread_id,
+        "model_name": job.model_name,
+        "attempts": job.attempts,
+    }
+    await db.delete(job)
+    await db.flush()
+    await enqueue_summary_job(
+        db,
+        run_after=datetime.utcnow() + timedelta(seconds=delay),
+        last_error=error,
+        **retry,
+    )
+    await db.commit()
+    print(f"DEBUG: Job de résumé du thread {retry['thread_id']} replanifié dans {delay:.0f}s ({error})")
+
+
+async def run_summary_job(db: AsyncSession, job: models.SummaryJob, summary_agent):
+    """
+        Execute a claimed job: refresh the thread's summary segments and its root summary.
+
+        Args:
+            db (AsyncSession): Database session.
+            job (models.SummaryJob): A job returned by `claim_summary_job`.
+            summary_agent (SummaryAgent): The agent performing the map and reduce calls.
+    """
+    thread = await db.get(models.Thread, job.thread_id)
+    if not thread:
+        # Thread supprimé entre-temps
+        await complete_summary_job(db, job)
+        return
+
+    # Version lue avant les appels LLM : sert au compare-and-swap final
+    thread_id, expected_version, model_name = thread.id, thread.summary_version, job.model_name
+
+    print(f"DEBUG: Rafraîchissement du résumé hiérarchique du thread {thread_id}...")
+    try:
+        async with lease_heartbeat(db, job.id):
+            root_summary = await refresh_summary_segments(db, thread, model_name, summary_agent)
+            # Le segment racine reste exposé comme résumé courant du thread ; une écriture
+            # concurrente (/summary) est re-fusionnée avec lui au lieu d'être écrasée
+            if root_summary and not await save_summary(
+                db, thread_id, expected_version, root_summary,
+                remerge=lambda latest: summary_agent.merge_summaries([latest, root_summary], model_name),
+            ):
+                raise RuntimeError("conflits de version non résolus")
+    except Exception as e:
+        await db.rollback()
+        # Le rollback expire les objets de la session : le job est relu explicitement
+        await db.refresh(job)
+        await fail_summary_job(db, job, f"{type(e).__name__}: {e}")
+        return
+
+    await complete_summary_job(db, job)
+    print(f"DEBUG: Résumé mis à jour avec succès pour le thread {thread_id}")
+
+
+async def summary_job_stats(db: AsyncSession) -> dict:
+    """Compteurs par statut, âge du plus ancien job en attente et derniers échecs définitifs."""
+    job_model = models.SummaryJob
+    counts = dict((await db.execute(
+        select(job_model.status, func.count(job_model.id)).group_by(job_model.status)
+    )).all())
+    oldest_pending = await db.scalar(select(func.min(job_model.created_at)).where(job_model.status == PENDING))
+    failed = await db.scalars(
+        select(job_model)
+        .where(job_model.status == FAILED)
+        .order_by(job_model.created_at.desc())
+        .limit(10)
+    )
+    return {
+        "pending": counts.get(PENDING, 0),
+        "running": counts.get(RUNNING, 0),
+        "failed": counts.get(FAILED, 0),
+        "oldest_pending_age": (
+            round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else None
+        ),
+        "recent_failures": [
+            {"id": str(job.id), "thread_id": str(job.thread_id), "attempts": job.attempts, "error": job.last_error}
+            for job in failed
+        ],
+    }
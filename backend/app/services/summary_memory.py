@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.services.summary_store import render_memory_block, render_memory_line, render_segments_block, structure_summary
+from app.services.tokenizer import tokenizer
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryRefreshError(Exception):
+    """Au moins un segment n'a pas pu être calculé (les autres sont conservés pour la tentative suivante)."""
+
+    def __init__(self, failed: int):
+        super().__init__(f"{failed} segment(s) de résumé en échec")
+        self.failed = failed
+
+
+async def refresh_summary_segments(db: AsyncSession, thread: models.Thread, model_name: str, summary_agent) -> Optional[str]:
+    """
+        Bring the hierarchical summary of a thread up to date and return its root summary.
+
+        Messages are cut into chunks of SUMMARY_SEGMENT_SIZE. Each chunk has a
+        level-0 segment (map): its messages summarized from scratch. Every
+        SUMMARY_SEGMENT_FANOUT consecutive segments are merged into a segment
+        of the level above (reduce), until a single root segment covers the
+        whole thread.
+
+        Only segments that are missing, dirty, or whose range changed (new
+        messages in the last chunk, deleted messages shifting the chunks)
+        are recomputed, along with their ancestors. The segments of one
+        level are computed concurrently; the LLM scheduler bounds the actual
+        parallelism. Results are committed level by level, so after a
+        failure the next attempt resumes from the failed segments.
+
+        Args:
+            db (AsyncSession): Database session.
+            thread (models.Thread): The thread to summarize.
+            model_name (str): Model used for the map and reduce calls.
+            summary_agent (SummaryAgent): Agent performing the map and reduce calls.
+
+        Returns:
+            Optional[str]: The JSON summary of the root segment, or None if the thread is empty.
+
+        Raises:
+            SummaryRefreshError: If at least one segment could not be computed.
+    """
+    messages = list(await db.scalars(
+        select(models.Message)
+        .where(models.Message.thread_id == thread.id)
+        .order_by(models.Message.created_at.asc(), models.Message.id.asc())
+    ))
+    existing = {
+        (segment.level, segment.position): segment
+        for segment in await db.scalars(
+            select(models.SummarySegment).where(models.SummarySegment.thread_id == thread.id)
+        )
+    }
+
+    size = settings.SUMMARY_SEGMENT_SIZE
+    chunks = [messages[start:start + size] for start in range(0, len(messages), size)]
+
+    # 1. Map : un segment de niveau 0 par lot de messages
+    nodes, jobs = [], []
+    for position, chunk in enumerate(chunks):
+        segment, stale = _segment_at(
+            db, existing, thread.id, 0, position,
+            (chunk[0].created_at, chunk[-1].created_at, len(chunk)),
+        )
+        if stale:
+            jobs.append((segment, summary_agent.process(chunk, "", model_name, fallback=False)))
+        nodes.append(segment)
+    changed = await _compute_level(db, jobs)
+
+    # 2. Reduce : fusion par groupes de FANOUT jusqu'à un segment racine unique
+    level = 1
+    fanout = settings.SUMMARY_SEGMENT_FANOUT
+    while len(nodes) > 1:
+        parents, jobs = [], []
+        for position, start in enumerate(range(0, len(nodes), fanout)):
+            children = nodes[start:start + fanout]
+            segment, stale = _segment_at(
+                db, existing, thread.id, level, position,
+                (children[0].messages_from, children[-1].messages_until, sum(c.message_count for c in children)),
+            )
+            if stale or any(child in changed for child in children):
+                jobs.append((segment, summary_agent.merge_summaries([c.content for c in children], model_name)))
+            parents.append(segment)
+        changed = await _compute_level(db, jobs)
+        nodes = parents
+        level += 1
+
+    # Segments devenus inutiles (messages supprimés, niveau disparu)
+    for segment in existing.values():
+        await db.delete(segment)
+    await db.commit()
+
+    return nodes[0].content if nodes else None
+
+
+def select_memory_segments(segments: list, budget: int) -> list:
+    """
+        Pick the most detailed level of a thread's summary that fits in a token budget.
+
+        Every level covers the whole thread: level 0 has one segment per chunk
+        of messages, the top level a single root segment. The lowest level
+        whose segments add up to at most `budget` tokens is returned; if none
+        fits, the root alone.
+
+        Args:
+            segments (list): The thread's models.SummarySegment rows (any order).
+            budget (int): Maximum number of tokens for the memory block.
+
+        Returns:
+            list: The segments of the chosen level, from the oldest to the newest
+                (empty if the thread has no computed segment yet).
+    """
+    levels: dict[int, list] = {}
+    for segment in segments:
+        if segment.memory_line:
+            levels.setdefault(segment.level, []).append(segment)
+    if not levels:
+        return []
+
+    for level in sorted(levels):
+        candidates = sorted(levels[level], key=lambda s: s.position)
+        if sum(s.token_count or 0 for s in candidates) <= budget:
+            return candidates
+    return sorted(levels[max(levels)], key=lambda s: s.position)
+
+
+def thread_memory_block(thread) -> str:
+    """
+    Bloc [MEMORY] injecté par le ChatAgent : plusieurs segments du niveau qui tient dans
+    SUMMARY_MEMORY_BUDGET, sinon le bloc pré-rendu de la version courante du résumé.
+    Sert aussi à déduire la taille réelle de la mémoire du budget de l'historique.
+    """
+    segments = select_memory_segments(getattr(thread, 'summary_segments', None) or [], settings.SUMMARY_MEMORY_BUDGET)
+    if len(segments) > 1:
+        return render_segments_block(segments)
+    if thread.summary_memory:
+        return thread.summary_memory
+    # Résumé antérieur au pré-rendu (voir app.scripts.backfill_summary_memory)
+    return render_memory_block(structure_summary(thread.current_summary), thread.current_summary)
+
+
+def _segment_at(db: AsyncSession, existing: dict, thread_id, level: int, position: int, signature: tuple):
+    """Renvoie le segment (créé au besoin) et s'il doit être recalculé ; met à jour sa plage."""
+    segment = existing.pop((level, position), None)
+    if segment is None:
+        segment = models.SummarySegment(thread_id=thread_id, level=level, position=position, dirty=True)
+        db.add(segment)
+
+    stale = (
+        segment.dirty
+        or segment.content is None
+        or (segment.messages_from, segment.messages_until, segment.message_count) != signature
+    )
+    segment.messages_from, segment.messages_until, segment.message_count = signature
+    return segment, stale
+
+
+async def _compute_level(db: AsyncSession, jobs: list) -> set:
+    """Exécute en parallèle les appels d'un niveau, enregistre les résultats et renvoie les segments modifiés."""
+    if not jobs:
+        return set()
+
+    results = await asyncio.gather(*(call for _, call in jobs), return_exceptions=True)
+    changed, failed = set(), 0
+    for (segment, _), result in zip(jobs, results):
+        if isinstance(result, BaseException) or not result:
+            logger.warning("Segment de résumé niveau %s #%s en échec : %s", segment.level, segment.position, result)
+            segment.dirty = True
+            failed += 1
+            continue
+        segment.content = result
+        segment.memory_line = render_memory_line(structure_summary(result), result)
+        segment.token_count = tokenizer.count(segment.memory_line)
+        segment.dirty = False
+        changed.add(segment)
+
+    await db.commit()
+    if failed:
+        raise SummaryRefreshError(failed)
+    return changed
@@ -0,0 +1,183 @@
+import json
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.services.token_manager import parse_summary_json
+
+
+def structure_summary(summary: str) -> Optional[dict]:
+    """
+        Turn a stored summary string into its structured form, once, at write time.
+
+        Summaries produced by SummaryAgent are already validated, canonical
+        JSON and are read with a single `json.loads`; anything else (legacy
+        rows, raw fallback answers) goes through the tolerant parser.
+
+        Args:
+            summary (str): The summary text.
+
+        Returns:
+            Optional[dict]: The summary fields, or None if the text is not a JSON object.
+    """
+    if not summary:
+        return None
+    try:
+        data = json.loads(summary)
+    except json.JSONDecodeError:
+        data = parse_summary_json(summary)
+    return data if isinstance(data, dict) else None
+
+
+def render_memory_block(summary_data: Optional[dict], summary: str) -> str:
+    """Bloc [MEMORY] injecté dans le prompt système du ChatAgent (texte brut si le résumé n'est pas structuré)."""
+    if not summary_data:
+        return f"[MEMORY]\n{summary}\n[/MEMORY]" if summary else ""
+    keywords = summary_data.get('keywords')
+    return (
+        f"[MEMORY]\n"
+        f"CONTEXTE : {summary_data.get('context', 'N/A')}\n"
+        f"KEYPOINTS : {', '.join(keywords) if keywords else 'N/A'}\n"
+        f"TONE : {summary_data.get('tone', 'neutre')}"
+        f"[/MEMORY]"
+    )
+
+
+def render_memory_line(summary_data: Optional[dict], summary: str) -> str:
+    """Ligne d'un segment dans le bloc [MEMORY] détaillé (une par partie de la conversation)."""
+    if not summary_data:
+        return f"- {summary}"
+    keywords = summary_data.get('keywords')
+    return (
+        f"- {summary_data.get('context', 'N/A')} "
+        f"(KEYPOINTS : {', '.join(keywords) if keywords else 'N/A'} | TONE : {summary_data.get('tone', 'neutre')})"
+    )
+
+
+def render_segments_block(segments: list) -> str:
+    """Assemble les lignes pré-rendues des segments, du plus ancien au plus récent."""
+    return "[MEMORY]\n" + "\n".join(segment.memory_line for segment in segments) + "[/MEMORY]"
+
+
+async def compare_and_swap_summary(db: AsyncSession, thread_id, expected_version: int, new_summary: str) -> bool:
+    """
+        Write a thread summary only if nobody else wrote it since `expected_version` was read.
+
+        The check and the write are a single UPDATE ... WHERE summary_version =
+        expected, which also bumps the version and the write counter and
+        stores, for that version, the structured JSONB form and the rendered
+        [MEMORY] block used by the ChatAgent. On a conflict, the thread's
+        conflict counter is incremented instead. Commits in both cases.
+
+        Args:
+            db (AsyncSession): Database session.
+            thread_id: The thread whose summary is written.
+            expected_version (int): The summary_version the new summary was computed from.
+            new_summary (str): The summary to store.
+
+        Returns:
+            bool: True if the summary was written, False on a version conflict.
+    """
+    thread = models.Thread
+    summary_data = structure_summary(new_summary)
+    result = await db.execute(
+        update(thread)
+        .where(thread.id == thread_id, thread.summary_version == expected_version)
+        .values({
+            thread.current_summary: new_summary,
+            thread.summary_data: summary_data,
+            thread.summary_memory: render_memory_block(summary_data, new_summary),
+            thread.summary_version: thread.summary_version + 1,
+            thread.summary_writes: thread.summary_writes + 1,
+        })
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.rowcount
+    if not updated:
+        await db.execute(
+            update(thread)
+            .where(thread.id == thread_id)
+            .values({thread.summary_conflicts: thread.summary_conflicts + 1})
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    return bool(updated)
+
+
+async def save_summary(
+        db: AsyncSession,
+        thread_id,
+        expected_version: int,
+        new_summary: str,
+        remerge: Callable[[str], Awaitable[Optional[str]]],
+) -> Optional[str]:
+    """
+        Store a freshly computed summary, re-merging it with concurrent writes instead of overwriting them.
+
+        On a version conflict, the latest stored summary is read back and
+        `remerge(latest)` folds the work just done into it; the result is
+        written with a new compare-and-swap. This is repeated at most
+        SUMMARY_CAS_MAX_RETRIES times.
+
+        Args:
+            db (AsyncSession): Database session.
+            thread_id: The thread whose summary is written.
+            expected_version (int): summary_version read before computing `new_summary`.
+            new_summary (str): The summary to store.
+            remerge (Callable[[str], Awaitable[Optional[str]]]): Merges the latest stored
+                summary with the caller's result; returns None on failure.
+
+        Returns:
+            Optional[str]: The summary actually stored, or None if the thread no longer
+                exists, a re-merge failed or the retries were exhausted.
+    """
+    for attempt in range(settings.SUMMARY_CAS_MAX_RETRIES + 1):
+        if await compare_and_swap_summary(db, thread_id, expected_version, new_summary):
+            return new_summary
+
+        latest = (await db.execute(
+            select(models.Thread.current_summary, models.Thread.summary_version)
+            .where(models.Thread.id == thread_id)
+        )).first()
+        if latest is None:
+            return None
+        print(f"DEBUG: Conflit de version sur le résumé du thread {thread_id} "
+              f"(attendue {expected_version}, actuelle {latest.summary_version}), re-fusion...")
+        if attempt == settings.SUMMARY_CAS_MAX_RETRIES:
+            break
+
+        merged = await remerge(latest.current_summary) if latest.current_summary else new_summary
+        if not merged:
+            return None
+        new_summary, expected_version = merged, latest.summary_version
+
+    print(f"WARNING: Résumé du thread {thread_id} non enregistré après {settings.SUMMARY_CAS_MAX_RETRIES} re-fusions")
+    return None
+
+
+async def summary_conflict_stats(db: AsyncSession) -> dict:
+    """Taux de conflits global (écritures réussies vs conflits) et threads les plus disputés."""
+    thread = models.Thread
+    writes, conflicts = (await db.execute(select(
+        func.coalesce(func.sum(thread.summary_writes), 0),
+        func.coalesce(func.sum(thread.summary_conflicts), 0),
+    ))).one()
+    attempts = writes + conflicts
+    contested = (await db.execute(
+        select(thread.id, thread.summary_writes, thread.summary_conflicts)
+        .where(thread.summary_conflicts > 0)
+        .order_by(thread.summary_conflicts.desc())
+        .limit(10)
+    )).all()
+    return {
+        "writes": writes,
+        "conflicts": conflicts,
+        "conflict_rate": round(conflicts / attempts, 4) if attempts else 0.0,
+        "top_threads": [
+            {"thread_id": str(row.id), "writes": row.summary_writes, "conflicts": row.summary_conflicts}
+            for row in contested
+        ],
+    }
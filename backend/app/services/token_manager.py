@@ -1,20 +1,65 @@
 import json
 import re
+from bisect import bisect_left
+from itertools import accumulate
 from typing import Optional
 
-import tiktoken
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import models
 from app.core.config import settings
+from app.services.tokenizer import tokenizer
+
+# Taille des lots parcourus (du plus récent au plus ancien) par get_optimized_context
+_WINDOW_CHUNK = 256
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+        Count the tokens of a text with the tokenizer registered for `model`.
+
+        Args:
+            text (str): The text to measure (None is treated as empty).
+            model (Optional[str]): Model identifier; the default encoding is used when omitted.
+
+        Returns:
+            int: The number of tokens.
+    """
+    return tokenizer.count(text, model)
+
+
+def message_token_count(msg) -> int:
+    """
+        Return a message's token count, preferring the value persisted at insert time.
+
+        Args:
+            msg: A models.Message (or any object / dict with `content` and
+                optionally `token_count`).
+
+        Returns:
+            int: The stored token count, or a fresh count for legacy rows.
+    """
+    stored = msg.get('token_count') if isinstance(msg, dict) else getattr(msg, 'token_count', None)
+    if stored is not None:
+        return stored
+    content = msg.get('content', '') if isinstance(msg, dict) else getattr(msg, 'content', '')
+    return count_tokens(content)
 
 
 def get_optimized_context(thread_summary: str, messages: list):
     """
         Calculate the sliding window of messages that fit within the token limit.
 
-        This function uses tiktoken to measure the token weight of the current summary
-        and recent messages. It prioritizes keeping the most recent messages in the
-        active context and identifies older messages that should be offloaded to
-        the summarization process to stay within the MAX_WINDOW_SIZE.
+        The newest messages are kept as long as the summary plus their running
+        token total stays under MAX_WINDOW_SIZE; everything older is offloaded
+        to the summarization process. Messages are walked from the newest in
+        chunks: the chunk's weights are computed in bulk (persisted
+        `token_count`, or one batched tokenization for legacy rows), turned
+        into a running sum with `itertools.accumulate`, and the cutoff is found
+        by binary search. Older chunks are never tokenized once the budget is
+        exhausted, and both lists are plain slices of the input, so the whole
+        split is linear in the number of messages kept.
 
         Args:
             thread_summary (str): The existing summary text or JSON string.
@@ -22,30 +67,91 @@ def get_optimized_context(thread_summary: str, messages: list):
 
         Returns:
             tuple (list, list):
-                - kept_messages: List of messages that fit in the current context window.
-                - to_be_summarized: List of messages that exceed the limit and need summarization.
+                - kept_messages: The most recent messages that fit in the current context window.
+                - to_be_summarized: The older messages that exceed the limit and need summarization.
     """
-    encoding = tiktoken.encoding_for_model("gpt-4o")
     safe_summary = thread_summary if thread_summary else ""
 
     # Utilisation de la taille de fenêtre des settings
-    current_tokens = len(encoding.encode(safe_summary))
-    max_tokens = settings.MAX_WINDOW_SIZE
-
-    kept_messages = []
-    to_be_summarized = []
+    budget = settings.MAX_WINDOW_SIZE - count_tokens(safe_summary)
+
+    kept = 0
+    running_total = 0
+
+    for end in range(len(messages), 0, -_WINDOW_CHUNK):
+        chunk = messages[max(0, end - _WINDOW_CHUNK):end][::-1]
+        cumulative = list(accumulate(_message_weights(chunk), initial=running_total))[1:]
+
+        # Nombre de messages du lot dont le total cumulé reste strictement sous le budget
+        fitting = bisect_left(cumulative, budget)
+        kept += fitting
+        if fitting < len(chunk):
+            break
+        running_total = cumulative[-1]
+
+    split = len(messages) - kept
+    return messages[split:], messages[:split]
+
+
+def _message_weights(messages: list) -> list[int]:
+    """Poids en tokens d'un lot de messages : valeurs stockées, sinon une seule tokenisation groupée."""
+    weights = [
+        msg.get('token_count') if isinstance(msg, dict) else getattr(msg, 'token_count', None)
+        for msg in messages
+    ]
+    missing = [i for i, weight in enumerate(weights) if weight is None]
+    if missing:
+        contents = [
+            messages[i].get('content', '') if isinstance(messages[i], dict) else getattr(messages[i], 'content', '')
+            for i in missing
+        ]
+        for i, count in zip(missing, tokenizer.count_many(contents)):
+            weights[i] = count
+    return weights
+
+
+async def select_context_window(db: AsyncSession, thread_id, budget: int, exclude_id=None) -> list:
+    """
+        Select, in a single SQL query, the most recent messages that fit in a token budget.
 
-    for msg in reversed(messages):
-        content = msg.content if hasattr(msg, 'content') else msg.get('content', '')
-        msg_tokens = len(encoding.encode(content))
+        A window function computes the running sum of message token counts from
+        the newest message backwards; only the rows whose running total stays
+        strictly under `budget` are returned, the same cutoff as
+        `get_optimized_context`. Legacy rows without a stored `token_count`
+        are weighted with a length / 4 approximation.
 
-        if current_tokens + msg_tokens < max_tokens:
-            kept_messages.insert(0, msg)
-            current_tokens += msg_tokens
-        else:
-            to_be_summarized.insert(0, msg)
+        Args:
+            db (AsyncSession): Database session.
+            thread_id: The thread whose history is selected.
+            budget (int): Token budget, never reached by the returned messages.
+            exclude_id (optional): A message id to leave out (e.g. the prompt being answered).
 
-    return kept_messages, to_be_summarized
+        Returns:
+            list: The selected models.Message objects, from oldest to newest.
+    """
+    if budget <= 0:
+        return []
+
+    weight = func.coalesce(models.Message.token_count, func.length(models.Message.content) / 4)
+    running_tokens = func.sum(weight).over(
+        order_by=(models.Message.created_at.desc(), models.Message.id.desc()),
+        rows=(None, 0),
+    )
+
+    query = select(models.Message.id.label("id"), running_tokens.label("running_tokens")).where(
+        models.Message.thread_id == thread_id
+    )
+    if exclude_id is not None:
+        query = query.where(models.Message.id != exclude_id)
+    window = query.subquery()
+
+    result = await db.scalars(
+        select(models.Message)
+        .join(window, models.Message.id == window.c.id)
+        .where(window.c.running_tokens < budget)
+        .order_by(models.Message.created_at.asc(), models.Message.id.asc())
+    )
+    return list(result)
 
 
 def parse_summary_json(raw_content: str) -> Optional[dict]:
@@ -0,0 +1,151 @@
+import asyncio
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class TokenizerSpec:
+    """
+    Tokenizer associé à une famille de modèles.
+
+    encoding: encodage tiktoken utilisé pour les comptes.
+    chars_per_token: ratio moyen utilisé par le mode approximatif.
+    exact: True si l'encodage est celui du fournisseur, False s'il ne sert que d'estimation.
+    """
+    encoding: str
+    chars_per_token: float
+    exact: bool = False
+
+
+# Registre par préfixe d'identifiant OpenRouter (le plus long préfixe l'emporte).
+# tiktoken ne publie que les encodages OpenAI : seuls ces modèles ont des comptes exacts.
+# Les autres familles sont estimées avec o200k_base, dont le compte peut s'écarter sensiblement
+# de celui de leur propre tokenizer ; le ratio affine seulement le mode approximatif.
+TOKENIZER_REGISTRY: dict[str, TokenizerSpec] = {
+    "openai/": TokenizerSpec("o200k_base", 4.0, exact=True),
+    "openai/gpt-3.5": TokenizerSpec("cl100k_base", 4.0, exact=True),
+    "openai/gpt-4-": TokenizerSpec("cl100k_base", 4.0, exact=True),
+    "mistralai/": TokenizerSpec("o200k_base", 3.5),
+    "google/": TokenizerSpec("o200k_base", 4.0),
+    "anthropic/": TokenizerSpec("o200k_base", 3.5),
+    "meta-llama/": TokenizerSpec("o200k_base", 3.8),
+}
+DEFAULT_SPEC = TokenizerSpec("o200k_base", 4.0)
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(name: str) -> tiktoken.Encoding:
+    """Chargement paresseux, une seule fois par processus et par encodage."""
+    return tiktoken.get_encoding(name)
+
+
+class TokenizerService:
+    """
+        Per-model token counting with tokenized, batched, off-loop and approximate modes.
+
+        - Tokenized counts use the tiktoken encoding registered for the model
+          family, loaded lazily and cached for the lifetime of the process.
+          They are exact for OpenAI models only: tiktoken has no encoding for
+          the other families, which are estimated with o200k_base (see
+          `is_exact`). Counts stored in `token_count` are therefore budgeting
+          estimates for those models, not the provider's billed usage.
+        - `count_many` encodes a whole list in one call (`encode_ordinary_batch`,
+          which spreads the work over threads when more than one core is available).
+        - The async variants run large inputs (more than
+          settings.TOKENIZER_OFFLOAD_CHARS characters) in a thread pool so that
+          a long pasted message does not block the event loop.
+        - `approximate=True` skips tokenization entirely (characters / ratio),
+          for budgeting where an exact count is not needed.
+    """
+
+    def __init__(self, offload_chars: int, workers: int):
+        self.offload_chars = offload_chars
+        # Sur une machine mono-cœur, les threads d'encode_batch ne font qu'ajouter du surcoût
+        self.batch_threads = min(workers, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tokenizer")
+
+    @staticmethod
+    def spec_for(model: Optional[str]) -> TokenizerSpec:
+        if not model:
+            return DEFAULT_SPEC
+        matches = [prefix for prefix in TOKENIZER_REGISTRY if model.startswith(prefix)]
+        return TOKENIZER_REGISTRY[max(matches, key=len)] if matches else DEFAULT_SPEC
+
+    def is_exact(self, model: Optional[str]) -> bool:
+        """True si le compte tokenisé du modèle est exact, False s'il s'agit d'une estimation o200k_base."""
+        return self.spec_for(model).exact
+
+    def encoding_for(self, model: Optional[str]) -> tiktoken.Encoding:
+        return _load_encoding(self.spec_for(model).encoding)
+
+    def count(self, text: Optional[str], model: Optional[str] = None, approximate: bool = False) -> int:
+        """
+            Count the tokens of one text.
+
+            Args:
+                text (Optional[str]): The text to measure (None counts as empty).
+                model (Optional[str]): Model identifier selecting the tokenizer.
+                approximate (bool): Use the character ratio instead of tokenizing.
+
+            Returns:
+                int: The tokenized (exact or estimated, see `is_exact`) or approximate number of tokens.
+        """
+        text = text or ""
+        if approximate:
+            return self._approximate(text, model)
+        # encode_ordinary : les tokens spéciaux éventuels sont comptés comme du texte, sans vérification
+        return len(self.encoding_for(model).encode_ordinary(text))
+
+    def count_many(self, texts: list, model: Optional[str] = None, approximate: bool = False) -> list[int]:
+        """
+            Count the tokens of many texts in one batch.
+
+            Args:
+                texts (list): The texts to measure (None entries count as empty).
+                model (Optional[str]): Model identifier selecting the tokenizer.
+                approximate (bool): Use the character ratio instead of tokenizing.
+
+            Returns:
+                list[int]: One count per input text, in the same order.
+        """
+        texts = [text or "" for text in texts]
+        if approximate:
+            return [self._approximate(text, model) for text in texts]
+        if not texts:
+            return []
+        encoding = self.encoding_for(model)
+        if self.batch_threads > 1 and len(texts) > 1:
+            encoded = encoding.encode_ordinary_batch(texts, num_threads=self.batch_threads)
+            return [len(tokens) for tokens in encoded]
+        return [len(encoding.encode_ordinary(text)) for text in texts]
+
+    async def acount(self, text: Optional[str], model: Optional[str] = None, approximate: bool = False) -> int:
+        """Variante asynchrone de count() : les gros textes sont tokenisés hors de la boucle d'évènements."""
+        if approximate or len(text or "") < self.offload_chars:
+            return self.count(text, model, approximate)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.count, text, model)
+
+    async def acount_many(self, texts: list, model: Optional[str] = None, approximate: bool = False) -> list[int]:
+        """Variante asynchrone de count_many() avec le même seuil de délégation."""
+        if approximate or sum(len(text or "") for text in texts) < self.offload_chars:
+            return self.count_many(texts, model, approximate)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.count_many, texts, model)
+
+    def _approximate(self, text: str, model: Optional[str]) -> int:
+        return math.ceil(len(text) / self.spec_for(model).chars_per_token)
+
+
+tokenizer = TokenizerService(
+    offload_chars=settings.TOKENIZER_OFFLOAD_CHARS,
+    workers=settings.TOKENIZER_WORKERS,
+)
@@ -1,11 +1,26 @@
-from dataclasses import dataclass
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_client import http_clients
+from .cache import CachePolicy, cache_key, get_tool_cache
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class ToolResult:
-    """Résultat d'exécution d'un tool."""
+    """Résultat d'exécution d'un tool (ok=False si le tool a échoué ou dépassé son délai, cached=True si servi par le cache)."""
     tool_name: str
     content: str
+    ok: bool = True
+    latency_ms: Optional[float] = None
+    cached: bool = False
 
 
 class BaseTool:
@@ -13,11 +28,158 @@ class BaseTool:
     Classe de base pour tous les tools.
     Chaque tool fournit un name, une description (pour le LLM),
     un slash_command optionnel (ex: "meteo" pour /meteo),
+    un timeout optionnel (en secondes, TOOL_TIMEOUT par défaut),
+    une cache_policy optionnelle (ex: CachePolicy(ttl=600) pour réutiliser
+    un résultat 10 minutes, par argument normalisé),
+    des indices de détection pour le classifieur d'intention local
+    (keywords : expressions qui désignent sans ambiguïté le tool ; hints :
+    mots qui le suggèrent seulement ; argument_patterns : regex dont le
+    groupe nommé "arg" extrait l'argument du prompt ; argument_separator :
+    regex qui découpe un argument capturé en plusieurs, ex: "Paris et Lyon"),
     et une méthode execute() qui retourne un ToolResult.
+    Un tool capable de traiter plusieurs arguments en un seul appel amont
+    déclare batched = True et surcharge execute_many().
+    Les appels HTTP passent par le client mutualisé (self.http_client(url)).
     """
     name: str = ""
     description: str = ""
     slash_command: str = ""
+    timeout: Optional[float] = None
+    cache_policy: Optional[CachePolicy] = None
+    keywords: tuple[str, ...] = ()
+    hints: tuple[str, ...] = ()
+    argument_patterns: tuple[str, ...] = ()
+    argument_separator: str = ""
+    requires_argument: bool = False
+    batched: bool = False
+
+    @staticmethod
+    def http_client(url: str) -> httpx.AsyncClient:
+        """Retourne le client HTTP partagé (pool keep-alive) pour l'hôte de l'URL."""
+        return http_clients.get(url)
 
     async def execute(self, argument: str) -> ToolResult:
         raise NotImplementedError
+
+    async def execute_many(self, arguments: list[str]) -> list[ToolResult]:
+        """Exécute plusieurs arguments (un résultat par argument, dans l'ordre) ; à surcharger par les tools batched."""
+        return list(await asyncio.gather(*(self.execute(argument) for argument in arguments)))
+
+    async def run(self, argument: str) -> ToolResult:
+        """
+        Execute the tool within its timeout and never raise.
+
+        A tool exceeding its timeout is cancelled; a timeout or an unexpected
+        exception becomes a failed ToolResult, so that the other tools of the
+        same request still contribute their results. The measured latency is
+        recorded in every case.
+
+        With a `cache_policy`, successful results are reused for the same
+        normalized argument (see app.services.tools.cache); failed ones are not.
+
+        Args:
+            argument (str): The argument extracted for this tool.
+
+        Returns:
+            ToolResult: The tool's result, with `ok` and `latency_ms` filled in.
+        """
+        start = time.perf_counter()
+        if self.cache_policy is None:
+            result = await self._execute_within_timeout(argument)
+        else:
+            executed = []
+
+            async def load(arg: str) -> ToolResult:
+                executed.append(arg)
+                return await self._execute_within_timeout(arg)
+
+            shared = await self.cached(self.name, self.cache_policy, argument, load, lambda r: r.ok)
+            # Copie : l'instance en cache est partagée entre les appels
+            result = replace(shared, cached=not executed)
+        result.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        status = ("OK (cache)" if result.cached else "OK") if result.ok else "ÉCHEC"
+        logger.debug("Tool %s (%r) : %s en %s ms", self.name, argument, status, result.latency_ms)
+        return result
+
+    async def run_many(self, arguments: list[str]) -> list[ToolResult]:
+        """
+        Execute the tool for several arguments selected in the same turn.
+
+        Tools that are not `batched` simply run every argument concurrently
+        through `run()`. Batched tools look each argument up in their cache
+        first, then pass all the missing ones to a single `execute_many()`
+        call under one timeout; its successful results are cached per argument.
+
+        Args:
+            arguments (list[str]): The arguments extracted for this tool.
+
+        Returns:
+            list[ToolResult]: One result per argument, in the same order.
+        """
+        if not self.batched or len(arguments) < 2:
+            return list(await asyncio.gather(*(self.run(argument) for argument in arguments)))
+
+        start = time.perf_counter()
+        cache = get_tool_cache(self.name, self.cache_policy) if self.cache_policy and settings.TOOL_CACHE_ENABLED else None
+        by_key: dict[str, ToolResult] = {}
+        missing: dict[str, str] = {}
+        for argument in arguments:
+            key = cache_key(argument)
+            if key in by_key or key in missing:
+                continue
+            hit = cache.lookup(
+                key, refresh=lambda arg=argument: self._execute_within_timeout(arg), cacheable=lambda r: r.ok
+            ) if cache else None
+            if hit is not None:
+                by_key[key] = replace(hit, cached=True)
+            else:
+                missing[key] = argument
+
+        if missing:
+            fresh = await self._execute_many_within_timeout(list(missing.values()))
+            for key, result in zip(missing, fresh):
+                if cache and result.ok:
+                    cache.put(key, result)
+                by_key[key] = result
+
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        results = [replace(by_key[cache_key(argument)], latency_ms=latency_ms) for argument in arguments]
+        failed = sum(not r.ok for r in results)
+        logger.debug("Tool %s x%s (%s exécutés en un appel, %s en échec) en %s ms",
+                     self.name, len(arguments), len(missing), failed, latency_ms)
+        return results
+
+    @staticmethod
+    async def cached(name: str, policy: CachePolicy, argument: str, loader, cacheable=lambda value: value is not None):
+        """
+        Réutilise le résultat de loader(argument) selon la politique du cache `name`
+        (résultat du tool entier ou d'une de ses étapes, ex: le géocodage).
+        """
+        if not settings.TOOL_CACHE_ENABLED:
+            return await loader(argument)
+        return await get_tool_cache(name, policy).get_or_load(cache_key(argument), lambda: loader(argument), cacheable)
+
+    async def _execute_many_within_timeout(self, arguments: list[str]) -> list[ToolResult]:
+        """execute_many() borné par le timeout du tool ; en cas d'échec global, un ToolResult en échec par argument."""
+        timeout = self.timeout if self.timeout is not None else settings.TOOL_TIMEOUT
+        try:
+            results = await asyncio.wait_for(self.execute_many(arguments), timeout=timeout)
+            if len(results) != len(arguments):
+                raise ValueError(f"{len(results)} résultats pour {len(arguments)} arguments")
+            return results
+        except asyncio.TimeoutError:
+            error = f"Indisponible : délai de {timeout:g}s dépassé."
+        except Exception as e:
+            error = f"Indisponible : {type(e).__name__}: {e}"
+        return [ToolResult(self.name, error, ok=False) for _ in arguments]
+
+    async def _execute_within_timeout(self, argument: str) -> ToolResult:
+        """Exécute le tool borné par son timeout ; un dépassement ou une exception donne un ToolResult en échec."""
+        timeout = self.timeout if self.timeout is not None else settings.TOOL_TIMEOUT
+        try:
+            return await asyncio.wait_for(self.execute(argument), timeout=timeout)
+        except asyncio.TimeoutError:
+            return ToolResult(self.name, f"Indisponible : délai de {timeout:g}s dépassé.", ok=False)
+        except Exception as e:
+            return ToolResult(self.name, f"Indisponible : {type(e).__name__}: {e}", ok=False)
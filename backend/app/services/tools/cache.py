@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+        How long the results of a tool (or of one of its steps) stay valid.
+
+        Attributes:
+            ttl (Optional[float]): Freshness in seconds; None means the value never expires.
+            stale_ttl (float): Extra seconds during which an expired value is still
+                served while it is refreshed in the background (stale-while-revalidate).
+            max_entries (Optional[int]): Size bound, least recently used entries are
+                evicted first (TOOL_CACHE_MAX_ENTRIES by default).
+    """
+    ttl: Optional[float]
+    stale_ttl: float = 0.0
+    max_entries: Optional[int] = None
+
+
+def cache_key(argument: str) -> str:
+    """Clé normalisée d'un argument : "  PARIS ?" et "paris" partagent la même entrée."""
+    text = unicodedata.normalize("NFKC", argument).casefold()
+    return " ".join(text.split()).strip(" .,;:!?\"'")
+
+
+class TTLCache:
+    """
+        Bounded in-memory LRU cache with per-entry freshness and stale-while-revalidate.
+
+        Concurrent misses on the same key share a single load. A value past its
+        ttl but within its stale window is returned immediately while one
+        background load replaces it. Only values accepted by `cacheable` are
+        stored, so failures are retried on the next call.
+    """
+
+    def __init__(self, name: str, policy: CachePolicy):
+        self.name = name
+        self.policy = policy
+        self.max_entries = policy.max_entries or settings.TOOL_CACHE_MAX_ENTRIES
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._loads: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    async def get_or_load(
+            self,
+            key: str,
+            loader: Callable[[], Awaitable[Any]],
+            cacheable: Callable[[Any], bool] = lambda value: value is not None,
+    ) -> Any:
+        """
+            Return the cached value for `key`, loading (and storing) it if needed.
+
+            Args:
+                key (str): Normalized key (see `cache_key`).
+                loader (Callable[[], Awaitable[Any]]): Computes the value on a miss or a refresh.
+                cacheable (Callable[[Any], bool]): Whether a loaded value may be stored.
+
+            Returns:
+                Any: The fresh or stale cached value, or the freshly loaded one.
+        """
+        value = self.lookup(key, refresh=loader, cacheable=cacheable)
+        if value is not None:
+            return value
+
+        task = self._loads.get(key) or self._start_load(key, loader, cacheable)
+        # shield : un appelant annulé (timeout, requête abandonnée) n'interrompt pas le chargement partagé
+        return await asyncio.shield(task)
+
+    def lookup(
+            self,
+            key: str,
+            refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+            cacheable: Callable[[Any], bool] = lambda value: value is not None,
+    ) -> Any:
+        """
+            Return the cached value for `key` without loading it, or None on a miss.
+
+            A stale value is returned as well; if `refresh` is given, it is
+            reloaded in the background (at most one refresh per key at a time).
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if self.policy.ttl is None or age < self.policy.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            if age < self.policy.ttl + self.policy.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if refresh is not None and key not in self._loads:
+                    self.refreshes += 1
+                    self._start_load(key, refresh, cacheable, background=True)
+                return entry[1]
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        """Enregistre une valeur chargée hors de get_or_load (ex: exécution groupée de plusieurs arguments)."""
+        self._store(key, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.policy.ttl,
+            "stale_ttl": self.policy.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+        }
+
+    def _start_load(self, key: str, loader, cacheable, background: bool = False) -> asyncio.Task:
+        """Lance le chargement d'une clé (partagé par les appelants concurrents)."""
+        async def load():
+            try:
+                value = await loader()
+            except Exception as e:
+                if not background:
+                    raise
+                self.refresh_errors += 1
+                logger.warning("Rafraîchissement du cache %s (%r) en échec : %s", self.name, key, e)
+                return None
+            finally:
+                self._loads.pop(key, None)
+            if cacheable(value):
+                self._store(key, value)
+            elif background:
+                self.refresh_errors += 1
+            return value
+
+        task = asyncio.create_task(load())
+        # Échec d'un chargement dont tous les appelants sont partis : l'exception est consommée ici
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._loads[key] = task
+        return task
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Caches par nom ("get_weather", "get_weather.geocoding"...), créés au premier usage
+tool_caches: dict[str, TTLCache] = {}
+
+
+def get_tool_cache(name: str, policy: CachePolicy) -> TTLCache:
+    """Retourne le cache nommé, en le créant avec sa politique au premier appel."""
+    cache = tool_caches.get(name)
+    if cache is None:
+        cache = tool_caches[name] = TTLCache(name, policy)
+    return cache
+
+
+def tool_cache_stats() -> dict:
+    """Statistiques de chaque cache de tool."""
+    return {name: cache.stats() for name, cache in tool_caches.items()}
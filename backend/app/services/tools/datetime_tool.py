@@ -8,6 +8,12 @@ class DateTimeTool(BaseTool):
     name = "datetime"
     description = "Fournit la date et l'heure actuelles"
     slash_command = "heure"
+    timeout = 1.0
+    keywords = (
+        "quelle heure", "heure actuelle", "quel jour", "quelle date", "date du jour",
+        "date d aujourd hui", "what time", "current time", "what day", "today s date", "what date",
+    )
+    hints = ("heure", "date", "jour", "maintenant", "time", "today", "now")
 
     async def execute(self, argument: str) -> ToolResult:
         now = datetime.now(ZoneInfo("Europe/Paris"))
@@ -0,0 +1,168 @@
+import logging
+import mmap
+import re
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fichier livré avec l'application (reconstructible via python -m app.scripts.build_gazetteer)
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent / "data" / "cities.tsv"
+
+# Longueur minimale d'un préfixe pour résoudre une ville sans correspondance exacte
+MIN_PREFIX_LENGTH = 5
+# Nombre maximal de graphies d'une même ville examinées pour un préfixe
+MAX_PREFIX_VARIANTS = 8
+
+
+class City(NamedTuple):
+    name: str
+    country: str
+    latitude: float
+    longitude: float
+    population: int
+
+
+def normalize_name(name: str) -> str:
+    """Clé de recherche d'un nom de ville : "Saint-Étienne" -> "saint etienne"."""
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"\W+", " ", text).split())
+
+
+class Gazetteer:
+    """
+        Offline city index backed by a sorted, memory-mapped TSV file.
+
+        Each line is `key<TAB>name<TAB>country<TAB>latitude<TAB>longitude<TAB>population`,
+        where `key` is the normalized name (alternate names and exonyms such
+        as "londres" get their own line). Lines are sorted by key, then by
+        decreasing population, so the first match of an ambiguous name is
+        its largest city.
+
+        The file is opened on first use. Only an array of line offsets is
+        kept in memory; lookups binary-search the mapped file, so the OS
+        shares and pages the data as needed.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._mm: Optional[mmap.mmap] = None
+        self._offsets: Optional[array] = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, name: str) -> Optional[City]:
+        """
+            Resolve a city name offline.
+
+            Args:
+                name (str): The city as written by the user ("Paris", "  saint-étienne ").
+
+            Returns:
+                Optional[City]: The most populous city with this exact normalized name,
+                    else the only city whose name starts with it (at least
+                    MIN_PREFIX_LENGTH characters), else None.
+        """
+        key = normalize_name(name).encode("utf-8")
+        if not key or not self._load():
+            return None
+
+        index = self._lower_bound(key)
+        if index < len(self._offsets) and self._key_at(index) == key:
+            self.hits += 1
+            return self._city_at(index)
+
+        if len(key) >= MIN_PREFIX_LENGTH and index < len(self._offsets) and self._key_at(index).startswith(key):
+            # Préfixe non ambigu : toutes les lignes qui le partagent désignent la même ville
+            # ("marrak" -> "marrakech" et "marrakesh"), dans la limite de quelques variantes
+            first = self._city_at(index)
+            following = index + 1
+            while (
+                    following < len(self._offsets)
+                    and following - index <= MAX_PREFIX_VARIANTS
+                    and self._key_at(following).startswith(key)
+            ):
+                if self._city_at(following)[:2] != first[:2]:
+                    break
+                following += 1
+            else:
+                if following - index <= MAX_PREFIX_VARIANTS:
+                    self.hits += 1
+                    return first
+
+        self.misses += 1
+        return None
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> list[City]:
+        """Villes dont le nom normalisé commence par `prefix`, par ordre alphabétique puis de population."""
+        key = normalize_name(prefix).encode("utf-8")
+        if not key or not self._load():
+            return []
+        cities = []
+        index = self._lower_bound(key)
+        while index < len(self._offsets) and len(cities) < limit and self._key_at(index).startswith(key):
+            cities.append(self._city_at(index))
+            index += 1
+        return cities
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "loaded": self._mm is not None,
+            "entries": len(self._offsets) if self._offsets is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _load(self) -> bool:
+        """Ouvre et projette le fichier en mémoire au premier appel, puis indexe le début des lignes."""
+        if self._offsets is not None:
+            return self._mm is not None
+        self._offsets = array("I")
+        try:
+            with open(self.path, "rb") as gazetteer_file:
+                self._mm = mmap.mmap(gazetteer_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # Fichier absent ou vide : géocodage en ligne uniquement
+            logger.warning("Index géographique hors ligne indisponible (%s) : %s", self.path, e)
+            return False
+
+        position = 0
+        size = len(self._mm)
+        while position < size:
+            end = self._mm.find(b"\n", position)
+            end = size if end == -1 else end
+            if end > position and self._mm[position:position + 1] != b"#":
+                self._offsets.append(position)
+            position = end + 1
+        logger.debug("Index géographique chargé : %s noms (%s)", len(self._offsets), self.path.name)
+        return True
+
+    def _key_at(self, index: int) -> bytes:
+        start = self._offsets[index]
+        return self._mm[start:self._mm.find(b"\t", start)]
+
+    def _city_at(self, index: int) -> City:
+        start = self._offsets[index]
+        end = self._mm.find(b"\n", start)
+        fields = self._mm[start:end if end != -1 else len(self._mm)].decode("utf-8").split("\t")
+        return City(fields[1], fields[2], float(fields[3]), float(fields[4]), int(fields[5]))
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Première ligne dont la clé est >= key (recherche dichotomique dans le fichier projeté)."""
+        low, high = 0, len(self._offsets)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+gazetteer = Gazetteer(settings.GAZETTEER_PATH or DEFAULT_GAZETTEER_PATH)
@@ -1,40 +1,116 @@
-import httpx
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
 from .base import BaseTool, ToolResult
+from .cache import CachePolicy
+from .gazetteer import gazetteer
+
+# Nom de ville : mots capitalisés, éventuellement reliés par un article (ex: "Saint-Étienne", "Aix en Provence")
+_CITY = r"[A-ZÀ-Ý][\w'’-]*(?:[ -](?:(?:de|du|la|le|les|sur|en)[ -])?[A-ZÀ-Ý][\w'’-]*)*"
+# Liste de villes : "Paris et Lyon", "Lille, Metz et Nancy", "Berlin and Madrid"
+_SEPARATOR = r"\s*,\s*|\s+(?:et|and)\s+"
+_CITIES = rf"(?P<arg>{_CITY}(?:(?:{_SEPARATOR}){_CITY})*)"
 
 
 class WeatherTool(BaseTool):
     name = "get_weather"
     description = "Fournit la météo actuelle d'une ville. L'argument doit être un nom de ville."
     slash_command = "meteo"
+    # "pluie", "neige" ou "rain" apparaissent aussi dans des récits ou des poèmes : simples indices
+    keywords = (
+        "meteo", "quel temps", "temperature", "il pleut", "va pleuvoir", "previsions",
+        "weather", "forecast", "is it raining",
+    )
+    hints = (
+        "pluie", "neige", "rain", "snow", "parapluie", "soleil", "chaud", "froid", "vent", "degres",
+        "umbrella", "sunny", "cold", "hot", "wind",
+    )
+    argument_patterns = (
+        rf"\b(?:à|a|au|aux|in|at|for|pour|sur|vers|près de)\s+{_CITIES}",
+        rf"(?i:météo|meteo|weather)\s+(?:de\s+|d'|du\s+)?{_CITIES}",
+    )
+    argument_separator = _SEPARATOR
+    requires_argument = True
+    # Météo réutilisée 10 minutes (puis servie 5 minutes de plus pendant son rafraîchissement)
+    cache_policy = CachePolicy(ttl=600, stale_ttl=300)
+    # Les coordonnées d'une ville ne changent pas
+    geocoding_cache_policy = CachePolicy(ttl=None, max_entries=10000)
+    # Plusieurs villes d'un même tour : une seule requête de prévisions
+    batched = True
 
     async def execute(self, argument: str) -> ToolResult:
         """
         Fetches weather data for a given city.
         argument should be a city name (e.g. "Agadir", "Paris").
         """
-        try:
-            # 1. Geocoding (City name -> Lat/Long)
-            geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={argument}&count=1&language=en&format=json"
-            async with httpx.AsyncClient() as client:
-                geo_res = await client.get(geo_url)
-                geo_data = geo_res.json()
+        return (await self.execute_many([argument]))[0]
+
+    async def execute_many(self, arguments: list[str]) -> list[ToolResult]:
+        """
+        Fetches weather data for several cities with a single forecast request.
+
+        Cities are resolved by the offline gazetteer when possible, otherwise
+        by the (cached) Open-Meteo geocoding API; then one multi-coordinate
+        forecast request covers every city found.
+        """
+        locations = await asyncio.gather(*(self._locate(city) for city in arguments), return_exceptions=True)
 
-                if not geo_data.get("results"):
-                    return ToolResult(self.name, f"Could not find coordinates for {argument}.")
+        results: list[Optional[ToolResult]] = [None] * len(arguments)
+        found = []
+        for index, (city, location) in enumerate(zip(arguments, locations)):
+            if isinstance(location, Exception):
+                results[index] = ToolResult(self.name, f"Error fetching weather: {location}", ok=False)
+            elif not location:
+                # Échec (non mis en cache) : un géocodage manqué ponctuellement est retenté au prochain appel
+                results[index] = ToolResult(self.name, f"Could not find coordinates for {city}.", ok=False)
+            else:
+                found.append((index, location))
 
-                location = geo_data["results"][0]
-                lat, lon = location["latitude"], location["longitude"]
+        if found:
+            try:
+                forecasts = await self._forecast([location for _, location in found])
+                for (index, _), forecast in zip(found, forecasts):
+                    temp = forecast["current_weather"]["temperature"]
+                    wind = forecast["current_weather"]["windspeed"]
+                    content = f"The current weather in {arguments[index]} is {temp}°C with a wind speed of {wind} km/h."
+                    results[index] = ToolResult(self.name, content)
+            except Exception as e:
+                for index, _ in found:
+                    results[index] = ToolResult(self.name, f"Error fetching weather: {str(e)}", ok=False)
 
-                # 2. Weather Fetching
-                weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-                weather_res = await client.get(weather_url)
-                w_data = weather_res.json()
+        return results
 
-                temp = w_data["current_weather"]["temperature"]
-                wind = w_data["current_weather"]["windspeed"]
+    async def _locate(self, city: str) -> Optional[dict]:
+        """Coordonnées d'une ville : index hors ligne d'abord, géocodage Open-Meteo (mis en cache) sinon."""
+        if settings.GAZETTEER_ENABLED:
+            known = gazetteer.lookup(city)
+            if known:
+                return {"name": known.name, "latitude": known.latitude, "longitude": known.longitude}
+        return await self.cached(f"{self.name}.geocoding", self.geocoding_cache_policy, city, self._geocode)
 
-                content = f"The current weather in {argument} is {temp}°C with a wind speed of {wind} km/h."
-                return ToolResult(self.name, content)
+    async def _geocode(self, city: str) -> Optional[dict]:
+        """Premier résultat du géocodage Open-Meteo pour une ville (None si inconnue)."""
+        url = settings.OPEN_METEO_GEOCODING_URL
+        geo_res = await self.http_client(url).get(
+            url, params={"name": city, "count": 1, "language": "en", "format": "json"}
+        )
+        geo_res.raise_for_status()
+        results = geo_res.json().get("results")
+        return results[0] if results else None
 
-        except Exception as e:
-            return ToolResult(self.name, f"Error fetching weather: {str(e)}")
\ No newline at end of file
+    async def _forecast(self, locations: list[dict]) -> list[dict]:
+        """Météo actuelle de plusieurs coordonnées en une requête (Open-Meteo accepte des listes séparées par des virgules)."""
+        url = settings.OPEN_METEO_FORECAST_URL
+        weather_res = await self.http_client(url).get(url, params={
+            "latitude": ",".join(str(location["latitude"]) for location in locations),
+            "longitude": ",".join(str(location["longitude"]) for location in locations),
+            "current_weather": "true",
+        })
+        weather_res.raise_for_status()
+        data = weather_res.json()
+        # Une seule coordonnée : objet ; plusieurs : liste dans le même ordre
+        forecasts = data if isinstance(data, list) else [data]
+        if len(forecasts) != len(locations):
+            raise ValueError(f"{len(forecasts)} prévisions reçues pour {len(locations)} villes")
+        return forecasts
@@ -0,0 +1,66 @@
+"""
+Worker de la file des résumés, à lancer indépendamment de l'API.
+
+Usage (depuis backend/) :
+    python -m app.worker
+
+Chaque processus traite jusqu'à SUMMARY_WORKER_CONCURRENCY jobs en parallèle ;
+plusieurs processus (ou conteneurs) peuvent tourner côte à côte grâce à
+FOR UPDATE SKIP LOCKED.
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal, async_engine
+from app.services.agents.base import OPENROUTER_URL
+from app.services.agents.summary import SummaryAgent
+from app.services.http_client import http_clients
+from app.services.summary_jobs import claim_summary_job, run_summary_job
+
+
+async def worker_loop(index: int, summary_agent: SummaryAgent, stop: asyncio.Event):
+    """Réclame et exécute des jobs jusqu'à l'arrêt ; attend POLL_INTERVAL quand la file est vide."""
+    while not stop.is_set():
+        async with AsyncSessionLocal() as db:
+            try:
+                job = await claim_summary_job(db)
+                if job is not None:
+                    print(f"DEBUG: [worker {index}] Job {job.id} (tentative {job.attempts})")
+                    await run_summary_job(db, job, summary_agent)
+                    continue
+            except Exception as e:
+                print(f"ERROR: [worker {index}] Erreur inattendue : {e}")
+                await db.rollback()
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.SUMMARY_WORKER_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    summary_agent = SummaryAgent()
+    await http_clients.startup([OPENROUTER_URL])
+    print(f"DEBUG: Worker de résumés démarré ({settings.SUMMARY_WORKER_CONCURRENCY} tâches)")
+    try:
+        # Arrêt propre : chaque boucle termine son job en cours avant de sortir
+        await asyncio.gather(*(
+            worker_loop(index, summary_agent, stop)
+            for index in range(settings.SUMMARY_WORKER_CONCURRENCY)
+        ))
+    finally:
+        await http_clients.shutdown()
+        await async_engine.dispose()
+        print("DEBUG: Worker de résumés arrêté")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(levelname)s: %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import models  # noqa: F401 (enregistre les tables dans Base.metadata)
+from app.core.config import settings
+from app.database import Base, engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Schéma cible pour `alembic revision --autogenerate` et `alembic check`
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Génère le SQL des migrations sans connexion (alembic upgrade head --sql)."""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Applique les migrations avec le moteur synchrone de l'application."""
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,64 @@
+"""baseline: threads, messages and models as first created by create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00
+
+Les bases existantes ont été créées par Base.metadata.create_all au démarrage :
+les tables sont créées seulement si elles n'existent pas encore, une base déjà
+en service passe donc cette révision sans modification.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "threads",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("system_prompt", sa.Text(), nullable=True),
+        sa.Column("current_summary", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "messages",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("thread_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("threads.id"), nullable=True),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("model_name", sa.String(), nullable=True),
+        sa.Column("rating", sa.Integer(), nullable=True),
+        sa.Column("answer_of", postgresql.UUID(as_uuid=True), sa.ForeignKey("messages.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "models",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("label", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("is_free", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("models")
+    op.drop_table("messages")
+    op.drop_table("threads")
@@ -0,0 +1,101 @@
+"""summary state: token counts, summary versioning, job queue and memory segments
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 09:05:00
+
+Colonnes et tables ajoutées au modèle après la création initiale. create_all
+créait les nouvelles tables mais n'ajoutait jamais de colonne à une table
+existante : tout est idempotent (IF NOT EXISTS), quelle que soit la version
+du code qui a créé la base.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("messages", sa.Column("token_count", sa.Integer(), nullable=True), if_not_exists=True)
+
+    for counter in ("summary_version", "summary_writes", "summary_conflicts"):
+        op.add_column(
+            "threads",
+            sa.Column(counter, sa.Integer(), nullable=False, server_default="0"),
+            if_not_exists=True,
+        )
+    op.add_column("threads", sa.Column("summary_data", postgresql.JSONB(), nullable=True), if_not_exists=True)
+    op.add_column("threads", sa.Column("summary_memory", sa.Text(), nullable=True), if_not_exists=True)
+
+    op.create_table(
+        "summary_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "thread_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("threads.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("model_name", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("run_after", sa.DateTime(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "uq_summary_jobs_pending_thread",
+        "summary_jobs",
+        ["thread_id"],
+        unique=True,
+        postgresql_where=sa.text("status = 'pending'"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_summary_jobs_status_run_after", "summary_jobs", ["status", "run_after"], if_not_exists=True)
+
+    op.create_table(
+        "summary_segments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "thread_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("threads.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("level", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("messages_from", sa.DateTime(), nullable=False),
+        sa.Column("messages_until", sa.DateTime(), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("memory_line", sa.Text(), nullable=True),
+        sa.Column("token_count", sa.Integer(), nullable=True),
+        sa.Column("dirty", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("thread_id", "level", "position", name="uq_summary_segments_thread_level_position"),
+        if_not_exists=True,
+    )
+    # Table créée avant l'ajout de la ligne pré-rendue
+    op.add_column("summary_segments", sa.Column("memory_line", sa.Text(), nullable=True), if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("summary_segments")
+    op.drop_index("ix_summary_jobs_status_run_after", table_name="summary_jobs")
+    op.drop_index("uq_summary_jobs_pending_thread", table_name="summary_jobs")
+    op.drop_table("summary_jobs")
+    for column in ("summary_memory", "summary_data", "summary_conflicts", "summary_writes", "summary_version"):
+        op.drop_column("threads", column)
+    op.drop_column("messages", "token_count")
@@ -0,0 +1,42 @@
+"""hot path indexes: messages (thread_id, created_at), messages.answer_of, threads.created_at
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 09:10:00
+
+Sans ces index, l'historique d'un thread (get_messages, send_message, fenêtre
+de contexte), la recherche des réponses d'un message (delete_message) et la
+liste des threads parcourent la table entière. Les index sont créés en
+CONCURRENTLY, hors transaction, pour ne pas bloquer les écritures d'une base
+en service pendant leur construction.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_messages_thread_id_created_at", "messages", ["thread_id", "created_at"]),
+    ("ix_messages_answer_of", "messages", ["answer_of"]),
+    ("ix_threads_created_at", "threads", ["created_at"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,52 @@
+"""keyset pagination indexes: add id to the (created_at) keys of messages and threads
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 11:00:00
+
+Les pages de messages et de threads sont triées et découpées sur
+(created_at, id). Avec id en dernière colonne, l'index fournit cet ordre
+complet et la comparaison de ligne (created_at, id) < curseur devient un
+simple parcours d'index, sans tri ni filtre des ex æquo. Les nouveaux index
+sont construits (CONCURRENTLY) avant la suppression des anciens.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, ancien index, ancienne clé, nouvel index, nouvelle clé)
+REPLACEMENTS = (
+    (
+        "messages",
+        "ix_messages_thread_id_created_at", ["thread_id", "created_at"],
+        "ix_messages_thread_id_created_at_id", ["thread_id", "created_at", "id"],
+    ),
+    (
+        "threads",
+        "ix_threads_created_at", ["created_at"],
+        "ix_threads_created_at_id", ["created_at", "id"],
+    ),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for table, old_name, _, new_name, new_columns in REPLACEMENTS:
+            op.create_index(new_name, table, new_columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(old_name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table, old_name, old_columns, new_name, _ in REPLACEMENTS:
+            op.create_index(old_name, table, old_columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(new_name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,163 @@
+"""
+Disjoncteur par modèle : transitions closed / open / half_open et sonde half-open.
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_circuit_breaker.py
+"""
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.agents.base import BaseAgent
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breakers
+
+
+@pytest.fixture(autouse=True)
+def fast_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_MIN_CALLS", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "CIRCUIT_TIMEOUT_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_COOLDOWN", 0.0)
+    monkeypatch.setattr(settings, "TIMEOUTS", [1.0, 1.0, 1.0])
+    monkeypatch.setattr(settings, "RATE_LIMIT_MAX_RETRIES", 1)
+
+
+def half_open_breaker(model: str = "test/model") -> CircuitBreaker:
+    """Disjoncteur ouvert puis revenu en half-open (délai de refroidissement nul)."""
+    breaker = CircuitBreaker(model)
+    breaker.record_failure(TimeoutError(), timeout=True)
+    breaker.record_failure(TimeoutError(), timeout=True)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_opens_on_error_rate():
+    breaker = CircuitBreaker("test/model")
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.record_failure(RuntimeError("500"))
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+
+def test_open_rejects_until_cooldown(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_COOLDOWN", 60.0)
+    breaker = half_open_breaker()
+    assert breaker.allow() is False
+    assert breaker.rejected == 1
+    assert breaker.available() is False
+
+
+def test_single_probe_in_half_open():
+    breaker = half_open_breaker()
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    # Sonde déjà en cours : les autres appels sont refusés
+    assert breaker.allow() is False
+
+
+def test_probe_success_closes():
+    breaker = half_open_breaker()
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() is True
+
+
+def test_probe_failure_reopens():
+    breaker = half_open_breaker()
+    breaker.allow()
+    breaker.record_failure(RuntimeError("502"))
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+
+def test_released_probe_lets_next_call_probe():
+    breaker = half_open_breaker()
+    assert breaker.allow() is True
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+
+
+def test_probe_owner_keeps_its_right_to_retry(monkeypatch):
+    breaker = half_open_breaker()
+    assert breaker.allow() is True
+    assert breaker.allow(owns_probe=True) is True
+    assert breaker.rejected == 0
+    # Échec compté : le circuit se rouvre, même le détenteur de la sonde s'arrête
+    monkeypatch.setattr(settings, "CIRCUIT_COOLDOWN", 60.0)
+    breaker.record_failure(RuntimeError("502"))
+    assert breaker.allow(owns_probe=True) is False
+
+
+def test_release_probe_outside_half_open_is_noop():
+    breaker = CircuitBreaker("test/model")
+    breaker.release_probe()
+    assert breaker.state == CLOSED
+
+
+def probe_agent(monkeypatch, handler) -> tuple[BaseAgent, CircuitBreaker, str]:
+    """Agent dont les appels passent par `handler`, sur un modèle au disjoncteur half-open."""
+    model = f"test/{uuid.uuid4().hex[:8]}"
+    breaker = circuit_breakers.get(model)
+    breaker.record_failure(TimeoutError(), timeout=True)
+    breaker.record_failure(TimeoutError(), timeout=True)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(BaseAgent, "client", property(lambda self: client))
+    return BaseAgent(), breaker, model
+
+
+def test_probe_released_after_repeated_429(monkeypatch):
+    def handler(request):
+        return httpx.Response(429, headers={"retry-after": "0"})
+
+    agent, breaker, model = probe_agent(monkeypatch, handler)
+    assert asyncio.run(agent._call_llm([{"role": "user", "content": "ping"}], model)) is None
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+
+
+def test_probe_released_after_uncounted_4xx(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    agent, breaker, model = probe_agent(monkeypatch, handler)
+    answer = asyncio.run(agent._call_llm([{"role": "user", "content": "ping"}], model))
+    assert answer.startswith("Erreur :")
+    # Le détenteur de la sonde n'est pas refusé par son propre disjoncteur
+    assert len(calls) == len(settings.TIMEOUTS)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+
+
+def test_stream_probe_released_after_repeated_429(monkeypatch):
+    def handler(request):
+        return httpx.Response(429, headers={"retry-after": "0"})
+
+    agent, breaker, model = probe_agent(monkeypatch, handler)
+
+    async def consume():
+        return [delta async for delta in agent._stream_llm([{"role": "user", "content": "ping"}], model)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(consume())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+
+
+def test_probe_5xx_reopens(monkeypatch):
+    def handler(request):
+        return httpx.Response(503)
+
+    agent, breaker, model = probe_agent(monkeypatch, handler)
+    monkeypatch.setattr(settings, "CIRCUIT_COOLDOWN", 60.0)
+    with pytest.raises(Exception):
+        asyncio.run(agent._call_llm([{"role": "user", "content": "ping"}], model))
+    assert breaker.state == OPEN
@@ -0,0 +1,46 @@
+"""
+Fenêtre de contexte : la requête SQL (select_context_window) et le calcul en Python
+(get_optimized_context) coupent l'historique au même endroit.
+
+Usage (depuis backend/, Postgres joignable via DATABASE_URL) :
+    python -m pytest tests/test_context_window.py
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.core.config import settings
+from app.services import token_manager
+from app.services.token_manager import get_optimized_context, select_context_window
+from test_summary_job_lease import with_schema
+
+
+@pytest.mark.parametrize("budget", [9, 10, 11, 20, 30, 31])
+def test_sql_and_python_windows_agree(monkeypatch, budget):
+    monkeypatch.setattr(settings, "MAX_WINDOW_SIZE", budget)
+    # Résumé vide : aucun token (et pas de chargement d'encodage)
+    monkeypatch.setattr(token_manager, "count_tokens", lambda text: 0)
+
+    async def scenario(sessions):
+        async with sessions() as db:
+            thread = models.Thread(title="window", system_prompt="", current_summary="")
+            db.add(thread)
+            await db.flush()
+            start = datetime.utcnow()
+            messages = [
+                models.Message(
+                    thread_id=thread.id, role="user", content=f"message {index}",
+                    token_count=10, created_at=start + timedelta(seconds=index),
+                )
+                for index in range(3)
+            ]
+            db.add_all(messages)
+            await db.commit()
+
+            selected = await select_context_window(db, thread.id, budget)
+            kept, _ = get_optimized_context("", messages)
+            assert [m.id for m in selected] == [m.id for m in kept]
+
+    asyncio.run(with_schema(scenario))
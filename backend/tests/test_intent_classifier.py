@@ -0,0 +1,61 @@
+"""
+Classifieur d'intention local : décisions prises seul, décisions laissées au routeur LLM.
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_intent_classifier.py
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.intent_classifier import IntentClassifier
+from app.services.tools.datetime_tool import DateTimeTool
+from app.services.tools.weather_tool import WeatherTool
+
+
+@pytest.fixture
+def classifier() -> IntentClassifier:
+    classifier = IntentClassifier()
+    classifier.register(WeatherTool())
+    classifier.register(DateTimeTool())
+    return classifier
+
+
+def decide(classifier, prompt):
+    return classifier.decide(prompt, threshold=settings.INTENT_CONFIDENCE_THRESHOLD)[0]
+
+
+@pytest.mark.parametrize("prompt", [
+    "Explique-moi la physique quantique",
+    "Est-ce qu'il fait beau à Paris demain ?",
+    "Combien de degrés à Rome ?",
+])
+def test_prompt_without_cue_goes_to_the_router(classifier, prompt):
+    # Aucune règle ne s'applique : ce n'est pas la preuve qu'aucun tool n'est nécessaire
+    assert decide(classifier, prompt) is None
+
+
+def test_narrative_mention_is_not_a_weather_request(classifier):
+    decision = classifier.classify("Raconte-moi l'histoire de la neige à Grenoble en 1968")
+    assert decision.confidence < settings.INTENT_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("prompt, cities", [
+    ("Météo à Paris et Lyon", ["Paris", "Lyon"]),
+    ("Quel temps fait-il à Lille, Metz et Nancy ?", ["Lille", "Metz", "Nancy"]),
+    ("Weather in Berlin and Madrid", ["Berlin", "Madrid"]),
+    ("Météo à Paris et à Lyon", ["Paris", "Lyon"]),
+    ("Quelle est la température à Saint-Étienne ?", ["Saint-Étienne"]),
+    ("Météo Aix en Provence", ["Aix en Provence"]),
+])
+def test_city_lists_are_split(classifier, prompt, cities):
+    assert decide(classifier, prompt) == [("get_weather", city) for city in cities]
+
+
+def test_keyword_with_argument_is_decided_locally(classifier):
+    assert decide(classifier, "Quelle heure est-il et quel temps fait-il à Marseille ?") == [
+        ("get_weather", "Marseille"), ("datetime", ""),
+    ]
+
+
+def test_missing_argument_goes_to_the_router(classifier):
+    assert decide(classifier, "Quel temps fait-il ?") is None
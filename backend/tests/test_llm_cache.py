@@ -0,0 +1,117 @@
+"""
+Cache des réponses LLM : éviction LRU, expiration (TTL) et réponses jamais mises en cache.
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_llm_cache.py
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.agents import base
+from app.services.agents.base import BaseAgent
+from app.services.llm_cache import LLMCache, MemoryCacheBackend, SQLiteCacheBackend, make_cache_key
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    """Fabrique de backend (mémoire ou SQLite) de capacité donnée."""
+    def factory(max_entries: int):
+        if request.param == "sqlite":
+            return SQLiteCacheBackend(str(tmp_path / "llm_cache.sqlite3"), max_entries)
+        return MemoryCacheBackend(max_entries)
+    return factory
+
+
+def test_least_recently_used_entry_is_evicted(make_backend, monkeypatch):
+    backend = make_backend(2)
+    clock = iter(range(1000, 2000))
+    # Horloge strictement croissante : last_access distinct pour chaque accès SQLite
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+    backend.set("a", "A", ttl=60)
+    backend.set("b", "B", ttl=60)
+    assert backend.get("a") == "A"
+    backend.set("c", "C", ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "A"
+    assert backend.get("c") == "C"
+    assert len(backend) == 2
+
+
+def test_expired_entry_is_dropped(make_backend, monkeypatch):
+    backend = make_backend(10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    backend.set("a", "A", ttl=5)
+    assert backend.get("a") == "A"
+
+    monkeypatch.setattr(time, "time", lambda: now + 6)
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_set_replaces_value_and_ttl(make_backend):
+    backend = make_backend(10)
+    backend.set("a", "old", ttl=-1)
+    backend.set("a", "new", ttl=60)
+    assert backend.get("a") == "new"
+    assert len(backend) == 1
+
+
+def test_cache_key_is_stable():
+    messages = [{"role": "user", "content": "Bonjour"}]
+    assert make_cache_key("m", messages) == make_cache_key("m", [{"content": "Bonjour", "role": "user"}])
+    assert make_cache_key("m", messages) != make_cache_key("other", messages)
+    assert make_cache_key("m", messages) != make_cache_key("m", [{"role": "user", "content": "Bonjour !"}])
+
+
+def test_hit_and_miss_counters():
+    async def scenario():
+        cache = LLMCache(MemoryCacheBackend(10))
+        await cache.set("k", "v", ttl=60)
+        assert await cache.get("k", namespace="RouterAgent") == "v"
+        assert await cache.get("absent", namespace="RouterAgent") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["by_agent"]["RouterAgent"] == {"hits": 1, "misses": 1}
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("content, cacheable", [
+    ("Paris", True),
+    ("Erreur : ReadTimeout", False),
+    ("", False),
+    ("   ", False),
+    (None, False),
+])
+def test_is_cacheable(content, cacheable):
+    assert BaseAgent._is_cacheable(content) is cacheable
+
+
+def test_error_reply_is_not_stored(monkeypatch):
+    class CachedAgent(BaseAgent):
+        cache_ttl = 60
+
+    replies = iter(["Erreur : ReadTimeout", "Paris"])
+
+    async def fake_request(self, messages, model, priority):
+        return next(replies)
+
+    cache = LLMCache(MemoryCacheBackend(10))
+    monkeypatch.setattr(base, "llm_cache", cache)
+    monkeypatch.setattr(CachedAgent, "_request_llm", fake_request)
+    messages = [{"role": "user", "content": "Capitale de la France ?"}]
+
+    async def scenario():
+        agent = CachedAgent()
+        assert await agent._call_llm(messages, "m") == "Erreur : ReadTimeout"
+        assert len(cache.backend) == 0
+        # L'erreur n'a pas été mémorisée : le second appel repart vers le modèle
+        assert await agent._call_llm(messages, "m") == "Paris"
+        assert await agent._call_llm(messages, "m") == "Paris"
+        assert cache.stats()["hits"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+"""
+Pagination par curseur (keyset) : encodage du curseur, détection de la page suivante
+et parcours complet d'un historique.
+
+Usage (depuis backend/, Postgres joignable via DATABASE_URL pour le parcours) :
+    python -m pytest tests/test_pagination.py
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, split_page
+from test_summary_job_lease import with_schema
+
+
+def test_cursor_round_trip():
+    created_at, row_id = datetime(2024, 5, 17, 9, 30, 12, 345678), uuid.uuid4()
+    cursor = encode_cursor(created_at, row_id)
+    # Opaque et sûr dans une URL : pas de remplissage ni de caractère réservé
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["pas-un-curseur", "@@@", encode_cursor(datetime(2024, 1, 1), uuid.uuid4())[:-6], ""])
+def test_garbage_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def rows(count: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [SimpleNamespace(id=uuid.uuid4(), created_at=start - timedelta(seconds=i)) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [0, 2, 3])
+def test_no_next_cursor_without_extra_row(count):
+    page = rows(count)
+    assert split_page(page, 3) == (page, None)
+
+
+def test_extra_row_yields_cursor_of_last_kept_row():
+    page = rows(4)
+    kept, next_cursor = split_page(page, 3)
+    assert kept == page[:3]
+    # Le curseur désigne la dernière ligne servie, pas la ligne en trop
+    assert decode_cursor(next_cursor) == (page[2].created_at, page[2].id)
+
+
+def test_keyset_page_selects_one_extra_row():
+    query = keyset_page(select(models.Message), models.Message, 20)
+    assert query._limit_clause.value == 21
+
+
+def test_pages_cover_history_without_gap_or_duplicate():
+    async def scenario(sessions):
+        async with sessions() as db:
+            thread = models.Thread(title="pages", system_prompt="", current_summary="")
+            db.add(thread)
+            await db.flush()
+            start = datetime.utcnow()
+            # Horodatages en double : l'id départage les ex aequo
+            db.add_all(
+                models.Message(
+                    thread_id=thread.id, role="user", content=f"message {index}",
+                    token_count=1, created_at=start + timedelta(seconds=index // 2),
+                )
+                for index in range(7)
+            )
+            await db.commit()
+
+            base = select(models.Message).where(models.Message.thread_id == thread.id)
+            expected = (await db.execute(
+                base.order_by(models.Message.created_at.desc(), models.Message.id.desc())
+            )).scalars().all()
+
+            seen, cursor, pages = [], None, 0
+            while True:
+                result = await db.execute(keyset_page(base, models.Message, 3, cursor))
+                page, cursor = split_page(result.scalars().all(), 3)
+                seen.extend(page)
+                pages += 1
+                if cursor is None:
+                    break
+            assert [m.id for m in seen] == [m.id for m in expected]
+            assert pages == 3
+
+    asyncio.run(with_schema(scenario))
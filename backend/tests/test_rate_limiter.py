@@ -0,0 +1,209 @@
+"""
+Limiteur de débit par modèle : lecture des en-têtes du fournisseur, pause du seau et ordre de service.
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_rate_limiter.py
+"""
+import asyncio
+import time
+import uuid
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.agents import base
+from app.services.agents.base import BaseAgent
+from app.services.llm_scheduler import BACKGROUND, INTERACTIVE, ROUTER, LLMScheduler
+from app.services.rate_limiter import ModelRateLimiter, rate_limiters
+
+
+def make_limiter(rate: float = 100.0, burst: int = 5, max_concurrency: int = 8) -> ModelRateLimiter:
+    return ModelRateLimiter(model="test/model", rate=rate, burst=burst, max_concurrency=max_concurrency)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0),
+    ("1.5", 1.5),
+    ("-2", 0.0),
+    ("", None),
+    (None, None),
+    ("bientôt", None),
+])
+def test_retry_after_seconds(value, expected):
+    assert ModelRateLimiter._retry_after(value) == expected
+
+
+def test_retry_after_http_date():
+    delay = ModelRateLimiter._retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 28 <= delay <= 30
+    # Date déjà passée : pas d'attente négative
+    assert ModelRateLimiter._retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
+
+
+def test_429_pauses_for_retry_after():
+    limiter = make_limiter()
+    assert limiter.update_from_response(429, {"retry-after": "2"}) == 2.0
+    assert limiter.throttled == 1
+    assert 1.9 <= limiter.stats()["blocked_for"] <= 2.0
+
+
+def test_429_without_header_uses_default_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_DEFAULT_BACKOFF", 4.0)
+    limiter = make_limiter()
+    assert limiter.update_from_response(429, {}) == 4.0
+
+
+def test_pause_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_MAX_BACKOFF", 10.0)
+    limiter = make_limiter()
+    assert limiter.update_from_response(429, {"retry-after": "3600"}) == 10.0
+
+
+def test_ratelimit_reset_when_quota_exhausted():
+    limiter = make_limiter()
+    reset_ms = str(int((time.time() + 5) * 1000))
+    delay = limiter.update_from_response(200, {"x-ratelimit-remaining": "0", "x-ratelimit-reset": reset_ms})
+    assert 4 <= delay <= 5
+    # Réponse acceptée : ce n'est pas un 429
+    assert limiter.throttled == 0
+
+
+def test_ratelimit_remaining_caps_tokens():
+    limiter = make_limiter(burst=5)
+    reset_ms = str(int((time.time() + 60) * 1000))
+    assert limiter.update_from_response(200, {"x-ratelimit-remaining": "2", "x-ratelimit-reset": reset_ms}) is None
+    assert limiter._tokens == 2
+
+
+def test_retry_after_wins_over_ratelimit_reset():
+    limiter = make_limiter()
+    reset_ms = str(int((time.time() + 30) * 1000))
+    headers = {"retry-after": "1", "x-ratelimit-remaining": "0", "x-ratelimit-reset": reset_ms}
+    assert limiter.update_from_response(429, headers) == 1.0
+
+
+def test_malformed_ratelimit_headers_are_ignored():
+    limiter = make_limiter()
+    assert limiter.update_from_response(200, {"x-ratelimit-remaining": "n/a", "x-ratelimit-reset": "demain"}) is None
+
+
+def test_queued_callers_wait_for_the_pause():
+    async def scenario():
+        limiter = make_limiter()
+        limiter.update_from_response(429, {"retry-after": "0.3"})
+        start = time.monotonic()
+
+        async def call():
+            async with limiter.acquire():
+                return time.monotonic() - start
+
+        waits = await asyncio.gather(*(call() for _ in range(3)))
+        # Une seule pause partagée, pas une par appelant
+        assert all(0.28 <= wait < 0.5 for wait in waits)
+        assert limiter.throttled == 1
+
+    asyncio.run(scenario())
+
+
+def test_bucket_spaces_calls_beyond_burst():
+    async def scenario():
+        limiter = make_limiter(rate=10.0, burst=2)
+        start = time.monotonic()
+
+        async def call():
+            async with limiter.acquire():
+                return time.monotonic() - start
+
+        waits = sorted(await asyncio.gather(*(call() for _ in range(4))))
+        # Deux appels immédiats (rafale), puis un jeton toutes les 100 ms
+        assert waits[1] < 0.05
+        assert 0.08 <= waits[2] < 0.2
+        assert 0.18 <= waits[3] < 0.3
+
+    asyncio.run(scenario())
+
+
+def test_interactive_call_overtakes_queued_background_calls():
+    async def scenario():
+        limiter = make_limiter(rate=2.0, burst=1)
+        served = []
+
+        async def call(name, priority):
+            async with limiter.acquire(priority):
+                served.append(name)
+
+        tasks = [asyncio.create_task(call(f"background-{i}", BACKGROUND)) for i in range(4)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(call("chat", INTERACTIVE)))
+        await asyncio.gather(*tasks)
+        # Le premier appel de fond a pris le seul jeton ; la conversation passe avant les trois autres
+        assert served == ["background-0", "chat", "background-1", "background-2", "background-3"]
+
+    asyncio.run(scenario())
+
+
+def test_long_wait_ages_into_higher_priority():
+    async def scenario():
+        limiter = make_limiter(rate=20.0, burst=1)
+        limiter.aging_seconds = 0.05
+        served = []
+
+        async def call(name, priority):
+            async with limiter.acquire(priority):
+                served.append(name)
+
+        first = asyncio.create_task(call("first", INTERACTIVE))
+        old = asyncio.create_task(call("background", BACKGROUND))
+        # Deux niveaux gagnés en 0.1 s d'attente : l'appel de fond passe devant un appel router récent
+        await asyncio.sleep(0.12)
+        recent = asyncio.create_task(call("router", ROUTER))
+        await asyncio.gather(first, old, recent)
+        assert served == ["first", "background", "router"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = make_limiter(rate=10.0, burst=1)
+        async with limiter.acquire():
+            pass
+        head = asyncio.create_task(limiter.acquire(INTERACTIVE).__aenter__())
+        behind = asyncio.create_task(limiter.acquire(BACKGROUND).__aenter__())
+        await asyncio.sleep(0.01)
+        head.cancel()
+        await asyncio.gather(head, return_exceptions=True)
+        # L'attente suivante devient tête de file et obtient le prochain jeton
+        await asyncio.wait_for(behind, timeout=0.5)
+        assert limiter.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_throttled_model_does_not_hold_scheduler_slots(monkeypatch):
+    scheduler = LLMScheduler(max_concurrency=1, class_limits={INTERACTIVE: 1, ROUTER: 1, BACKGROUND: 1}, aging_seconds=10.0)
+    monkeypatch.setattr(base, "llm_scheduler", scheduler)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+    ))
+    monkeypatch.setattr(BaseAgent, "client", property(lambda self: client))
+    paused, free = f"test/{uuid.uuid4().hex[:8]}", f"test/{uuid.uuid4().hex[:8]}"
+
+    async def scenario():
+        rate_limiters.get(paused).update_from_response(429, {"retry-after": "0.5"})
+        agent = BaseAgent()
+        start = time.monotonic()
+
+        async def timed(model):
+            await agent._request_llm([{"role": "user", "content": model}], model, BACKGROUND)
+            return time.monotonic() - start
+
+        slow = asyncio.create_task(timed(paused))
+        await asyncio.sleep(0.01)
+        # Le seul créneau de l'ordonnanceur n'est pas retenu pendant la pause de l'autre modèle
+        assert await timed(free) < 0.2
+        assert await slow >= 0.45
+
+    asyncio.run(scenario())
@@ -0,0 +1,143 @@
+"""
+Fusion des appels identiques simultanés (singleflight) : partage du résultat et annulation.
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_singleflight.py
+"""
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "réponse"
+
+        results = await asyncio.gather(*(flights.do("k", upstream) for _ in range(5)))
+        assert results == ["réponse"] * 5
+        assert len(calls) == 1
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "abandoned": 0}
+
+    asyncio.run(scenario())
+
+
+def test_distinct_keys_are_not_merged():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def upstream(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        assert await asyncio.gather(flights.do("a", lambda: upstream(1)), flights.do("b", lambda: upstream(2))) == [1, 2]
+        assert flights.leaders == 2
+
+    asyncio.run(scenario())
+
+
+def test_exception_is_shared():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("panne")
+
+        results = await asyncio.gather(*(flights.do("k", upstream) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flights.leaders == 1
+
+    asyncio.run(scenario())
+
+
+def test_finished_call_is_not_reused():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            return len(calls)
+
+        assert await flights.do("k", upstream) == 1
+        assert await flights.do("k", upstream) == 2
+
+    asyncio.run(scenario())
+
+
+def test_one_waiter_leaving_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def upstream():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "réponse"
+
+        leaver = asyncio.create_task(flights.do("k", upstream))
+        stayer = asyncio.create_task(flights.do("k", upstream))
+        await started.wait()
+        leaver.cancel()
+
+        assert await stayer == "réponse"
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        assert flights.abandoned == 0
+
+    asyncio.run(scenario())
+
+
+def test_upstream_cancelled_when_last_waiter_leaves():
+    async def scenario():
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.create_task(flights.do("k", upstream)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert flights.abandoned == 1
+        assert flights.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_new_call_after_abandon_starts_fresh():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        first = asyncio.create_task(flights.do("k", upstream))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+
+        assert await flights.do("k", upstream) == 2
+
+    asyncio.run(scenario())
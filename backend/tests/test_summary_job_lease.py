@@ -0,0 +1,106 @@
+"""
+Bail des jobs de résumé : un job en cours d'exécution ne doit pas être réclamé une seconde fois.
+
+Usage (depuis backend/, Postgres joignable via DATABASE_URL) :
+    python -m pytest tests
+
+Les tables sont créées dans un schéma temporaire, supprimé à la fin ; le test est ignoré
+si la base n'est pas joignable.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.core.config import settings
+from app.database import Base
+from app.services import summary_jobs
+
+
+async def with_schema(scenario):
+    """Exécute `scenario(sessions)` sur un schéma Postgres jetable."""
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    engine = create_async_engine(
+        make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+            await conn.run_sync(Base.metadata.create_all)
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Postgres indisponible : {e}")
+    try:
+        await scenario(async_sessionmaker(engine, expire_on_commit=False, autoflush=False))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await engine.dispose()
+
+
+async def claim_new_job(sessions):
+    """Thread + job en attente, réclamé par un premier worker."""
+    async with sessions() as db:
+        thread = models.Thread(title="lease", system_prompt="", current_summary="")
+        db.add(thread)
+        await db.flush()
+        await summary_jobs.enqueue_summary_job(db, thread.id, "model")
+        await db.commit()
+    db = sessions()
+    return db, await summary_jobs.claim_summary_job(db)
+
+
+def test_running_job_is_not_claimed_twice(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_JOB_LEASE", 0.6)
+    monkeypatch.setattr(settings, "SUMMARY_JOB_HEARTBEAT", 0.1)
+
+    async def scenario(sessions):
+        second_claims = []
+
+        async def slow_refresh(db, thread, model_name, summary_agent):
+            # Rafraîchissement bien plus long que le bail : un second worker tente sa chance en cours de route
+            for _ in range(4):
+                await asyncio.sleep(0.4)
+                async with sessions() as other:
+                    second_claims.append(await summary_jobs.claim_summary_job(other))
+            return None
+
+        monkeypatch.setattr(summary_jobs, "refresh_summary_segments", slow_refresh)
+        db, job = await claim_new_job(sessions)
+        assert job is not None
+        async with db:
+            await summary_jobs.run_summary_job(db, job, summary_agent=None)
+
+        assert second_claims == [None] * 4
+        async with sessions() as db:
+            # Job terminé : supprimé de la file
+            assert await db.get(models.SummaryJob, job.id) is None
+
+    asyncio.run(with_schema(scenario))
+
+
+def test_abandoned_job_is_claimed_again(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_JOB_LEASE", 0.6)
+
+    async def scenario(sessions):
+        db, job = await claim_new_job(sessions)
+        await db.close()
+        # Worker arrêté : plus aucun battement, le bail expire
+        async with sessions() as other:
+            await other.execute(
+                update(models.SummaryJob)
+                .where(models.SummaryJob.id == job.id)
+                .values(locked_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await other.commit()
+            reclaimed = await summary_jobs.claim_summary_job(other)
+            assert reclaimed is not None and reclaimed.id == job.id
+            assert reclaimed.attempts == 2
+
+    asyncio.run(with_schema(scenario))
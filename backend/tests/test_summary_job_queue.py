@@ -0,0 +1,93 @@
+"""
+File des jobs de résumé : fusion d'un job replanifié après échec dans le job en attente du thread.
+
+Usage (depuis backend/, Postgres joignable via DATABASE_URL) :
+    python -m pytest tests/test_summary_job_queue.py
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import models
+from app.services import summary_jobs
+from test_summary_job_lease import with_schema
+
+
+async def pending_job(db, thread_id) -> models.SummaryJob:
+    return await db.scalar(
+        select(models.SummaryJob)
+        .where(models.SummaryJob.thread_id == thread_id, models.SummaryJob.status == summary_jobs.PENDING)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def new_thread(db) -> models.Thread:
+    thread = models.Thread(title="queue", system_prompt="", current_summary="")
+    db.add(thread)
+    await db.flush()
+    return thread
+
+
+def test_retry_merged_into_pending_job_keeps_backoff_and_attempts():
+    async def scenario(sessions):
+        async with sessions() as db:
+            thread = await new_thread(db)
+            # Nouveau message pendant que le job précédent tournait : un job neuf attend déjà
+            await summary_jobs.enqueue_summary_job(db, thread.id, "new-model")
+            await db.commit()
+
+            retry_at = datetime.utcnow() + timedelta(seconds=60)
+            await summary_jobs.enqueue_summary_job(
+                db, thread.id, "old-model", run_after=retry_at, attempts=2, last_error="boom"
+            )
+            await db.commit()
+
+            job = await pending_job(db, thread.id)
+            assert job.attempts == 2
+            assert abs((job.run_after - retry_at).total_seconds()) < 1
+            assert job.last_error == "boom"
+            # La demande la plus récente garde son modèle
+            assert job.model_name == "new-model"
+
+    asyncio.run(with_schema(scenario))
+
+
+def test_new_request_does_not_reset_a_backed_off_job():
+    async def scenario(sessions):
+        async with sessions() as db:
+            thread = await new_thread(db)
+            retry_at = datetime.utcnow() + timedelta(seconds=60)
+            await summary_jobs.enqueue_summary_job(
+                db, thread.id, "old-model", run_after=retry_at, attempts=1, last_error="boom"
+            )
+            await db.commit()
+
+            await summary_jobs.enqueue_summary_job(db, thread.id, "new-model")
+            await db.commit()
+
+            job = await pending_job(db, thread.id)
+            assert job.attempts == 1
+            assert abs((job.run_after - retry_at).total_seconds()) < 1
+            assert job.last_error == "boom"
+            assert job.model_name == "new-model"
+
+    asyncio.run(with_schema(scenario))
+
+
+def test_new_request_keeps_the_pending_job_place_in_the_queue():
+    async def scenario(sessions):
+        async with sessions() as db:
+            thread = await new_thread(db)
+            queued_at = datetime.utcnow() - timedelta(seconds=30)
+            await summary_jobs.enqueue_summary_job(db, thread.id, "model", run_after=queued_at)
+            await db.commit()
+
+            await summary_jobs.enqueue_summary_job(db, thread.id, "model")
+            await db.commit()
+
+            job = await pending_job(db, thread.id)
+            assert job.attempts == 0
+            assert abs((job.run_after - queued_at).total_seconds()) < 1
+
+    asyncio.run(with_schema(scenario))
@@ -0,0 +1,30 @@
+"""
+Registre des tokenizers : choix de l'encodage par famille et nature du compte (exact ou estimé).
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_tokenizer.py
+"""
+import pytest
+
+from app.services.tokenizer import DEFAULT_SPEC, tokenizer
+
+
+@pytest.mark.parametrize("model, encoding, exact", [
+    ("openai/gpt-4o-mini", "o200k_base", True),
+    ("openai/gpt-4-turbo", "cl100k_base", True),
+    ("openai/gpt-3.5-turbo", "cl100k_base", True),
+    ("mistralai/mistral-small-3.2-24b-instruct:free", "o200k_base", False),
+    ("anthropic/claude-3.5-sonnet", "o200k_base", False),
+    ("unknown/model", DEFAULT_SPEC.encoding, False),
+    (None, DEFAULT_SPEC.encoding, False),
+])
+def test_spec_for_model_family(model, encoding, exact):
+    assert tokenizer.spec_for(model).encoding == encoding
+    assert tokenizer.is_exact(model) is exact
+
+
+def test_approximate_uses_family_ratio():
+    text = "x" * 35
+    assert tokenizer.count(text, "mistralai/mistral-7b", approximate=True) == 10
+    assert tokenizer.count(text, "openai/gpt-4o", approximate=True) == 9
+    assert tokenizer.count_many([None, ""], approximate=True) == [0, 0]
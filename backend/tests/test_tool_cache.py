@@ -0,0 +1,130 @@
+"""
+Cache des tools : normalisation des clés, fraîcheur (TTL) et stale-while-revalidate.
+
+Usage (depuis backend/) :
+    python -m pytest tests/test_tool_cache.py
+"""
+import asyncio
+
+import pytest
+
+from app.services.tools.cache import CachePolicy, TTLCache, cache_key
+
+
+@pytest.mark.parametrize("argument, key", [
+    ("Paris", "paris"),
+    ("  PARIS ?", "paris"),
+    ("Saint   Étienne!", "saint étienne"),
+    ("ＰＡＲＩＳ", "paris"),
+    ("\"Lyon\".", "lyon"),
+])
+def test_cache_key_normalisation(argument, key):
+    assert cache_key(argument) == key
+
+
+class Loader:
+    """Chargeur qui compte ses appels et renvoie "v1", "v2"…"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("amont indisponible")
+        return f"v{self.calls}"
+
+
+def test_fresh_value_is_reused():
+    async def scenario():
+        cache = TTLCache("test", CachePolicy(ttl=60))
+        loader = Loader()
+        assert await cache.get_or_load("k", loader) == "v1"
+        assert await cache.get_or_load("k", loader) == "v1"
+        assert loader.calls == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = TTLCache("test", CachePolicy(ttl=60))
+        loader = Loader(delay=0.05)
+        assert await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5))) == ["v1"] * 5
+        assert loader.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_stale_value_served_while_refreshed():
+    async def scenario():
+        cache = TTLCache("test", CachePolicy(ttl=0.05, stale_ttl=10))
+        loader = Loader(delay=0.05)
+        assert await cache.get_or_load("k", loader) == "v1"
+        await asyncio.sleep(0.06)
+
+        # Valeur périmée servie immédiatement, un seul rafraîchissement en arrière-plan
+        assert await cache.get_or_load("k", loader) == "v1"
+        assert await cache.get_or_load("k", loader) == "v1"
+        assert cache.stale_hits == 2 and cache.refreshes == 1
+
+        await asyncio.sleep(0.1)
+        assert await cache.get_or_load("k", loader) == "v2"
+        assert loader.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_value_past_stale_window_is_reloaded():
+    async def scenario():
+        cache = TTLCache("test", CachePolicy(ttl=0.02, stale_ttl=0.02))
+        loader = Loader()
+        assert await cache.get_or_load("k", loader) == "v1"
+        await asyncio.sleep(0.05)
+        assert await cache.get_or_load("k", loader) == "v2"
+        assert cache.stale_hits == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    async def scenario():
+        cache = TTLCache("test", CachePolicy(ttl=0.02, stale_ttl=10))
+        assert await cache.get_or_load("k", Loader()) == "v1"
+        await asyncio.sleep(0.03)
+
+        failing = Loader(fail=True)
+        assert await cache.get_or_load("k", failing) == "v1"
+        await asyncio.sleep(0.01)
+        assert cache.refresh_errors == 1
+        assert cache.lookup("k") == "v1"
+
+    asyncio.run(scenario())
+
+
+def test_uncacheable_value_is_not_stored():
+    async def scenario():
+        cache = TTLCache("test", CachePolicy(ttl=60))
+        loader = Loader()
+        reject = lambda value: value != "v1"
+        assert await cache.get_or_load("k", loader, cacheable=reject) == "v1"
+        assert await cache.get_or_load("k", loader, cacheable=reject) == "v2"
+        assert await cache.get_or_load("k", loader, cacheable=reject) == "v2"
+        assert loader.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("test", CachePolicy(ttl=None, max_entries=2))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.lookup("a") == 1
+    cache.put("c", 3)
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") == 1 and cache.lookup("c") == 3
+    assert cache.evictions == 1
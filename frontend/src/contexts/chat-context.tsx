@@ -17,6 +17,7 @@ export interface ChatState {
   isLoadingMessages: boolean;
   isSending: boolean;
   hasMoreMessages: boolean;
+  messagesCursor: string | null;
   isLoadingMoreMessages: boolean;
   totalMessages: number;
   error: string | null;
@@ -39,7 +40,7 @@ export type ChatAction =
   | { type: "SET_LOADING_MESSAGES"; loading: boolean }
   | { type: "SET_SENDING"; sending: boolean }
   | { type: "PREPEND_MESSAGES"; messages: Message[] }
-  | { type: "SET_HAS_MORE_MESSAGES"; hasMore: boolean }
+  | { type: "SET_MESSAGES_CURSOR"; cursor: string | null }
   | { type: "SET_LOADING_MORE_MESSAGES"; loading: boolean }
   | { type: "SET_TOTAL_MESSAGES"; total: number }
   | { type: "SET_ERROR"; error: string | null }
@@ -60,6 +61,7 @@ const initialState: ChatState = {
   isLoadingMessages: false,
   isSending: false,
   hasMoreMessages: true,
+  messagesCursor: null,
   isLoadingMoreMessages: false,
   totalMessages: 0,
   error: null,
@@ -99,6 +101,7 @@ function chatReducer(state: ChatState, action: ChatAction): ChatState {
         activeThreadId: action.threadId,
         messages: [],
         hasMoreMessages: false,
+        messagesCursor: null,
         isLoadingMoreMessages: false,
         isLoadingMessages: action.threadId !== null,
         totalMessages: 0,
@@ -123,8 +126,9 @@ function chatReducer(state: ChatState, action: ChatAction): ChatState {
       return { ...state, isSending: action.sending };
     case "PREPEND_MESSAGES":
       return { ...state, messages: [...action.messages, ...state.messages] };
-    case "SET_HAS_MORE_MESSAGES":
-      return { ...state, hasMoreMessages: action.hasMore };
+    case "SET_MESSAGES_CURSOR":
+      // Pas de curseur suivant : les plus anciens messages sont chargés
+      return { ...state, messagesCursor: action.cursor, hasMoreMessages: action.cursor !== null };
     case "SET_LOADING_MORE_MESSAGES":
       return { ...state, isLoadingMoreMessages: action.loading };
     case "SET_TOTAL_MESSAGES":
@@ -19,12 +19,12 @@ export function useMessages() {
       dispatch({ type: "SET_LOADING_MESSAGES", loading: true });
       dispatch({ type: "SET_ERROR", error: null });
       try {
-        const data = await api.fetchMessages(activeThreadId!, MESSAGES_PAGE_SIZE, 0);
+        const data = await api.fetchMessages(activeThreadId!, MESSAGES_PAGE_SIZE, null, true);
         if (!cancelled) {
           // Les messages arrivent du plus récent au plus ancien, on les inverse pour l'affichage chrono
           dispatch({ type: "SET_MESSAGES", messages: [...data.messages].reverse() });
-          dispatch({ type: "SET_TOTAL_MESSAGES", total: data.total });
-          dispatch({ type: "SET_HAS_MORE_MESSAGES", hasMore: data.total > MESSAGES_PAGE_SIZE });
+          dispatch({ type: "SET_TOTAL_MESSAGES", total: data.total ?? data.messages.length });
+          dispatch({ type: "SET_MESSAGES_CURSOR", cursor: data.next_cursor });
         }
       } catch (err) {
         if (!cancelled) {
@@ -48,20 +48,16 @@ export function useMessages() {
   }, [activeThreadId, dispatch]);
 
   const loadMore = useCallback(async () => {
-    if (!activeThreadId || state.isLoadingMoreMessages || !state.hasMoreMessages) return;
+    if (!activeThreadId || state.isLoadingMoreMessages || !state.messagesCursor) return;
 
     dispatch({ type: "SET_LOADING_MORE_MESSAGES", loading: true });
 
     try {
-      const offset = state.messages.length;
-      const data = await api.fetchMessages(activeThreadId, MESSAGES_PAGE_SIZE, offset);
+      const data = await api.fetchMessages(activeThreadId, MESSAGES_PAGE_SIZE, state.messagesCursor);
       // Les messages arrivent du plus récent au plus ancien, on les inverse pour l'ordre chrono
       const olderMessages = [...data.messages].reverse();
       dispatch({ type: "PREPEND_MESSAGES", messages: olderMessages });
-      dispatch({
-        type: "SET_HAS_MORE_MESSAGES",
-        hasMore: offset + data.messages.length < data.total,
-      });
+      dispatch({ type: "SET_MESSAGES_CURSOR", cursor: data.next_cursor });
     } catch (err) {
       dispatch({
         type: "SET_ERROR",
@@ -70,7 +66,7 @@ export function useMessages() {
     } finally {
       dispatch({ type: "SET_LOADING_MORE_MESSAGES", loading: false });
     }
-  }, [activeThreadId, state.messages.length, state.isLoadingMoreMessages, state.hasMoreMessages, dispatch]);
+  }, [activeThreadId, state.messagesCursor, state.isLoadingMoreMessages, dispatch]);
 
   async function send(content: string): Promise<boolean> {
     if (!activeThreadId || !content.trim() || !state.selectedModel) return false;
@@ -12,6 +12,7 @@ export function useThreads() {
   const dispatch = useChatDispatch();
   const router = useRouter();
   const hasMoreRef = useRef(true);
+  const cursorRef = useRef<string | null>(null);
   const isLoadingMoreRef = useRef(false);
 
   useEffect(() => {
@@ -21,10 +22,11 @@ export function useThreads() {
       dispatch({ type: "SET_LOADING_THREADS", loading: true });
       dispatch({ type: "SET_ERROR", error: null });
       try {
-        const threads = await api.fetchThreads(THREADS_PAGE_SIZE, 0);
+        const page = await api.fetchThreads(THREADS_PAGE_SIZE, null);
         if (!cancelled) {
-          dispatch({ type: "SET_THREADS", threads });
-          hasMoreRef.current = threads.length >= THREADS_PAGE_SIZE;
+          dispatch({ type: "SET_THREADS", threads: page.threads });
+          cursorRef.current = page.next_cursor;
+          hasMoreRef.current = page.next_cursor !== null;
         }
       } catch (err) {
         if (!cancelled) {
@@ -53,10 +55,11 @@ export function useThreads() {
 
     isLoadingMoreRef.current = true;
     try {
-      const offset = state.threads.length;
-      const threads = await api.fetchThreads(THREADS_PAGE_SIZE, offset);
-      dispatch({ type: "APPEND_THREADS", threads });
-      hasMoreRef.current = threads.length >= THREADS_PAGE_SIZE;
+      // Le curseur pointe sur le dernier thread chargé : les threads créés entre-temps ne décalent pas les pages
+      const page = await api.fetchThreads(THREADS_PAGE_SIZE, cursorRef.current);
+      dispatch({ type: "APPEND_THREADS", threads: page.threads });
+      cursorRef.current = page.next_cursor;
+      hasMoreRef.current = page.next_cursor !== null;
     } catch (err) {
       dispatch({
         type: "SET_ERROR",
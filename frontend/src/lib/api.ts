@@ -1,5 +1,5 @@
 import { API_BASE_URL } from "./constants";
-import type { Thread, Message, SendMessagePayload, CreateThreadPayload, UpdateThreadPayload, ActiveModel, ActivateModelPayload, PaginatedMessages } from "@/types";
+import type { Thread, Message, SendMessagePayload, CreateThreadPayload, UpdateThreadPayload, ActiveModel, ActivateModelPayload, PaginatedMessages, PaginatedThreads } from "@/types";
 
 async function request<T>(path: string, options?: RequestInit): Promise<T> {
   const res = await fetch(`${API_BASE_URL}${path}`, {
@@ -13,16 +13,29 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
   return res.json() as Promise<T>;
 }
 
-export function fetchThreads(limit: number, offset: number): Promise<Thread[]> {
-  return request<Thread[]>(`/threads?limit=${limit}&offset=${offset}`);
+// Pagination par curseur : passer le next_cursor de la page précédente (null pour la première page)
+function pageQuery(limit: number, cursor: string | null): string {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  return params.toString();
+}
+
+export function fetchThreads(limit: number, cursor: string | null): Promise<PaginatedThreads> {
+  return request<PaginatedThreads>(`/threads?${pageQuery(limit, cursor)}`);
 }
 
 export function fetchThread(threadId: string): Promise<Thread> {
   return request<Thread>(`/threads/${threadId}`);
 }
 
-export function fetchMessages(threadId: string, limit: number, offset: number): Promise<PaginatedMessages> {
-  return request<PaginatedMessages>(`/threads/${threadId}/messages?limit=${limit}&offset=${offset}`);
+export function fetchMessages(
+  threadId: string,
+  limit: number,
+  cursor: string | null,
+  includeTotal = false,
+): Promise<PaginatedMessages> {
+  const query = pageQuery(limit, cursor) + (includeTotal ? "&include_total=true" : "");
+  return request<PaginatedMessages>(`/threads/${threadId}/messages?${query}`);
 }
 
 export function createThread(payload: CreateThreadPayload): Promise<Thread> {
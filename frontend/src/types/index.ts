@@ -19,7 +19,13 @@ export interface Message {
 
 export interface PaginatedMessages {
   messages: Message[];
-  total: number;
+  next_cursor: string | null;
+  total: number | null;
+}
+
+export interface PaginatedThreads {
+  threads: Thread[];
+  next_cursor: string | null;
 }
 
 export interface SendMessagePayload {